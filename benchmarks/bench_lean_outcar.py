@@ -0,0 +1,96 @@
+"""Benchmark the loading of large OUTCARs.
+
+Compares `load_outcar`, which streams the OUTCAR to a lean OUTCAR
+before parsing, with parsing the whole OUTCAR by dpdata, on a synthetic
+single-point OUTCAR with verbose electronic iterations.
+
+Usage: python benchmarks/bench_lean_outcar.py [natoms] [nscf] [nfill]
+"""
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import (
+    Path,
+)
+
+import dpdata
+import numpy as np
+
+import dpgen2.fp.vasp
+from dpgen2.fp.vasp import (
+    load_outcar,
+)
+
+
+def make_outcar(fname, natoms, nscf, nfill):
+    rng = np.random.default_rng(0)
+    with open(fname, "w") as fp:
+        fp.write(" vasp.6.3.0 synthetic\n")
+        for _ in range(2):
+            fp.write("   POTCAR:    PAW_PBE Al 04Jan2001\n")
+        fp.write(f"   ions per type =   {natoms}\n")
+        fp.write("   NELM   =    120;   NELMIN=  2; NELMDL= -5     # of ELM steps\n")
+        fp.write("   NWRITE =      2    write-flag & timer\n")
+        filler = "".join(
+            f"  {kk:6d} {rng.random():14.8f} {rng.random():10.5f}\n"
+            for kk in range(nfill)
+        )
+        for jj in range(nscf):
+            fp.write(f"{'-' * 40} Iteration {1:6d}({jj + 1:4d})  {'-' * 40}\n")
+            fp.write(filler)
+            fp.write(f"  free energy    TOTEN  = {rng.normal():18.8f} eV\n")
+        cell = 3.0 * natoms ** (1 / 3) * np.eye(3)
+        fp.write("  VOLUME and BASIS-vectors are now :\n")
+        fp.write(f" {'-' * 77}\n")
+        fp.write("  energy-cutoff  :      400.00\n")
+        fp.write(f"  volume of cell : {np.linalg.det(cell):14.2f}\n")
+        fp.write("      direct lattice vectors      reciprocal lattice vectors\n")
+        for vv in cell:
+            fp.write("  " + "".join(f"{xx:13.9f}" for xx in vv) + "\n")
+        fp.write("\n  FORCE on cell =-STRESS in cart. coord.  units (eV):\n")
+        for kk in range(13):
+            fp.write(f"  Term{kk:<6d}" + "  0.00000" * 6 + "\n")
+        fp.write("  in kB " + "".join(f"{xx:12.5f}" for xx in rng.normal(size=6)))
+        fp.write("\n POSITION                       TOTAL-FORCE (eV/Angst)\n")
+        fp.write(f" {'-' * 83}\n")
+        for xx in rng.uniform(0, cell[0, 0], (natoms, 3)):
+            ff = rng.normal(size=3)
+            fp.write(" " + "".join(f"{vv:13.5f}" for vv in [*xx, *ff]) + "\n")
+        fp.write(f"  free  energy   TOTEN  = {rng.normal():18.8f} eV\n")
+
+
+def measure(func):
+    tic = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - tic
+    tracemalloc.start()
+    ret = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return ret, elapsed, peak
+
+
+def main(natoms=256, nscf=60, nfill=20000):
+    with tempfile.TemporaryDirectory() as work_dir:
+        outcar = Path(work_dir) / "OUTCAR"
+        make_outcar(outcar, natoms, nscf, nfill)
+        print(f"OUTCAR of {outcar.stat().st_size / 2**20:.1f} MiB")
+
+        ref, t_ref, m_ref = measure(
+            lambda: dpdata.LabeledSystem(str(outcar), fmt="vasp/outcar")
+        )
+        dpgen2.fp.vasp.vasp_lean_outcar_size = 0
+        new, t_new, m_new = measure(lambda: load_outcar(outcar))
+        for kk in ["cells", "coords", "energies", "forces", "virials"]:
+            assert np.array_equal(ref[kk], new[kk]), kk
+
+        print(f"dpdata        {t_ref:8.3f} s   peak {m_ref / 2**20:8.1f} MiB")
+        print(
+            f"load_outcar   {t_new:8.3f} s   peak {m_new / 2**20:8.1f} MiB"
+            f"   speedup {t_ref / t_new:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main(*[int(ii) for ii in sys.argv[1:]])
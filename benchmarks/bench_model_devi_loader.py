@@ -0,0 +1,68 @@
+"""Benchmark the loading of model deviation files.
+
+Compares the loader used by `TrajRenderLammps.get_model_devi` with the
+previous per-file `np.loadtxt`, on synthetic `model_devi.out` files.
+
+Usage: python benchmarks/bench_model_devi_loader.py [ntraj] [nframes]
+"""
+import sys
+import tempfile
+import time
+from pathlib import (
+    Path,
+)
+
+import numpy as np
+
+from dpgen2.exploration.render.model_devi_loader import (
+    load_model_devis,
+)
+from dpgen2.op.run_caly_model_devi import (
+    write_model_devi_out,
+)
+
+
+def make_files(work_dir, ntraj, nframes):
+    rng = np.random.default_rng(0)
+    fnames = []
+    for ii in range(ntraj):
+        devi = np.zeros((nframes, 8))
+        devi[:, 0] = np.arange(nframes) * 10
+        devi[:, 1:] = rng.random((nframes, 7))
+        fname = Path(work_dir) / f"model_devi.{ii:04d}.out"
+        write_model_devi_out(devi, fname)
+        fnames.append(fname)
+    return fnames
+
+
+def timeit(func, nrepeat=3):
+    ret = []
+    for _ in range(nrepeat):
+        tic = time.perf_counter()
+        func()
+        ret.append(time.perf_counter() - tic)
+    return min(ret)
+
+
+def main(ntraj=32, nframes=50000):
+    with tempfile.TemporaryDirectory() as work_dir:
+        fnames = make_files(work_dir, ntraj, nframes)
+        nbytes = sum([ff.stat().st_size for ff in fnames])
+        print(f"{ntraj} files, {nframes} frames each, {nbytes / 2**20:.1f} MiB")
+
+        ref = [np.loadtxt(ff)[:, 1:7] for ff in fnames]
+        new = load_model_devis(fnames)
+        assert all([np.array_equal(aa, bb) for aa, bb in zip(ref, new)])
+
+        t_ref = timeit(lambda: [np.loadtxt(ff) for ff in fnames])
+        print(f"np.loadtxt               {t_ref:8.3f} s")
+        for max_workers in (1, None):
+            tt = timeit(lambda: load_model_devis(fnames, max_workers=max_workers))
+            print(
+                f"load_model_devis({str(max_workers):>4s})   {tt:8.3f} s"
+                f"   speedup {t_ref / tt:5.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main(*[int(ii) for ii in sys.argv[1:]])
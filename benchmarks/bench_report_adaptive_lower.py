@@ -0,0 +1,117 @@
+"""Benchmark `ExplorationReportAdaptiveLower.record`.
+
+Compares the vectorized `record` with the previous per-frame Python
+implementation (reproduced below as `record_reference`) on synthetic
+model deviations, and checks that both give the same trust levels and
+the same candidate, accurate and failed frames.
+
+Usage: python benchmarks/bench_report_adaptive_lower.py [ntraj] [nframes]
+"""
+import sys
+import time
+
+import numpy as np
+
+from dpgen2.exploration.deviation import (
+    DeviManager,
+    DeviManagerColumnar,
+)
+from dpgen2.exploration.report import (
+    ExplorationReportAdaptiveLower,
+)
+
+
+def record_reference(report, model_devi):
+    md_f = model_devi.get(DeviManager.MAX_DEVI_F)
+    md_v = model_devi.get(DeviManager.MAX_DEVI_V)
+    candi = set()
+    accur = set()
+    failed = []
+    coll_f = []
+    coll_v = []
+    for tt in range(model_devi.ntraj):
+        ff = md_f[tt]
+        vv = md_v[tt] if md_v[tt] is not None else np.zeros_like(ff)
+        for ii in range(ff.shape[0]):
+            if ff[ii] > report.level_f_hi or vv[ii] > report.level_v_hi:
+                failed.append((tt, ii))
+            else:
+                coll_f.append([ff[ii], tt, ii])
+                coll_v.append([vv[ii], tt, ii])
+                accur.add((tt, ii))
+    coll_f.sort()
+    coll_v.sort()
+    numb_candi_f = max(report.numb_candi_f, int(report.rate_candi_f * len(coll_f)))
+    numb_candi_v = max(report.numb_candi_v, int(report.rate_candi_v * len(coll_v)))
+    numb_candi_f = min(numb_candi_f, len(coll_f))
+    numb_candi_v = min(numb_candi_v, len(coll_v))
+    if numb_candi_v == 0:
+        level_v_lo = report.level_v_hi
+    else:
+        level_v_lo = coll_v[-numb_candi_v][0]
+    if not report.has_virial:
+        level_v_lo = None
+    if numb_candi_f == 0:
+        level_f_lo = report.level_f_hi
+    else:
+        level_f_lo = coll_f[-numb_candi_f][0]
+    for ii in range(len(coll_f) - numb_candi_f, len(coll_f)):
+        candi.add(tuple(coll_f[ii][1:]))
+    for ii in range(len(coll_v) - numb_candi_v, len(coll_v)):
+        candi.add(tuple(coll_v[ii][1:]))
+    accur = accur - candi
+    return level_f_lo, level_v_lo, candi, accur, failed
+
+
+def make_model_devi(ntraj, nframes):
+    rng = np.random.default_rng(0)
+    model_devi = DeviManagerColumnar()
+    for ii in range(ntraj):
+        # rounded to have ties in the model deviations
+        model_devi.add(DeviManager.MAX_DEVI_F, np.round(rng.random(nframes), 4))
+        model_devi.add(DeviManager.MAX_DEVI_V, np.round(rng.random(nframes), 4))
+    model_devi.freeze()
+    return model_devi
+
+
+def timeit(func, nrepeat=3):
+    ret = []
+    for _ in range(nrepeat):
+        tic = time.perf_counter()
+        func()
+        ret.append(time.perf_counter() - tic)
+    return min(ret)
+
+
+def main(ntraj=32, nframes=20000):
+    model_devi = make_model_devi(ntraj, nframes)
+    print(f"{ntraj} trajectories, {nframes} frames each")
+    report = ExplorationReportAdaptiveLower(
+        level_f_hi=0.8,
+        numb_candi_f=200,
+        rate_candi_f=0.01,
+        level_v_hi=0.9,
+        numb_candi_v=100,
+        rate_candi_v=0.005,
+    )
+
+    report.record(model_devi)
+    ref = record_reference(report, model_devi)
+    assert ref[0] == report.level_f_lo
+    assert ref[1] == report.level_v_lo
+    assert ref[2] == report.candi
+    assert ref[3] == report.accur
+    assert ref[4] == report.failed
+
+    def run():
+        report.clear()
+        report.record(model_devi)
+
+    t_ref = timeit(lambda: record_reference(report, model_devi), nrepeat=1)
+    print(f"reference                {t_ref:8.3f} s")
+    tt = timeit(run)
+    print(f"record                   {tt:8.3f} s   speedup {t_ref / tt:5.0f}x")
+
+
+if __name__ == "__main__":
+    main(*[int(ii) for ii in sys.argv[1:]])
@@ -1,3 +1,4 @@
+block_id_pattern = "iter-%06d"
 train_index_pattern = "%04d"
 train_task_pattern = "task." + train_index_pattern
 train_script_name = "input.json"
@@ -12,6 +13,7 @@ lmp_input_name = "in.lammps"
 plm_input_name = "input.plumed"
 plm_output_name = "output.plumed"
 lmp_traj_name = "traj.dump"
+lmp_binary_traj_name = "traj.bin"
 lmp_log_name = "log.lammps"
 lmp_model_devi_name = "model_devi.out"
 fp_index_pattern = "%06d"
@@ -19,6 +19,9 @@ from dpgen2.constants import (
 from dpgen2.exploration.report import (
     conv_styles,
 )
+from dpgen2.exploration.selector import (
+    conf_filter_styles,
+)
 from dpgen2.fp import (
     fp_styles,
 )
@@ -27,6 +30,7 @@ from dpgen2.op.run_dp_train import (
 )
 from dpgen2.op.run_lmp import (
     RunLmp,
+    binary_traj_args,
 )
 from dpgen2.utils import (
     normalize_step_dict,
@@ -123,6 +127,25 @@ def variant_conv():
     )
 
 
+def variant_filter():
+    doc = "the type of the configuration filter."
+    var_list = []
+    for kk in conf_filter_styles.keys():
+        var_list.append(
+            Argument(
+                kk,
+                dict,
+                conf_filter_styles[kk].args(),
+                doc=conf_filter_styles[kk].doc(),
+            )
+        )
+    return Variant(
+        "type",
+        var_list,
+        doc=doc,
+    )
+
+
 def variant_conf():
     doc = "the type of the initial configuration generator."
     var_list = []
@@ -149,7 +172,13 @@ def lmp_args():
         "Fatal when the number of iteration per stage reaches the `max_numb_iter`"
     )
     doc_output_nopbc = "Remove pbc of the output configurations"
+    doc_select_workers = (
+        "The number of processes extracting the selected configurations "
+        "from the trajectories in select-confs. If 1, the trajectories are "
+        "processed sequentially. If None, all CPUs are used."
+    )
     doc_convergence = "The method of convergence check."
+    doc_filters = "A list of configuration filters. The selected configurations that do not pass all the filters are dropped."
     doc_configuration = "A list of initial configurations."
     doc_stages = (
         "The definition of exploration stages of type `List[List[ExplorationTaskGroup]`. "
@@ -176,6 +205,13 @@ def lmp_args():
         Argument(
             "output_nopbc", bool, optional=True, default=False, doc=doc_output_nopbc
         ),
+        Argument(
+            "select_workers",
+            [int, None],
+            optional=True,
+            default=1,
+            doc=doc_select_workers,
+        ),
         Argument(
             "convergence",
             dict,
@@ -184,6 +220,16 @@ def lmp_args():
             optional=False,
             doc=doc_convergence,
         ),
+        Argument(
+            "filters",
+            list,
+            [],
+            [variant_filter()],
+            optional=True,
+            default=[],
+            repeat=True,
+            doc=doc_filters,
+        ),
         Argument(
             "configurations",
             list,
@@ -202,6 +248,20 @@ def run_expl_caly_conf_args():
     doc_caly_model_devi_group_size = "group size for model deviation."
     doc_run_calypso_command = "command of running calypso."
     doc_caly_run_dp_opt_command = "command of running optimization with dp."
+    doc_model_devi_sidecar = (
+        "Write the model deviation also in a binary sidecar (float64 .npy) "
+        "and output it alongside the text file. The sidecar is read when "
+        "selecting configurations."
+    )
+    doc_binary_traj = (
+        "Output the trajectories in the compact binary format instead of "
+        "the LAMMPS dump."
+    )
+    doc_model_devi_batch_size = (
+        "The maximal number of frames evaluated at once in the model "
+        "deviation calculation. The frames with the same atom types are "
+        "evaluated together."
+    )
     return [
         Argument(
             "model_devi_group_size",
@@ -222,6 +282,28 @@ def run_expl_caly_conf_args():
             optional=True,
             doc=doc_caly_run_dp_opt_command,
         ),
+        Argument(
+            "model_devi_sidecar",
+            bool,
+            optional=True,
+            default=False,
+            doc=doc_model_devi_sidecar,
+        ),
+        Argument(
+            "binary_traj",
+            dict,
+            binary_traj_args(),
+            optional=True,
+            default=None,
+            doc=doc_binary_traj,
+        ),
+        Argument(
+            "model_devi_batch_size",
+            int,
+            optional=True,
+            default=256,
+            doc=doc_model_devi_batch_size,
+        ),
     ]
 
 
@@ -232,7 +314,13 @@ def caly_args():
         "Fatal when the number of iteration per stage reaches the `max_numb_iter`"
     )
     doc_output_nopbc = "Remove pbc of the output configurations"
+    doc_select_workers = (
+        "The number of processes extracting the selected configurations "
+        "from the trajectories in select-confs. If 1, the trajectories are "
+        "processed sequentially. If None, all CPUs are used."
+    )
     doc_convergence = "The method of convergence check."
+    doc_filters = "A list of configuration filters. The selected configurations that do not pass all the filters are dropped."
     doc_configuration = "A list of initial configurations."
     doc_stages = (
         "The definition of exploration stages of type `List[List[ExplorationTaskGroup]`. "
@@ -259,6 +347,13 @@ def caly_args():
         Argument(
             "output_nopbc", bool, optional=True, default=False, doc=doc_output_nopbc
         ),
+        Argument(
+            "select_workers",
+            [int, None],
+            optional=True,
+            default=1,
+            doc=doc_select_workers,
+        ),
         Argument(
             "convergence",
             dict,
@@ -267,6 +362,16 @@ def caly_args():
             optional=False,
             doc=doc_convergence,
         ),
+        Argument(
+            "filters",
+            list,
+            [],
+            [variant_filter()],
+            optional=True,
+            default=[],
+            repeat=True,
+            doc=doc_filters,
+        ),
         Argument(
             "configurations",
             list,
@@ -301,6 +406,16 @@ def fp_args(inputs, run):
     doc_inputs_config = "Configuration for preparing vasp inputs"
     doc_run_config = "Configuration for running vasp tasks"
     doc_task_max = "Maximum number of vasp tasks for each iteration"
+    doc_prep_workers = (
+        "The number of processes preparing the fp tasks in prep-fp. "
+        "If 1, the tasks are prepared sequentially. If None, all CPUs are used."
+    )
+    doc_label_cache = (
+        "The cache of the fp labels shared across iterations and workflows, "
+        'e.g. {"type": "dir", "path": "/path/to/cache"}. The fp tasks with the '
+        "same input files and run config, except the command, as a cached task "
+        "load the labels instead of running. If None, the labels are not cached."
+    )
 
     return [
         Argument(
@@ -318,6 +433,20 @@ def fp_args(inputs, run):
             doc=doc_run_config,
         ),
         Argument("task_max", int, optional=True, default=10, doc=doc_task_max),
+        Argument(
+            "prep_workers",
+            [int, None],
+            optional=True,
+            default=1,
+            doc=doc_prep_workers,
+        ),
+        Argument(
+            "label_cache",
+            [dict, None],
+            optional=True,
+            default=None,
+            doc=doc_label_cache,
+        ),
     ]
 
 
@@ -62,15 +62,22 @@ from dpgen2.exploration.render import (
     TrajRenderLammps,
 )
 from dpgen2.exploration.report import (
+    ExplorationReport,
+    ExplorationReportAdaptiveLower,
     ExplorationReportTrustLevelsRandom,
     conv_styles,
 )
+from dpgen2.exploration.report.report_trust_levels_base import (
+    ExplorationReportTrustLevels,
+)
 from dpgen2.exploration.scheduler import (
     ConvergenceCheckStageScheduler,
     ExplorationScheduler,
 )
 from dpgen2.exploration.selector import (
+    ConfFilters,
     ConfSelectorFrames,
+    conf_filter_styles,
 )
 from dpgen2.exploration.task import (
     CustomizedLmpTemplateTaskGroup,
@@ -92,6 +99,8 @@ from dpgen2.fp import (
 from dpgen2.op import (
     CollectData,
     CollRunCaly,
+    CompressModels,
+    FreezeModels,
     PrepCalyDPOptim,
     PrepCalyInput,
     PrepCalyModelDevi,
@@ -153,6 +162,8 @@ def make_concurrent_learning_op(
     cl_step_config: dict = default_config,
     upload_python_packages: Optional[List[os.PathLike]] = None,
     valid_data: Optional[S3Artifact] = None,
+    compress_models: bool = False,
+    freeze_models: bool = False,
 ):
     if train_style in ("dp", "dp-dist"):
         prep_run_train_op = PrepRunDPTrain(
@@ -163,6 +174,7 @@ def make_concurrent_learning_op(
             run_config=run_train_config,
             upload_python_packages=upload_python_packages,
             valid_data=valid_data,
+            compress_op=CompressModels if compress_models else None,
         )
     else:
         raise RuntimeError(f"unknown train_style {train_style}")
@@ -174,6 +186,7 @@ def make_concurrent_learning_op(
             prep_config=prep_explore_config,
             run_config=run_explore_config,
             upload_python_packages=upload_python_packages,
+            freeze_op=FreezeModels if freeze_models else None,
         )
     elif "calypso" in explore_style:
         expl_mode = explore_style.split(":")[-1] if ":" in explore_style else "default"
@@ -268,6 +281,61 @@ def make_naive_exploration_scheduler(
         )
 
 
+def make_conf_filters(filters: List[dict]) -> Optional[ConfFilters]:
+    if len(filters) == 0:
+        return None
+    conf_filters = ConfFilters()
+    for ff in filters:
+        ff = copy.deepcopy(ff)
+        filter_style = ff.pop("type")
+        conf_filters.add(conf_filter_styles[filter_style](**ff))
+    return conf_filters
+
+
+def check_prune_traj(
+    prune_traj: Optional[dict],
+    report: ExplorationReport,
+):
+    r"""Check that the trust window of `prune_traj` encloses the trust
+    levels of the report, so that no candidate frame is pruned.
+    """
+    if prune_traj is None:
+        return
+    if isinstance(report, ExplorationReportAdaptiveLower):
+        # the lower trust levels are adapted in the exploration
+        level_f_lo, level_v_lo = 0.0, None
+        level_f_hi = report.level_f_hi
+        level_v_hi = report.level_v_hi if report.has_virial else None
+    elif isinstance(report, ExplorationReportTrustLevels):
+        level_f_lo, level_f_hi = report.level_f_lo, report.level_f_hi
+        level_v_lo, level_v_hi = (
+            (report.level_v_lo, report.level_v_hi) if report.v_level else (None, None)
+        )
+    else:
+        raise RuntimeError(
+            f"the trajectories cannot be pruned for the report {type(report).__name__}"
+        )
+    # the frames failed in the window should be failed by the report
+    enclosed = prune_traj["level_f_hi"] >= level_f_hi
+    if prune_traj["level_v_hi"] is not None:
+        enclosed &= level_v_hi is not None and prune_traj["level_v_hi"] >= level_v_hi
+    # the frames accurate in the window should be accurate by the report
+    if level_v_lo is None:
+        enclosed &= prune_traj["level_f_lo"] <= level_f_lo
+    else:
+        enclosed &= prune_traj["level_f_lo"] <= 0.0 or (
+            prune_traj["level_f_lo"] <= level_f_lo
+            and prune_traj["level_v_lo"] is not None
+            and prune_traj["level_v_lo"] <= level_v_lo
+        )
+    if not enclosed:
+        raise RuntimeError(
+            f"the trust window of prune_traj {prune_traj} does not enclose the "
+            f"trust levels of the report {type(report).__name__}, the candidates "
+            "may be pruned"
+        )
+
+
 def make_calypso_naive_exploration_scheduler(config):
     model_devi_jobs = config["explore"]["stages"]
     fp_task_max = config["fp"]["task_max"]
@@ -275,16 +343,18 @@ def make_calypso_naive_exploration_scheduler(config):
     fatal_at_max = config["explore"]["fatal_at_max"]
     convergence = config["explore"]["convergence"]
     output_nopbc = config["explore"]["output_nopbc"]
+    select_workers = config["explore"]["select_workers"]
     scheduler = ExplorationScheduler()
     # report
     conv_style = convergence.pop("type")
     report = conv_styles[conv_style](**convergence)
-    render = TrajRenderLammps(nopbc=output_nopbc)
+    render = TrajRenderLammps(nopbc=output_nopbc, conf_workers=select_workers)
     # selector
     selector = ConfSelectorFrames(
         render,
         report,
         fp_task_max,
+        make_conf_filters(config["explore"]["filters"]),
     )
 
     for job_ in model_devi_jobs:
@@ -325,16 +395,19 @@ def make_lmp_naive_exploration_scheduler(config):
     fatal_at_max = config["explore"]["fatal_at_max"]
     convergence = config["explore"]["convergence"]
     output_nopbc = config["explore"]["output_nopbc"]
+    select_workers = config["explore"]["select_workers"]
     scheduler = ExplorationScheduler()
     # report
     conv_style = convergence.pop("type")
     report = conv_styles[conv_style](**convergence)
-    render = TrajRenderLammps(nopbc=output_nopbc)
+    check_prune_traj(config["explore"]["config"]["prune_traj"], report)
+    render = TrajRenderLammps(nopbc=output_nopbc, conf_workers=select_workers)
     # selector
     selector = ConfSelectorFrames(
         render,
         report,
         fp_task_max,
+        make_conf_filters(config["explore"]["filters"]),
     )
 
     sys_configs_lmp = []
@@ -528,6 +601,9 @@ def workflow_concurrent_learning(
         cl_step_config=cl_step_config,
         upload_python_packages=upload_python_packages,
         valid_data=valid_data,
+        compress_models=train_config["compress"],
+        # only the models trained by pytorch are frozen for the exploration
+        freeze_models=train_config["impl"] == "pytorch",
     )
     scheduler = make_naive_exploration_scheduler(config)
 
@@ -556,6 +632,8 @@ def workflow_concurrent_learning(
 
     fp_config["inputs"] = fp_inputs
     fp_config["run"] = config["fp"]["run_config"]
+    fp_config["prep_workers"] = config["fp"]["prep_workers"]
+    fp_config["label_cache"] = config["fp"]["label_cache"]
     if fp_style == "deepmd":
         assert (
             "teacher_model_path" in fp_config["run"]
@@ -818,6 +896,10 @@ def get_superop(key):
         return key.replace("prep-train", "prep-run-train")
     elif "run-train-" in key:
         return re.sub("run-train-[0-9]*", "prep-run-train", key)
+    elif "compress-models" in key:
+        return key.replace("compress-models", "prep-run-train")
+    elif "freeze-models" in key:
+        return key.replace("freeze-models", "prep-run-explore")
     elif "prep-lmp" in key:
         return key.replace("prep-lmp", "prep-run-explore")
     elif "run-lmp-" in key:
@@ -878,10 +960,12 @@ def get_resubmit_keys(
         "prep-train",
         "run-train",
         "modify-train-script",
+        "compress-models",
         "prep-caly-input",
         "prep-caly-model-devi",
         "run-caly-model-devi",
         "prep-run-explore",
+        "freeze-models",
         "prep-lmp",
         "run-lmp",
         "select-confs",
@@ -1,3 +1,6 @@
+from .deviation_columnar import (
+    DeviManagerColumnar,
+)
 from .deviation_manager import (
     DeviManager,
 )
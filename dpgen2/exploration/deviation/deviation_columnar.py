@@ -0,0 +1,142 @@
+from collections import (
+    defaultdict,
+)
+from typing import (
+    Dict,
+    List,
+    Optional,
+)
+
+import numpy as np
+
+from .deviation_manager import (
+    DeviManager,
+)
+
+
+class DeviManagerColumnar(DeviManager):
+    r"""The columnar implementation of DeviManager.
+
+    Each deviation (e.g. max_devi_f, max_devi_v in file `model_devi.out`)
+    is stored as one contiguous one-dimensional np.ndarray holding the
+    frames of all trajectories back to back. A trajectory-offset index
+    `offsets` of length `ntraj + 1` is shared by all deviations: the
+    frames of the ii-th trajectory are `offsets[ii]:offsets[ii+1]`.
+
+    Deviations are collected by `add` and concatenated by `freeze`. The
+    data is validated once at freeze time, which happens implicitly on
+    the first `get`. Adding more deviations after freezing is allowed,
+    the manager is frozen again on the next `get`.
+
+    `get` returns the same List[Optional[np.ndarray]] as `DeviManagerStd`,
+    the per-trajectory arrays are views of the contiguous storage.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._pending = defaultdict(list)
+        self._data = {}
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._frozen = True
+
+    def _add(self, name: str, deviation: np.ndarray) -> None:
+        assert isinstance(
+            deviation, np.ndarray
+        ), f"Error: deviation(type: {type(deviation)}) is not a np.ndarray"
+        assert len(deviation.shape) == 1, (
+            f"Error: deviation(shape: {deviation.shape}) is not a "
+            + f"one-dimensional array"
+        )
+
+        if self._frozen and len(self._data) > 0:
+            self._unfreeze()
+        self._frozen = False
+        self._pending[name].append(deviation)
+        self.ntraj = max(self.ntraj, len(self._pending[name]))
+
+    def _unfreeze(self) -> None:
+        for name, arr in self._data.items():
+            self._pending[name] = [
+                arr[self._offsets[ii] : self._offsets[ii + 1]]
+                for ii in range(len(self._offsets) - 1)
+            ]
+        self._data = {}
+
+    def freeze(self) -> None:
+        r"""Concatenate the added deviations into contiguous arrays and
+        validate the data. Calling `freeze` on a frozen manager is a no-op.
+        """
+        if self._frozen:
+            return
+        self._check_pending()
+        nframes = [arr.shape[0] for arr in self._pending[DeviManager.MAX_DEVI_F]]
+        offsets = np.zeros(self.ntraj + 1, dtype=np.int64)
+        np.cumsum(nframes, out=offsets[1:])
+        data = {}
+        for name, arrs in self._pending.items():
+            if len(arrs) > 0:
+                data[name] = np.concatenate(arrs)
+        self._data = data
+        self._offsets = offsets
+        self._pending = defaultdict(list)
+        self._frozen = True
+
+    def _check_pending(self) -> None:
+        model_devi_names = (
+            DeviManager.MAX_DEVI_V,
+            DeviManager.MIN_DEVI_V,
+            DeviManager.AVG_DEVI_V,
+            DeviManager.MAX_DEVI_F,
+            DeviManager.MIN_DEVI_F,
+            DeviManager.AVG_DEVI_F,
+        )
+        # check the length of model deviations
+        frames = {}
+        for name in model_devi_names:
+            if len(self._pending[name]) > 0:
+                assert len(self._pending[name]) == self.ntraj, (
+                    f"Error: the number of model deviation {name} "
+                    + f"({len(self._pending[name])}) and trajectory files ({self.ntraj}) "
+                    + f"are not equal."
+                )
+                frames[name] = [arr.shape[0] for arr in self._pending[name]]
+
+        # check if "max_devi_f" exists
+        assert (
+            len(self._pending[DeviManager.MAX_DEVI_F]) == self.ntraj
+        ), f"Error: cannot find model deviation {DeviManager.MAX_DEVI_F}"
+
+        # check if the length of the arrays corresponding to the same
+        # trajectory has the same number of frames
+        non_empty_deviations = list(frames.keys())
+        for name in non_empty_deviations[1:]:
+            assert frames[name] == frames[non_empty_deviations[0]], (
+                f"Error: the number of frames in {name} is different "
+                + f"with that in {non_empty_deviations[0]}.\n"
+                + f"{name}: {frames[name]}\n"
+                + f"{non_empty_deviations[0]}: {frames[non_empty_deviations[0]]}\n"
+            )
+
+    def _check_data(self) -> None:
+        r"""Check if data is valid"""
+        self.freeze()
+
+    def _get(self, name: str) -> List[Optional[np.ndarray]]:
+        if self.ntraj == 0:
+            return []
+        elif name not in self._data:
+            return [None for _ in range(self.ntraj)]
+        else:
+            return np.split(self._data[name], self._offsets[1:-1])
+
+    def _get_flat(self, name: str) -> Optional[np.ndarray]:
+        if name not in self._data:
+            return None
+        return self._data[name]
+
+    def _get_offsets(self) -> np.ndarray:
+        return self._offsets
+
+    def clear(self) -> None:
+        self.__init__()
+        return None
@@ -5,6 +5,7 @@ from abc import (
 from typing import (
     List,
     Optional,
+    Tuple,
 )
 
 import numpy as np
@@ -74,6 +75,64 @@ class DeviManager(ABC):
     def _get(self, name: str) -> List[Optional[np.ndarray]]:
         pass
 
+    def get_flat(self, name: str) -> Optional[np.ndarray]:
+        r"""Gat a model deviation of all trajectories as one
+        concatenated one-dimensional array.
+
+        The frames of the ii-th trajectory are
+        `get_offsets()[ii]:get_offsets()[ii+1]`. Returns None if the
+        deviation is not recorded.
+
+        Parameters
+        ----------
+        name : str
+            The name of the deviation. The name is restricted to
+            (DeviManager.MAX_DEVI_V, DeviManager.MIN_DEVI_V,
+             DeviManager.AVG_DEVI_V, DeviManager.MAX_DEVI_F,
+             DeviManager.MIN_DEVI_F, DeviManager.AVG_DEVI_F)
+        """
+        self._check_name(name)
+        self._check_data()
+        if self.ntraj == 0:
+            return np.zeros(0)
+        return self._get_flat(name)
+
+    def _get_flat(self, name: str) -> Optional[np.ndarray]:
+        data = self._get(name)
+        if data[0] is None:
+            return None
+        return np.concatenate(data)
+
+    def get_offsets(self) -> np.ndarray:
+        r"""Get the trajectory-offset index of the concatenated deviations.
+        An integer array of length `ntraj + 1`.
+        """
+        self._check_data()
+        return self._get_offsets()
+
+    def _get_offsets(self) -> np.ndarray:
+        nframes = [arr.shape[0] for arr in self._get(DeviManager.MAX_DEVI_F)]  # type: ignore
+        offsets = np.zeros(self.ntraj + 1, dtype=np.int64)
+        np.cumsum(nframes, out=offsets[1:])
+        return offsets
+
+    def get_frame_index(self) -> Tuple[np.ndarray, np.ndarray]:
+        r"""Get the trajectory index and the in-trajectory frame index
+        of each frame in the concatenated deviations.
+
+        Returns
+        -------
+        traj_idx : np.ndarray
+            The trajectory index of each frame.
+        frame_idx : np.ndarray
+            The frame index in its trajectory of each frame.
+        """
+        offsets = self.get_offsets()
+        nframes = np.diff(offsets)
+        traj_idx = np.repeat(np.arange(self.ntraj, dtype=np.int64), nframes)
+        frame_idx = np.arange(offsets[-1], dtype=np.int64) - offsets[traj_idx]
+        return traj_idx, frame_idx
+
     @abstractmethod
     def clear(self) -> None:
         r"""Clear all data in this manager."""
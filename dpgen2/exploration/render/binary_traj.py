@@ -0,0 +1,344 @@
+import json
+import mmap
+import struct
+from pathlib import (
+    Path,
+)
+from typing import (
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Union,
+)
+
+import dpdata
+import numpy as np
+
+from .lammps_dump_reader import (
+    LammpsDumpReader,
+)
+
+binary_traj_magic = b"DPGENTRJ"
+binary_traj_version = 1
+binary_traj_compressions = (None, "zstd")
+# magic, the offset and the length of the footer
+_preamble = struct.Struct("<8sQQ")
+# the number of frames parsed at once when converting LAMMPS dumps
+_convert_chunk_size = 256
+
+
+def is_binary_traj(
+    fname: Union[str, Path],
+) -> bool:
+    r"""Check if a file is a binary trajectory written by `BinaryTrajWriter`."""
+    with open(fname, "rb") as fp:
+        return fp.read(len(binary_traj_magic)) == binary_traj_magic
+
+
+class BinaryTrajWriter:
+    r"""Write a compact binary trajectory.
+
+    The coordinates of each frame are stored in float32, optionally
+    compressed by zstd frame by frame. The cells (float64), the time
+    steps and the byte offsets of the frames are stored after the
+    frames, followed by a JSON footer, so the trajectory is written
+    frame by frame and any frame can be read without reading the
+    others. Frames may be stored as pruned, i.e. only the time step is
+    kept, to keep the frame indexes of the original trajectory.
+
+    Parameters
+    ----------
+    fname : str or Path
+        The binary trajectory.
+    compression : str, optional
+        None or "zstd". The zstd compression requires `zstandard`.
+    """
+
+    def __init__(
+        self,
+        fname: Union[str, Path],
+        compression: Optional[str] = None,
+    ):
+        if compression not in binary_traj_compressions:
+            raise RuntimeError(f"unknown compression {compression}")
+        self.fname = Path(fname)
+        self.compression = compression
+        self._compressor = (
+            _import_zstd().ZstdCompressor() if compression == "zstd" else None
+        )
+        self.atom_numbs: Optional[List[int]] = None
+        self.atom_types: Optional[np.ndarray] = None
+        self.cells: List[np.ndarray] = []
+        self.timesteps: List[int] = []
+        self.offsets: List[int] = []
+        self.fp = open(self.fname, "wb")
+        self.fp.write(_preamble.pack(binary_traj_magic, 0, 0))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def append(
+        self,
+        system: dpdata.System,
+        timesteps: Sequence[int],
+    ) -> None:
+        r"""Write the frames of a system.
+
+        Parameters
+        ----------
+        system : dpdata.System
+            The frames. All frames of a trajectory have the same atoms.
+        timesteps : Sequence[int]
+            The time steps of the frames.
+        """
+        assert len(timesteps) == system.get_nframes()
+        atom_types = np.asarray(system["atom_types"])
+        if self.atom_types is None:
+            self.atom_numbs = [int(ii) for ii in system["atom_numbs"]]
+            self.atom_types = atom_types
+        elif not np.array_equal(self.atom_types, atom_types):
+            raise RuntimeError(
+                f"the atom types of the frames written to {self.fname} changed"
+            )
+        coords = np.asarray(system["coords"], dtype=np.float32)
+        for ii in range(system.get_nframes()):
+            buff = coords[ii].tobytes()
+            if self._compressor is not None:
+                buff = self._compressor.compress(buff)
+            self.offsets.append(self.fp.tell())
+            self.fp.write(buff)
+            self.cells.append(system["cells"][ii])
+            self.timesteps.append(int(timesteps[ii]))
+
+    def append_pruned(
+        self,
+        timestep: int,
+    ) -> None:
+        r"""Write a pruned frame, only the time step is kept."""
+        self.offsets.append(self.fp.tell())
+        self.cells.append(np.zeros((3, 3)))
+        self.timesteps.append(int(timestep))
+
+    def close(self) -> None:
+        if self.fp.closed:
+            return
+        self.offsets.append(self.fp.tell())
+        arrays = {
+            "cells": np.array(self.cells, dtype=np.float64).reshape(-1, 3, 3),
+            "timesteps": np.array(self.timesteps, dtype=np.int64),
+            "offsets": np.array(self.offsets, dtype=np.int64),
+            "atom_types": np.asarray(
+                self.atom_types if self.atom_types is not None else [],
+                dtype=np.int64,
+            ),
+        }
+        footer = {
+            "version": binary_traj_version,
+            "compression": self.compression,
+            "atom_numbs": self.atom_numbs if self.atom_numbs is not None else [],
+            "arrays": {},
+        }
+        for kk, vv in arrays.items():
+            footer["arrays"][kk] = [self.fp.tell(), vv.dtype.str, list(vv.shape)]
+            self.fp.write(vv.tobytes())
+        footer_offset = self.fp.tell()
+        footer_buff = json.dumps(footer).encode()
+        self.fp.write(footer_buff)
+        self.fp.seek(0)
+        self.fp.write(
+            _preamble.pack(binary_traj_magic, footer_offset, len(footer_buff))
+        )
+        self.fp.close()
+
+
+class BinaryTrajReader:
+    r"""Random-access reader of binary trajectories written by
+    `BinaryTrajWriter`.
+
+    The file is memory-mapped, only the requested frames are read.
+    `get_system` returns the same systems as `LammpsDumpReader.get_system`
+    on the LAMMPS dump the binary trajectory is converted from, except
+    that the coordinates are rounded to float32.
+
+    Parameters
+    ----------
+    fname : str or Path
+        The binary trajectory.
+    """
+
+    def __init__(
+        self,
+        fname: Union[str, Path],
+    ):
+        self.fname = Path(fname)
+        with open(self.fname, "rb") as fp:
+            magic, footer_offset, footer_len = _preamble.unpack(fp.read(_preamble.size))
+            if magic != binary_traj_magic:
+                raise RuntimeError(f"{self.fname} is not a binary trajectory")
+            fp.seek(footer_offset)
+            footer = json.loads(fp.read(footer_len))
+            arrays = {}
+            for kk, (offset, dtype, shape) in footer["arrays"].items():
+                fp.seek(offset)
+                count = int(np.prod(shape))
+                arrays[kk] = np.fromfile(fp, dtype=dtype, count=count).reshape(shape)
+        self.compression = footer["compression"]
+        self.atom_numbs = footer["atom_numbs"]
+        self.cells = arrays["cells"]
+        self.timesteps = arrays["timesteps"]
+        self.offsets = arrays["offsets"]
+        self.atom_types = arrays["atom_types"]
+
+    @property
+    def nframes(self) -> int:
+        r"""The number of frames in the trajectory."""
+        return len(self.timesteps)
+
+    def read_coords(
+        self,
+        frame_idx: Sequence[int],
+    ) -> np.ndarray:
+        r"""Read the float32 coordinates of the frames."""
+        natoms = len(self.atom_types)
+        ret = np.zeros((len(frame_idx), natoms, 3), dtype=np.float32)
+        if len(frame_idx) == 0:
+            return ret
+        decompressor = (
+            _import_zstd().ZstdDecompressor() if self.compression == "zstd" else None
+        )
+        with open(self.fname, "rb") as fp, mmap.mmap(
+            fp.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mm:
+            for jj, ii in enumerate(frame_idx):
+                if not 0 <= ii < self.nframes:
+                    raise IndexError(
+                        f"frame index {ii} is out of range for the trajectory "
+                        f"{self.fname} containing {self.nframes} frames"
+                    )
+                start, end = self.offsets[ii], self.offsets[ii + 1]
+                if start == end:
+                    raise RuntimeError(
+                        f"frame {ii} of the trajectory {self.fname} is pruned, "
+                        "the trust window of pruning may not enclose the trust "
+                        "levels of the selection"
+                    )
+                buff = mm[start:end]
+                if decompressor is not None:
+                    buff = decompressor.decompress(buff)
+                ret[jj] = np.frombuffer(buff, dtype=np.float32).reshape(natoms, 3)
+        return ret
+
+    def get_system(
+        self,
+        frame_idx: Sequence[int],
+        type_map: Optional[List[str]] = None,
+    ) -> dpdata.System:
+        r"""Read the frames.
+
+        Parameters
+        ----------
+        frame_idx : Sequence[int]
+            The indexes of the frames.
+        type_map : List[str], optional
+            The type map. The ii-th atom type is named by `type_map[ii]`
+            as the LAMMPS dump format of `dpdata` does.
+
+        Returns
+        -------
+        system : dpdata.System
+            The frames.
+        """
+        coords = self.read_coords(frame_idx).astype(np.float64)
+        ntypes = len(self.atom_numbs)
+        if type_map is None:
+            atom_names = ["TYPE_%d" % ii for ii in range(ntypes)]
+        else:
+            assert len(type_map) >= ntypes
+            atom_names = list(type_map[:ntypes])
+        system = dpdata.System(
+            data={
+                "atom_names": atom_names,
+                "atom_numbs": list(self.atom_numbs),
+                "atom_types": self.atom_types.copy(),
+                "orig": np.zeros(3),
+                "cells": self.cells[list(frame_idx)],
+                "coords": coords,
+            }
+        )
+        if type_map is not None:
+            system.apply_type_map(type_map)
+        return system
+
+
+def lammps_dump_to_binary_traj(
+    dump: Union[str, Path],
+    fname: Union[str, Path],
+    compression: Optional[str] = None,
+    pruned_steps: Optional[Set[int]] = None,
+) -> Path:
+    r"""Convert a LAMMPS dump trajectory to a binary trajectory.
+
+    The frames are parsed by `dpdata` chunk by chunk.
+
+    Parameters
+    ----------
+    dump : str or Path
+        The LAMMPS dump trajectory.
+    fname : str or Path
+        The binary trajectory.
+    compression : str, optional
+        None or "zstd".
+    pruned_steps : Set[int], optional
+        The time steps of the frames written as pruned, see `prune_lmp_traj`.
+
+    Returns
+    -------
+    fname : Path
+        The binary trajectory.
+    """
+    if pruned_steps is None:
+        pruned_steps = set()
+    reader = LammpsDumpReader(dump)
+    with open(dump, "rb") as fp:
+        frames = []
+        for ii in range(reader.nframes):
+            fp.seek(reader.offsets[ii])
+            fp.readline()
+            step = int(fp.readline())
+            frames.append((step, step not in pruned_steps))
+    with BinaryTrajWriter(fname, compression=compression) as writer:
+        ii = 0
+        while ii < len(frames):
+            if not frames[ii][1]:
+                writer.append_pruned(frames[ii][0])
+                ii += 1
+                continue
+            jj = ii
+            while jj < len(frames) and frames[jj][1] and jj - ii < _convert_chunk_size:
+                jj += 1
+            system = reader.get_system(list(range(ii, jj)))
+            # the atom types as in the dump, the atom names of dpdata are
+            # TYPE_0, TYPE_1, ... without type map, but may be sorted
+            raw_types = np.array([int(nn[5:]) for nn in system["atom_names"]])
+            system.data["atom_types"] = raw_types[system["atom_types"]]
+            system.data["atom_numbs"] = np.bincount(
+                system["atom_types"], minlength=raw_types.max() + 1
+            ).tolist()
+            writer.append(system, [ff[0] for ff in frames[ii:jj]])
+            ii = jj
+    return Path(fname)
+
+
+def _import_zstd():
+    try:
+        import zstandard  # type: ignore
+    except ImportError as e:
+        raise ImportError(
+            "The zstd compression of binary trajectories requires the "
+            "`zstandard` package, install it by `pip install zstandard`"
+        ) from e
+    return zstandard
@@ -0,0 +1,133 @@
+import mmap
+import re
+import tempfile
+from pathlib import (
+    Path,
+)
+from typing import (
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
+
+import dpdata
+import numpy as np
+
+_timestep_re = re.compile(rb"^[ \t]*ITEM: TIMESTEP", re.MULTILINE)
+
+
+def index_lammps_dump(
+    fname: Union[str, Path],
+) -> np.ndarray:
+    r"""Build the frame-offset index of a LAMMPS dump trajectory.
+
+    The file is memory-mapped and scanned for the `ITEM: TIMESTEP`
+    headers, no frame is parsed.
+
+    Parameters
+    ----------
+    fname : str or Path
+        The LAMMPS dump trajectory.
+
+    Returns
+    -------
+    offsets : np.ndarray
+        The byte offsets of the frames. An integer array of length
+        `nframes + 1`, the ii-th frame is stored in the bytes
+        `offsets[ii]:offsets[ii+1]`.
+    """
+    with open(fname, "rb") as fp:
+        size = fp.seek(0, 2)
+        if size == 0:
+            return np.zeros(1, dtype=np.int64)
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            starts = [ii.start() for ii in _timestep_re.finditer(mm)]  # type: ignore
+    return np.array(starts + [size], dtype=np.int64)
+
+
+class LammpsDumpReader:
+    r"""Random-access reader of LAMMPS dump trajectories.
+
+    The frame-offset index of the trajectory is built on construction.
+    Only the requested frames are read from the disk and parsed by
+    `dpdata`, thus the cost of reading a few frames does not grow with
+    the length of the trajectory.
+
+    Parameters
+    ----------
+    fname : str or Path
+        The LAMMPS dump trajectory.
+    """
+
+    def __init__(
+        self,
+        fname: Union[str, Path],
+    ):
+        self.fname = Path(fname)
+        self.offsets = index_lammps_dump(self.fname)
+
+    @property
+    def nframes(self) -> int:
+        r"""The number of frames in the trajectory."""
+        return len(self.offsets) - 1
+
+    def read_frames(
+        self,
+        frame_idx: Sequence[int],
+    ) -> bytes:
+        r"""Read the text of the frames.
+
+        Parameters
+        ----------
+        frame_idx : Sequence[int]
+            The indexes of the frames. The order of the frames is kept,
+            duplicated indexes are allowed.
+
+        Returns
+        -------
+        text : bytes
+            The text of the frames in LAMMPS dump format.
+        """
+        ret = []
+        with open(self.fname, "rb") as fp:
+            for ii in frame_idx:
+                if not 0 <= ii < self.nframes:
+                    raise IndexError(
+                        f"frame index {ii} is out of range for the trajectory "
+                        f"{self.fname} containing {self.nframes} frames"
+                    )
+                fp.seek(self.offsets[ii])
+                frame = fp.read(self.offsets[ii + 1] - self.offsets[ii])
+                if not frame.endswith(b"\n"):
+                    frame += b"\n"
+                ret.append(frame)
+        return b"".join(ret)
+
+    def get_system(
+        self,
+        frame_idx: Sequence[int],
+        type_map: Optional[List[str]] = None,
+    ) -> dpdata.System:
+        r"""Read and parse the frames.
+
+        The result is the same as
+        `dpdata.System(fname, fmt="lammps/dump", type_map=type_map).sub_system(frame_idx)`.
+
+        Parameters
+        ----------
+        frame_idx : Sequence[int]
+            The indexes of the frames.
+        type_map : List[str], optional
+            The type map.
+
+        Returns
+        -------
+        system : dpdata.System
+            The frames.
+        """
+        text = self.read_frames(frame_idx)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fname = Path(tmpdir) / self.fname.name
+            fname.write_bytes(text)
+            return dpdata.System(fname, fmt="lammps/dump", type_map=type_map)
@@ -0,0 +1,343 @@
+import io
+import re
+from concurrent.futures import (
+    ThreadPoolExecutor,
+)
+from pathlib import (
+    Path,
+)
+from typing import (
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
+
+import numpy as np
+
+# the columns of max_devi_v, min_devi_v, avg_devi_v, max_devi_f,
+# min_devi_f and avg_devi_f in the model deviation file
+model_devi_cols = (1, 2, 3, 4, 5, 6)
+# the suffix of the binary sidecar of the model deviation file
+model_devi_sidecar_suffix = ".npy"
+
+_number_re = re.compile(rb"^([+-]?)(\d+)(?:\.(\d*))?(?:[eE]([+-]?)(\d+))?$")
+_token_re = re.compile(rb"\S+")
+_non_space_re = re.compile(rb"\S")
+# the largest power of ten that is exactly representable by float64
+_max_exact_pow10 = 22
+_pow10 = np.array([float(10**ii) for ii in range(_max_exact_pow10 + 1)])
+# longer lines are not parsed as fixed-width tables
+_max_line_len = 4096
+# the number of lines parsed at once
+_chunk_size = 16384
+# mantissas with more digits may not be exactly represented by float64
+_max_exact_digits = 15
+
+
+def load_model_devi(
+    fname: Union[str, Path],
+    usecols: Sequence[int] = model_devi_cols,
+) -> np.ndarray:
+    r"""Load the model deviation file `model_devi.out`.
+
+    If `fname` is a binary sidecar written by `write_model_devi_sidecar`,
+    or if the sidecar of `fname` exists, the memory-mapped sidecar is
+    returned without reading it. Otherwise the text file is parsed.
+
+    The text files written by LAMMPS and by `write_model_devi_out` are
+    fixed-width tables. They are parsed by a vectorized text-to-float
+    conversion that touches only the requested columns. The result is
+    bitwise identical to `np.loadtxt`, which is used as a fallback when
+    the file is not a fixed-width table.
+
+    Parameters
+    ----------
+    fname : str or Path
+        The model deviation file.
+    usecols : Sequence[int]
+        The columns to read.
+
+    Returns
+    -------
+    data : np.ndarray
+        The model deviations. A two-dimensional array of shape
+        nframes x len(usecols).
+    """
+    if tuple(usecols) == model_devi_cols:
+        sidecar = model_devi_sidecar_path(fname)
+        if sidecar.is_file():
+            return _load_model_devi_sidecar(sidecar)
+    with open(fname, "rb") as fp:
+        buff = fp.read()
+    body = _strip_comments(buff)
+    if _non_space_re.search(body) is None:
+        return np.zeros((0, len(usecols)))
+    data = _parse_fixed_width(body, usecols)
+    if data is None:
+        data = np.loadtxt(io.BytesIO(body), usecols=usecols, ndmin=2)
+    return data
+
+
+def load_model_devis(
+    fnames: List[Path],
+    usecols: Sequence[int] = model_devi_cols,
+    max_workers: Optional[int] = None,
+) -> List[np.ndarray]:
+    r"""Load model deviation files concurrently by a thread pool.
+    The returned arrays are in the same order as `fnames`.
+
+    Parameters
+    ----------
+    fnames : List[Path]
+        The model deviation files.
+    usecols : Sequence[int]
+        The columns to read.
+    max_workers : int, optional
+        The number of threads. If 1, the files are loaded sequentially.
+        If None, the default of `ThreadPoolExecutor` is used.
+    """
+    if max_workers == 1 or len(fnames) <= 1:
+        return [load_model_devi(ff, usecols) for ff in fnames]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda ff: load_model_devi(ff, usecols), fnames))
+
+
+def model_devi_sidecar_path(
+    fname: Union[str, Path],
+) -> Path:
+    r"""The path to the binary sidecar of the model deviation file `fname`."""
+    return Path(fname).with_suffix(model_devi_sidecar_suffix)
+
+
+def write_model_devi_sidecar(
+    fname: Union[str, Path],
+    data: Optional[np.ndarray] = None,
+) -> Path:
+    r"""Write the binary sidecar of the model deviation file `fname`.
+
+    The sidecar is a `.npy` file storing the columns `model_devi_cols`
+    as float64, which is less than half the size of the text file and can
+    be memory-mapped by `load_model_devi`. The values are exactly those
+    of the text file, so frames on a trust level are classified as if
+    the text file were read.
+
+    Parameters
+    ----------
+    fname : str or Path
+        The model deviation file.
+    data : np.ndarray, optional
+        The columns `model_devi_cols` of the model deviation, an array
+        of shape nframes x 6. If None, it is loaded from `fname`.
+
+    Returns
+    -------
+    sidecar : Path
+        The path to the sidecar.
+    """
+    if data is None:
+        data = load_model_devi(fname)
+    assert data.ndim == 2 and data.shape[1] == len(model_devi_cols), (
+        f"Error: model deviation (shape: {data.shape}) should have "
+        f"{len(model_devi_cols)} columns"
+    )
+    sidecar = model_devi_sidecar_path(fname)
+    np.save(sidecar, np.asarray(data, dtype=np.float64))
+    return sidecar
+
+
+def _load_model_devi_sidecar(
+    sidecar: Path,
+) -> np.ndarray:
+    data = np.load(sidecar, mmap_mode="r")
+    assert data.ndim == 2 and data.shape[1] == len(model_devi_cols), (
+        f"Error: model deviation sidecar {sidecar} (shape: {data.shape}) "
+        f"should have {len(model_devi_cols)} columns"
+    )
+    return data
+
+
+def _strip_comments(buff: bytes) -> Union[bytes, memoryview]:
+    # the header is usually the only comment, skip it without copying
+    start = 0
+    while buff.startswith(b"#", start):
+        end = buff.find(b"\n", start)
+        if end < 0:
+            return b""
+        start = end + 1
+    if buff.find(b"#", start) >= 0:
+        # headers are repeated when files are appended
+        body = b"\n".join(
+            [ll for ll in buff[start:].split(b"\n") if not ll.lstrip().startswith(b"#")]
+        )
+    else:
+        body = memoryview(buff)[start:]
+    if len(body) > 0 and body[-1] != ord("\n"):
+        body = bytes(body) + b"\n"
+    return body
+
+
+def _parse_fixed_width(
+    body: Union[bytes, memoryview],
+    usecols: Sequence[int],
+) -> Optional[np.ndarray]:
+    r"""Parse a fixed-width table of numbers. Return None if `body` is
+    not such a table, or if a number cannot be exactly converted.
+    """
+    first_line = bytes(body[:_max_line_len])
+    line_len = first_line.find(b"\n") + 1
+    if line_len <= 1 or len(body) % line_len != 0:
+        return None
+    nlines = len(body) // line_len
+    table = np.frombuffer(body, dtype=np.uint8).reshape(nlines, line_len)
+    first_line = first_line[:line_len]
+    spans = [mm.span() for mm in _token_re.finditer(first_line[:-1])]
+    if max(usecols) >= len(spans):
+        return None
+    layouts = []
+    for cc in usecols:
+        field_start = spans[cc - 1][1] if cc > 0 else 0
+        layouts.append(_column_layout(first_line, field_start, *spans[cc]))
+    if any([ll is None for ll in layouts]) or any(
+        [ll["shape"] != layouts[0]["shape"] for ll in layouts]  # type: ignore
+    ):
+        return None
+    if not np.all(table[:, -1] == ord("\n")):
+        return None
+
+    # gather the positions of the characters of the requested columns
+    keys = ("digit", "exp", "sign", "exp_sign", "fixed", "blank")
+    offsets = [0]
+    positions = []
+    for kk in keys:
+        positions += sum([ll[kk] for ll in layouts], [])  # type: ignore
+        offsets.append(len(positions))
+    slices = [slice(offsets[ii], offsets[ii + 1]) for ii in range(len(keys))]
+    fixed_expected = np.frombuffer(first_line, dtype=np.uint8)[positions[slices[4]]]
+    ret = np.empty((nlines, len(usecols)))
+    # work on chunks of lines that fit in the cache
+    for ii in range(0, nlines, _chunk_size):
+        chunk = _parse_fixed_width_chunk(
+            np.take(table[ii : ii + _chunk_size], positions, axis=1),
+            slices,
+            fixed_expected,
+            layouts[0]["shape"],  # type: ignore
+        )
+        if chunk is None:
+            return None
+        ret[ii : ii + _chunk_size] = chunk
+    return ret
+
+
+def _parse_fixed_width_chunk(
+    chars: np.ndarray,
+    slices: List[slice],
+    fixed_expected: np.ndarray,
+    shape: tuple,
+) -> Optional[np.ndarray]:
+    digits, exps, signs, exp_signs, fixed, blank = [chars[:, ss] for ss in slices]
+    ndigits, nfrac, nexp = shape[:3]
+    nlines, ncols = signs.shape
+    # check the layout is the same in all lines
+    if (
+        not np.array_equal(fixed, np.broadcast_to(fixed_expected, fixed.shape))
+        or not np.all(blank == ord(" "))
+        or not np.all((signs == ord(" ")) | (signs == ord("-")) | (signs == ord("+")))
+        or not np.all((exp_signs == ord("-")) | (exp_signs == ord("+")))
+    ):
+        return None
+    digits = digits - np.uint8(ord("0"))
+    exps = exps - np.uint8(ord("0"))
+    # non-digit characters wrap around to values larger than 9
+    if digits.max(initial=0) > 9 or exps.max(initial=0) > 9:
+        return None
+
+    # integer mantissa and decimal exponent
+    mantissa = _digits_to_int(digits.reshape(nlines, ncols, ndigits))
+    expo = _digits_to_int(exps.reshape(nlines, ncols, nexp))
+    if exp_signs.shape[1] > 0:
+        np.negative(expo, out=expo, where=exp_signs == ord("-"))
+    expo -= nfrac
+    if np.abs(expo).max(initial=0) > _max_exact_pow10:
+        return None
+    # both operands are exact, so the only rounding is that of the
+    # division or multiplication, the same as the decimal conversion
+    ret = mantissa.astype(np.float64)
+    pow10 = _pow10[np.abs(expo)]
+    neg_expo = expo < 0
+    np.divide(ret, pow10, out=ret, where=neg_expo)
+    np.multiply(ret, pow10, out=ret, where=~neg_expo)
+    np.negative(ret, out=ret, where=signs == ord("-"))
+    return ret
+
+
+def _column_layout(
+    line: bytes,
+    field_start: int,
+    token_start: int,
+    token_end: int,
+) -> Optional[dict]:
+    r"""The positions of the characters of a right-aligned number."""
+    mm = _number_re.match(line[token_start:token_end])
+    if mm is None:
+        return None
+    sign, int_digits, frac_digits, exp_sign, exp_digits = mm.groups()
+    has_dot = frac_digits is not None
+    frac_digits = frac_digits or b""
+    exp_sign = exp_sign or b""
+    exp_digits = exp_digits or b""
+    if len(int_digits) + len(frac_digits) > _max_exact_digits:
+        return None
+    digit_start = token_start + len(sign)
+    sign_pos = digit_start - 1
+    if sign_pos < field_start:
+        return None
+    dot_pos = digit_start + len(int_digits)
+    frac_start = dot_pos + 1 if has_dot else dot_pos
+    exp_start = token_end - len(exp_digits)
+    e_pos = exp_start - len(exp_sign) - 1
+    return {
+        "shape": (
+            len(int_digits) + len(frac_digits),
+            len(frac_digits),
+            len(exp_digits),
+            len(exp_sign),
+            has_dot,
+            sign_pos - field_start,
+        ),
+        "digit": list(range(digit_start, dot_pos))
+        + list(range(frac_start, frac_start + len(frac_digits))),
+        "exp": list(range(exp_start, token_end)),
+        "sign": [sign_pos],
+        "exp_sign": list(range(e_pos + 1, exp_start)),
+        "fixed": ([dot_pos] if has_dot else []) + ([e_pos] if exp_digits else []),
+        "blank": list(range(field_start, sign_pos)),
+    }
+
+
+def _digits_to_int(
+    digits: np.ndarray,
+) -> np.ndarray:
+    r"""Convert the decimal digits along the last axis to integers."""
+    ndigits = digits.shape[-1]
+    if ndigits < 4 or ndigits > 8:
+        ret = np.zeros(digits.shape[:-1], dtype=np.int64)
+        for ii in range(ndigits):
+            ret *= 10
+            ret += digits[..., ii]
+        return ret
+    # pack (at most) eight digits into one 64-bit word and combine them
+    # pairwise, the most significant digit is in the lowest byte
+    packed = np.zeros(digits.shape[:-1] + (8,), dtype=np.uint8)
+    packed[..., 8 - ndigits :] = digits
+    word = packed.view("<u8")[..., 0]
+    word = (word * np.uint64(10) + (word >> np.uint64(8))) & np.uint64(
+        0x00FF00FF00FF00FF
+    )
+    word = (word * np.uint64(100) + (word >> np.uint64(16))) & np.uint64(
+        0x0000FFFF0000FFFF
+    )
+    word = (word * np.uint64(10000) + (word >> np.uint64(32))) & np.uint64(
+        0x00000000FFFFFFFF
+    )
+    return word.astype(np.int64)
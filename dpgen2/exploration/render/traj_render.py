@@ -7,6 +7,7 @@ from pathlib import (
 )
 from typing import (
     TYPE_CHECKING,
+    Iterator,
     List,
     Optional,
     Tuple,
@@ -71,3 +72,32 @@ class TrajRender(ABC):
             The configurations in dpdata.MultiSystems format
         """
         pass
+
+    def iter_confs(
+        self,
+        traj: List[Path],
+        id_selected: List[List[int]],
+        type_map: Optional[List[str]] = None,
+        conf_filters: Optional["ConfFilters"] = None,
+    ) -> Iterator[dpdata.System]:
+        r"""Iterate over the configurations from trajectory by selection.
+        Renders that can extract the trajectories one by one should
+        override it, so the configurations do not have to be held in
+        memory at once.
+
+        Parameters
+        ----------
+        traj : List[Path]
+            Trajectory files
+        id_selected : List[List[int]]
+            The selected frames. id_selected[ii][jj] is the jj-th selected frame
+            from the ii-th trajectory. id_selected[ii] may be an empty list.
+        type_map : List[str]
+            The type map.
+
+        Returns
+        -------
+        systems:     Iterator[dpdata.System]
+            The configurations.
+        """
+        yield from self.get_confs(traj, id_selected, type_map, conf_filters)
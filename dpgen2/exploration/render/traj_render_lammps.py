@@ -1,8 +1,16 @@
+import os
+from collections import (
+    deque,
+)
+from concurrent.futures import (
+    ProcessPoolExecutor,
+)
 from pathlib import (
     Path,
 )
 from typing import (
     TYPE_CHECKING,
+    Iterator,
     List,
     Optional,
     Tuple,
@@ -14,7 +22,17 @@ import numpy as np
 
 from ..deviation import (
     DeviManager,
-    DeviManagerStd,
+    DeviManagerColumnar,
+)
+from .binary_traj import (
+    BinaryTrajReader,
+    is_binary_traj,
+)
+from .lammps_dump_reader import (
+    LammpsDumpReader,
+)
+from .model_devi_loader import (
+    load_model_devis,
 )
 from .traj_render import (
     TrajRender,
@@ -27,35 +45,58 @@ if TYPE_CHECKING:
 
 
 class TrajRenderLammps(TrajRender):
+    r"""Render the trajectories and model deviations of LAMMPS.
+
+    Parameters
+    ----------
+    nopbc : bool
+        If the output configurations have no periodic boundary condition.
+    max_workers : int, optional
+        The number of threads loading the model deviation files.
+        If None, the default of `concurrent.futures.ThreadPoolExecutor`
+        is used. If 1, the files are loaded sequentially.
+    conf_workers : int, optional
+        The number of processes extracting the selected frames from the
+        trajectories in `get_confs`. If None, the default of
+        `concurrent.futures.ProcessPoolExecutor` (the number of CPUs) is
+        used. If 1, the trajectories are processed sequentially.
+    """
+
     def __init__(
         self,
         nopbc: bool = False,
+        max_workers: Optional[int] = None,
+        conf_workers: Optional[int] = 1,
     ):
         self.nopbc = nopbc
+        self.max_workers = max_workers
+        self.conf_workers = conf_workers
 
     def get_model_devi(
         self,
         files: List[Path],
     ) -> DeviManager:
-        ntraj = len(files)
-
-        model_devi = DeviManagerStd()
-        for ii in range(ntraj):
-            self._load_one_model_devi(files[ii], model_devi)
+        model_devi = DeviManagerColumnar()
+        for dd in load_model_devis(files, max_workers=self.max_workers):
+            self._add_one_model_devi(dd, model_devi)
+        model_devi.freeze()
 
         return model_devi
 
-    def _load_one_model_devi(self, fname, model_devi):
-        dd = np.loadtxt(fname)
-        if len(np.shape(dd)) == 1:  # In case model-devi.out is 1-dimensional
-            dd = dd.reshape((1, len(dd)))
-
-        model_devi.add(DeviManager.MAX_DEVI_V, dd[:, 1])
-        model_devi.add(DeviManager.MIN_DEVI_V, dd[:, 2])
-        model_devi.add(DeviManager.AVG_DEVI_V, dd[:, 3])
-        model_devi.add(DeviManager.MAX_DEVI_F, dd[:, 4])
-        model_devi.add(DeviManager.MIN_DEVI_F, dd[:, 5])
-        model_devi.add(DeviManager.AVG_DEVI_F, dd[:, 6])
+    def _add_one_model_devi(self, dd, model_devi):
+        # dd holds the columns 1-6 of the model deviation file, it may
+        # be a memory-mapped sidecar. The columns are added as views and
+        # copied only once, when the manager is frozen
+        names = (
+            DeviManager.MAX_DEVI_V,
+            DeviManager.MIN_DEVI_V,
+            DeviManager.AVG_DEVI_V,
+            DeviManager.MAX_DEVI_F,
+            DeviManager.MIN_DEVI_F,
+            DeviManager.AVG_DEVI_F,
+        )
+        for ii, name in enumerate(names):
+            model_devi.add(name, dd[:, ii])
 
     def get_confs(
         self,
@@ -64,14 +105,60 @@ class TrajRenderLammps(TrajRender):
         type_map: Optional[List[str]] = None,
         conf_filters: Optional["ConfFilters"] = None,
     ) -> dpdata.MultiSystems:
-        del conf_filters  # by far does not support conf filters
-        ntraj = len(trajs)
-        traj_fmt = "lammps/dump"
         ms = dpdata.MultiSystems(type_map=type_map)
-        for ii in range(ntraj):
-            if len(id_selected[ii]) > 0:
-                ss = dpdata.System(trajs[ii], fmt=traj_fmt, type_map=type_map)
-                ss.nopbc = self.nopbc
-                ss = ss.sub_system(id_selected[ii])
-                ms.append(ss)
+        for ss in self.iter_confs(trajs, id_selected, type_map, conf_filters):
+            ms.append(ss)
         return ms
+
+    def iter_confs(
+        self,
+        trajs: List[Path],
+        id_selected: List[List[int]],
+        type_map: Optional[List[str]] = None,
+        conf_filters: Optional["ConfFilters"] = None,
+    ) -> Iterator[dpdata.System]:
+        ntraj = len(trajs)
+        jobs = [
+            (trajs[ii], id_selected[ii], type_map, self.nopbc, conf_filters)
+            for ii in range(ntraj)
+            if len(id_selected[ii]) > 0
+        ]
+        if self.conf_workers == 1 or len(jobs) <= 1:
+            systems = (_get_one_system(*jj) for jj in jobs)
+            yield from (ss for ss in systems if ss.get_nframes() > 0)
+            return
+        nworkers = self.conf_workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=nworkers) as executor:
+            # keep a bounded number of trajectories in flight, the
+            # systems are yielded in the order of the trajectories
+            futures = deque()
+            for jj in jobs:
+                futures.append(executor.submit(_get_one_system, *jj))
+                if len(futures) >= 2 * nworkers:
+                    ss = futures.popleft().result()
+                    if ss.get_nframes() > 0:
+                        yield ss
+            while len(futures) > 0:
+                ss = futures.popleft().result()
+                if ss.get_nframes() > 0:
+                    yield ss
+
+
+def _get_one_system(
+    traj: Path,
+    id_selected: List[int],
+    type_map: Optional[List[str]],
+    nopbc: bool,
+    conf_filters: Optional["ConfFilters"],
+) -> dpdata.System:
+    # only the selected frames are read and parsed
+    reader: Union[LammpsDumpReader, BinaryTrajReader]
+    if is_binary_traj(traj):
+        reader = BinaryTrajReader(traj)
+    else:
+        reader = LammpsDumpReader(traj)
+    ss = reader.get_system(id_selected, type_map=type_map)
+    ss.nopbc = nopbc
+    if conf_filters is not None:
+        ss = conf_filters.check(ss)
+    return ss
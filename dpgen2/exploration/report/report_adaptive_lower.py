@@ -3,6 +3,7 @@ import sys
 from typing import (
     List,
     Optional,
+    Set,
     Tuple,
 )
 
@@ -69,6 +70,10 @@ class ExplorationReportAdaptiveLower(ExplorationReport):
         propotional to the population of a histogram between
         level_f_lo and level_f_hi. The number of bins in the histogram
         is set by nhist, which should be an integer. The default is 10.
+        Candidates are sampled without replacement.
+    candi_sel_seed     int
+        The random seed of the "inv_pop_f" candidate selection. If not
+        provided, the seed is drawn from the `random` module.
     """
 
     def __init__(
@@ -82,6 +87,7 @@ class ExplorationReportAdaptiveLower(ExplorationReport):
         n_checked_steps: int = 2,
         conv_tolerance: float = 0.05,
         candi_sel_prob: str = "uniform",
+        candi_sel_seed: Optional[int] = None,
     ):
         self.level_f_hi = level_f_hi
         self.level_v_hi = level_v_hi
@@ -104,6 +110,7 @@ class ExplorationReportAdaptiveLower(ExplorationReport):
                 self.nhist = int(candi_sel_prob.split(":")[1])
             else:
                 self.nhist = default_nhist
+        self.candi_sel_seed = candi_sel_seed
         self.clear()
 
         print_tuple = (
@@ -165,7 +172,12 @@ class ExplorationReportAdaptiveLower(ExplorationReport):
             "'inv_pop_f' or 'inv_pop_f:nhist': the probability is inversely "
             "propotional to the population of a histogram between "
             "leven_f_lo and level_f_hi. The number of bins in the histogram "
-            "is set by nhist, which should be an integer. The default is 10."
+            "is set by nhist, which should be an integer. The default is 10. "
+            "Candidates are sampled without replacement."
+        )
+        doc_candi_sel_seed = (
+            "The random seed of the 'inv_pop_f' candidate selection. "
+            "If not provided, the seed is drawn from the `random` module."
         )
 
         return [
@@ -204,115 +216,134 @@ class ExplorationReportAdaptiveLower(ExplorationReport):
                 default="uniform",
                 doc=doc_candi_sel_prob,
             ),
+            Argument(
+                "candi_sel_seed",
+                int,
+                optional=True,
+                default=None,
+                doc=doc_candi_sel_seed,
+            ),
         ]
 
+    # status of a frame, stored as one byte per frame
+    ACCU = 0
+    CAND = 1
+    FAIL = 2
+
     def clear(
         self,
     ):
         self.ntraj = 0
         self.nframes = 0
-        self.candi = set()
-        self.accur = set()
-        self.failed = []
-        self.candi_picked = []
+        self.frame_status = np.zeros(0, dtype=np.uint8)
+        self.traj_offsets = np.zeros(1, dtype=np.int64)
         self.model_devi = None
-        self.md_f = []
-        self.md_v = []
+        self.md_f = np.zeros(0)
 
     def record(
         self,
         model_devi: DeviManager,
     ):
-        ntraj = model_devi.ntraj
-        self.ntraj += ntraj
-        md_f = model_devi.get(DeviManager.MAX_DEVI_F)
-        md_v = model_devi.get(DeviManager.MAX_DEVI_V)
-        self.md_f += md_f
-        self.md_v += md_v
-
-        # inits
-        coll_f = []
-        coll_v = []
-        # loop over trajs
-        for ii in range(ntraj):
-            add_nframes, add_accur, add_failed, add_f, add_v = self._record_one_traj(
-                ii, md_f[ii], md_v[ii]
+        md_f = model_devi.get_flat(DeviManager.MAX_DEVI_F)
+        md_v = model_devi.get_flat(DeviManager.MAX_DEVI_V)
+        offsets = model_devi.get_offsets()
+        # check consistency
+        if self.has_virial and md_v is None:
+            raise FatalError(
+                "report requires virial model deviation, but no virial "
+                "model deviation is provided."
             )
-            self.nframes += add_nframes
-            self.accur = self.accur.union(add_accur)
-            self.failed += add_failed
-            coll_f += add_f
-            coll_v += add_v
-        # sort
-        coll_f.sort()
-        coll_v.sort()
-        assert len(coll_v) == len(coll_f)
+        # fake md_v as zeros if None is provided
+        if md_v is None:
+            md_v = np.zeros_like(md_f)
+        assert md_f.shape == md_v.shape
+
+        # all frames not failed are accurate,
+        # will be substracted by candidate later
+        failed = ~((md_f <= self.level_f_hi) & (md_v <= self.level_v_hi))
+        status = np.where(failed, self.FAIL, self.ACCU).astype(np.uint8)
+        coll = np.flatnonzero(~failed)
+        coll_f = md_f[coll]
+        coll_v = md_v[coll]
         # calcuate numbers
-        numb_candi_f = max(self.numb_candi_f, int(self.rate_candi_f * len(coll_f)))
-        numb_candi_v = max(self.numb_candi_v, int(self.rate_candi_v * len(coll_v)))
+        numb_candi_f = max(self.numb_candi_f, int(self.rate_candi_f * coll.size))
+        numb_candi_v = max(self.numb_candi_v, int(self.rate_candi_v * coll.size))
         # adjust number of candidate
-        if len(coll_f) < numb_candi_f:
-            numb_candi_f = len(coll_f)
-        if len(coll_v) < numb_candi_v:
-            numb_candi_v = len(coll_v)
+        numb_candi_f = min(numb_candi_f, coll.size)
+        numb_candi_v = min(numb_candi_v, coll.size)
         # compute trust lo
-        if numb_candi_v == 0:
-            self.level_v_lo = self.level_v_hi
-        else:
-            self.level_v_lo = coll_v[-numb_candi_v][0]
+        self.level_v_lo, candi_v = self._pick_largest(
+            coll_v, numb_candi_v, self.level_v_hi
+        )
         if not self.has_virial:
             self.level_v_lo = None
-        if numb_candi_f == 0:
-            self.level_f_lo = self.level_f_hi
-        else:
-            self.level_f_lo = coll_f[-numb_candi_f][0]
-        # add to candidate set
-        for ii in range(len(coll_f) - numb_candi_f, len(coll_f)):
-            self.candi.add(tuple(coll_f[ii][1:]))
-        for ii in range(len(coll_v) - numb_candi_v, len(coll_v)):
-            self.candi.add(tuple(coll_v[ii][1:]))
-        # accurate set is substracted by the candidate set
-        self.accur = self.accur - self.candi
+        self.level_f_lo, candi_f = self._pick_largest(
+            coll_f, numb_candi_f, self.level_f_hi
+        )
+        # candidates are substracted from the accurate frames
+        status[coll[candi_f]] = self.CAND
+        status[coll[candi_v]] = self.CAND
+
+        self.ntraj += model_devi.ntraj
+        self.nframes += md_f.size
+        self.frame_status = np.concatenate((self.frame_status, status))
+        self.traj_offsets = np.concatenate(
+            (self.traj_offsets, self.traj_offsets[-1] + offsets[1:])
+        )
+        self.md_f = np.concatenate((self.md_f, md_f))
         self.model_devi = model_devi
 
-    def _record_one_traj(
-        self,
-        tt,
-        md_f,
-        md_v,
+    @staticmethod
+    def _pick_largest(
+        md,
+        numb,
+        level_hi,
     ):
         """
-        Record one trajctory.
-
-        tt:             traj index
-        md_f, md_v:     model deviations of force and virial
+        Pick the `numb` frames with the largest model deviations `md`.
+        Frames with the same model deviation at the threshold are picked
+        from the last one, as taking the tail of the sorted
+        `[md, traj_idx, frame_idx]` list.
+
+        Returns the lowest model deviation of the picked frames
+        (`level_hi` if none is picked), and the indexes of the picked
+        frames in `md`.
         """
-        # check consistency
-        if self.has_virial and md_v is None:
-            raise FatalError(
-                "report requires virial model deviation, but no virial "
-                "model deviation is provided."
-            )
-        # fake md_v as zeros if None is provided
-        if md_v is None:
-            md_v = np.zeros_like(md_f)
-        # loop over frames
-        nframes = md_f.shape[0]
-        assert nframes == md_v.shape[0]
-        failed = []
-        accur = set()
-        coll_f = []
-        coll_v = []
-        for ii in range(nframes):
-            if md_f[ii] > self.level_f_hi or md_v[ii] > self.level_v_hi:
-                failed.append((tt, ii))
-            else:
-                coll_f.append([md_f[ii], tt, ii])
-                coll_v.append([md_v[ii], tt, ii])
-                # now accur takes all non-failed frames,
-                # will be substracted by candidate later
-                accur.add((tt, ii))
-        return nframes, accur, failed, coll_f, coll_v
+        if numb == 0:
+            return level_hi, np.zeros(0, dtype=np.int64)
+        kth = np.partition(md, md.size - numb)[md.size - numb]
+        picked = np.flatnonzero(md > kth)
+        ties = np.flatnonzero(md == kth)
+        picked = np.concatenate((picked, ties[ties.size - (numb - picked.size) :]))
+        return kth, picked
+
+    def _index_to_tuples(
+        self,
+        idx: np.ndarray,
+    ) -> List[Tuple[int, int]]:
+        """
+        Convert indexes in the concatenated frames to a list of
+        tuples: [(traj_idx, frame_idx), ...]
+        """
+        traj_idx = np.searchsorted(self.traj_offsets, idx, side="right") - 1
+        frame_idx = idx - self.traj_offsets[traj_idx]
+        return list(zip(traj_idx.tolist(), frame_idx.tolist()))
+
+    @property
+    def candi(self) -> Set[Tuple[int, int]]:
+        return set(
+            self._index_to_tuples(np.flatnonzero(self.frame_status == self.CAND))
+        )
+
+    @property
+    def accur(self) -> Set[Tuple[int, int]]:
+        return set(
+            self._index_to_tuples(np.flatnonzero(self.frame_status == self.ACCU))
+        )
+
+    @property
+    def failed(self) -> List[Tuple[int, int]]:
+        return self._index_to_tuples(np.flatnonzero(self.frame_status == self.FAIL))
 
     def _sequence_conv(
         self,
@@ -346,19 +377,25 @@ class ExplorationReportAdaptiveLower(ExplorationReport):
         self,
         tag=None,
     ):
-        return float(len(self.failed)) / float(self.nframes)
+        return float(np.count_nonzero(self.frame_status == self.FAIL)) / float(
+            self.nframes
+        )
 
     def accurate_ratio(
         self,
         tag=None,
     ):
-        return float(len(self.accur)) / float(self.nframes)
+        return float(np.count_nonzero(self.frame_status == self.ACCU)) / float(
+            self.nframes
+        )
 
     def candidate_ratio(
         self,
         tag=None,
     ):
-        return float(len(self.candi)) / float(self.nframes)
+        return float(np.count_nonzero(self.frame_status == self.CAND)) / float(
+            self.nframes
+        )
 
     def get_candidate_ids(
         self,
@@ -400,13 +437,14 @@ class ExplorationReportAdaptiveLower(ExplorationReport):
         cand_frames   List[Tuple[int,int]]
             Candidate frames. A list of tuples: [(traj_idx, frame_idx), ...]
         """
-        self.candi_picked = [(ii[0], ii[1]) for ii in self.candi]
-        if max_nframes is not None and max_nframes < len(self.candi_picked):
-            random.shuffle(self.candi_picked)
-            ret = sorted(self.candi_picked[:max_nframes])
-        else:
-            ret = self.candi_picked
-        return ret
+        idx = np.flatnonzero(self.frame_status == self.CAND)
+        if max_nframes is not None and max_nframes < idx.size:
+            # shuffle and slice, which draws the same random numbers as
+            # shuffling the list of candidate tuples
+            sel = list(range(idx.size))
+            random.shuffle(sel)
+            idx = idx[np.sort(np.array(sel[: max(max_nframes, 0)], dtype=np.int64))]
+        return self._index_to_tuples(idx)
 
     def _get_candidates_inv_pop_f(
         self,
@@ -414,9 +452,9 @@ class ExplorationReportAdaptiveLower(ExplorationReport):
     ) -> List[Tuple[int, int]]:
         """
         Get candidates. If number of candidates is larger than `max_nframes`,
-        then randomly pick `max_nframes` frames from the candidates.
-        The probability of chose a frame is propotional to the inverse
-        population in force model deviation statistics.
+        then randomly pick `max_nframes` frames from the candidates without
+        replacement. The probability of chose a frame is propotional to the
+        inverse population in force model deviation statistics.
 
         Parameters
         ----------
@@ -428,63 +466,53 @@ class ExplorationReportAdaptiveLower(ExplorationReport):
         cand_frames   List[Tuple[int,int]]
             Candidate frames. A list of tuples: [(traj_idx, frame_idx), ...]
         """
-        self.candi_picked = [(ii[0], ii[1]) for ii in self.candi]
-        if max_nframes is not None and max_nframes < len(self.candi_picked):
-            prob = self._choice_prob_inv_pop_f(self.candi_picked)
-            ret = random.choices(
-                self.candi_picked,
-                weights=prob,
-                k=max_nframes,
+        idx = np.flatnonzero(self.frame_status == self.CAND)
+        if max_nframes is not None and max_nframes < idx.size:
+            prob = self._choice_prob_inv_pop_f(idx)
+            seed = self.candi_sel_seed
+            if seed is None:
+                seed = random.randrange(sys.maxsize)
+            rng = np.random.default_rng(seed)
+            sel = rng.choice(
+                idx.size,
+                size=max(max_nframes, 0),
+                replace=False,
+                p=prob / prob.sum(),
             )
-        else:
-            ret = self.candi_picked
-        return ret
+            idx = idx[np.sort(sel)]
+        return self._index_to_tuples(idx)
 
     def _choice_prob_inv_pop_f(
         self,
-        candi: List,
-    ):
+        candi: np.ndarray,
+    ) -> np.ndarray:
         """Compute the probability of candi frames according to the inverse
         population in the model deviation statistics.
 
         Parameters
         ----------
-        candi   List[Tuple[int,int]]
-            Candidate frames. A list of tuples: [(traj_idx, frame_idx), ...]
+        candi   np.ndarray
+            Candidate frames given by the indexes in the concatenated frames.
 
         Returns
         -------
-        prob    List[float]
-            The probability of each candidate frame.
+        prob    np.ndarray
+            The (unnormalized) probability of each candidate frame.
 
         """
-        histo = np.zeros(self.nhist, dtype=int)
-        for ii in candi:
-            frame_md_f = self.md_f[ii[0]][ii[1]]
-            hist_idx = self._histo_idx(frame_md_f)
-            histo[hist_idx] += 1
-        prob_tab = [1.0 / float(ii) if ii > 0 else 0.0 for ii in histo]
-        prob = []
-        for ii in candi:
-            frame_md_f = self.md_f[ii[0]][ii[1]]
-            hist_idx = self._histo_idx(frame_md_f)
-            prob.append(prob_tab[hist_idx])
-        return prob
+        hist_idx = self._histo_idx(self.md_f[candi])
+        histo = np.bincount(hist_idx, minlength=self.nhist)
+        return 1.0 / histo[hist_idx]
 
     def _histo_idx(
         self,
-        devi_f: float,
-    ) -> int:
+        devi_f: np.ndarray,
+    ) -> np.ndarray:
         """
-        return the index in histogram given a force  model deviation.
+        return the indexes in histogram given force model deviations.
         """
-        dh = (self.level_f_hi - self.level_f_lo) / self.nhist
-        hist_idx = int((devi_f - self.level_f_lo) / dh)
-        if hist_idx < 0:
-            hist_idx = 0
-        elif hist_idx >= self.nhist:
-            hist_idx = self.nhist - 1
-        return hist_idx
+        edges = np.linspace(self.level_f_lo, self.level_f_hi, self.nhist + 1)
+        return np.digitize(devi_f, edges[1:-1])
 
     def print_header(self) -> str:
         r"""Print the header of report"""
@@ -1,4 +1,3 @@
-import random
 from abc import (
     abstractmethod,
 )
@@ -90,109 +89,117 @@ class ExplorationReportTrustLevels(ExplorationReport):
             ),
         ]
 
+    # status of a frame, stored as one byte per frame
+    ACCU = 0
+    CAND = 1
+    FAIL = 2
+
     def clear(
         self,
     ):
-        self.traj_nframes = []
-        self.traj_cand = []
-        self.traj_accu = []
-        self.traj_fail = []
-        self.traj_cand_picked = []
+        self.frame_status = np.zeros(0, dtype=np.uint8)
+        self.traj_offsets = np.zeros(1, dtype=np.int64)
+        self.status_counts = np.zeros(3, dtype=np.int64)
         self.model_devi = None
 
     def record(
         self,
         model_devi: DeviManager,
     ):
-        ntraj = model_devi.ntraj
-        md_f = model_devi.get(DeviManager.MAX_DEVI_F)
-        md_v = model_devi.get(DeviManager.MAX_DEVI_V)
+        md_f = model_devi.get_flat(DeviManager.MAX_DEVI_F)
+        md_v = model_devi.get_flat(DeviManager.MAX_DEVI_V)
+        offsets = model_devi.get_offsets()
 
-        for ii in range(ntraj):
-            id_f_cand, id_f_accu, id_f_fail = self._get_indexes(
-                md_f[ii], self.level_f_lo, self.level_f_hi
-            )
-            id_v_cand, id_v_accu, id_v_fail = self._get_indexes(
-                md_v[ii], self.level_v_lo, self.level_v_hi
-            )
-            nframes, set_accu, set_cand, set_fail = self._record_one_traj(
-                id_f_accu,
-                id_f_cand,
-                id_f_fail,
-                id_v_accu,
-                id_v_cand,
-                id_v_fail,
-            )
-            # record
-            self.traj_nframes.append(nframes)
-            self.traj_cand.append(set_cand)
-            self.traj_accu.append(set_accu)
-            self.traj_fail.append(set_fail)
-        assert len(self.traj_nframes) == ntraj
-        assert len(self.traj_cand) == ntraj
-        assert len(self.traj_accu) == ntraj
-        assert len(self.traj_fail) == ntraj
+        status = self._get_status(md_f, self.level_f_lo, self.level_f_hi)
+        status_v = self._get_status(md_v, self.level_v_lo, self.level_v_hi)
+        if status_v is not None:
+            if status_v.shape != status.shape:
+                raise FatalError("number of frames by virial ")
+            # accurate only if accurate by both force and virial,
+            # failed if failed by either of them, otherwise candidate.
+            np.maximum(status, status_v, out=status)
+        # record
+        self.frame_status = np.concatenate((self.frame_status, status))
+        self.traj_offsets = np.concatenate(
+            (self.traj_offsets, self.traj_offsets[-1] + offsets[1:])
+        )
+        self.status_counts += np.bincount(status, minlength=3)
         self.model_devi = model_devi
 
-    def _get_indexes(
+    def _get_status(
         self,
         md,
         level_lo,
         level_hi,
     ):
+        """
+        Classify the frames by the model deviation `md`.
+        Returns None if the deviation or the trust levels are not given.
+
+        """
         if (md is not None) and (level_hi is not None) and (level_lo is not None):
-            id_cand = np.where(np.logical_and(md >= level_lo, md < level_hi))[0]
-            id_accu = np.where(md < level_lo)[0]
-            id_fail = np.where(md >= level_hi)[0]
+            status = np.full(md.shape, self.FAIL, dtype=np.uint8)
+            status[md < level_hi] = self.CAND
+            status[md < level_lo] = self.ACCU
         else:
-            id_cand = id_accu = id_fail = None
-        return id_cand, id_accu, id_fail
+            status = None
+        return status
+
+    def _get_traj_sets(self, status):
+        return [
+            set(np.flatnonzero(self.frame_status[ss:ee] == status))
+            for ss, ee in zip(self.traj_offsets[:-1], self.traj_offsets[1:])
+        ]
 
-    def _record_one_traj(
+    @property
+    def traj_nframes(self) -> List[int]:
+        return np.diff(self.traj_offsets).tolist()
+
+    @property
+    def traj_accu(self) -> List[set]:
+        return self._get_traj_sets(self.ACCU)
+
+    @property
+    def traj_cand(self) -> List[set]:
+        return self._get_traj_sets(self.CAND)
+
+    @property
+    def traj_fail(self) -> List[set]:
+        return self._get_traj_sets(self.FAIL)
+
+    def _get_candidate_index(self) -> np.ndarray:
+        r"""The indexes of the candidates in the concatenated frames."""
+        return np.flatnonzero(self.frame_status == self.CAND)
+
+    def _split_index(
         self,
-        id_f_accu,
-        id_f_cand,
-        id_f_fail,
-        id_v_accu,
-        id_v_cand,
-        id_v_fail,
-    ):
+        idx: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        r"""Convert indexes in the concatenated frames to the
+        trajectory indexes and the in-trajectory frame indexes.
         """
-        Record one trajctory. inputs are the indexes of candidate, accurate and failed frames.
+        traj_idx = np.searchsorted(self.traj_offsets, idx, side="right") - 1
+        frame_idx = idx - self.traj_offsets[traj_idx]
+        return traj_idx, frame_idx
 
+    def _index_to_candidate_ids(
+        self,
+        idx: np.ndarray,
+    ) -> List[List[int]]:
+        r"""Group the candidates given by indexes in the concatenated
+        frames by trajectory. The order of the candidates is kept.
         """
-        # check consistency
-        novirial = id_v_cand is None
-        if novirial:
-            assert id_v_accu is None
-            assert id_v_fail is None
-        nframes = np.size(np.concatenate((id_f_cand, id_f_accu, id_f_fail)))
-        if (not novirial) and nframes != np.size(
-            np.concatenate((id_v_cand, id_v_accu, id_v_fail))
-        ):
-            raise FatalError("number of frames by virial ")
-        # nframes
-        # to sets
-        set_f_accu = set(id_f_accu)
-        set_f_cand = set(id_f_cand)
-        set_f_fail = set(id_f_fail)
-        set_v_accu = set([ii for ii in range(nframes)]) if novirial else set(id_v_accu)
-        set_v_cand = set([]) if novirial else set(id_v_cand)
-        set_v_fail = set([]) if novirial else set(id_v_fail)
-        # accu, cand, fail
-        set_accu = set_f_accu & set_v_accu
-        set_cand = (
-            (set_f_cand & set_v_accu)
-            | (set_f_cand & set_v_cand)
-            | (set_f_accu & set_v_cand)
-        )
-        set_fail = set_f_fail | set_v_fail
-        # check size
-        assert nframes == len(set_accu | set_cand | set_fail)
-        assert 0 == len(set_accu & set_cand)
-        assert 0 == len(set_accu & set_fail)
-        assert 0 == len(set_cand & set_fail)
-        return nframes, set_accu, set_cand, set_fail
+        ntraj = len(self.traj_offsets) - 1
+        id_cand_list = [[] for ii in range(ntraj)]
+        for tt, ff in zip(*(ii.tolist() for ii in self._split_index(idx))):
+            id_cand_list[tt].append(ff)
+        return id_cand_list
+
+    def _index_to_tuples(
+        self,
+        idx: np.ndarray,
+    ) -> List[Tuple[int, int]]:
+        return list(zip(*(ii.tolist() for ii in self._split_index(idx))))
 
     @abstractmethod
     def converged(
@@ -205,22 +212,19 @@ class ExplorationReportTrustLevels(ExplorationReport):
         self,
         tag=None,
     ):
-        traj_nf = [len(ii) for ii in self.traj_fail]
-        return float(sum(traj_nf)) / float(sum(self.traj_nframes))
+        return float(self.status_counts[self.FAIL]) / float(self.traj_offsets[-1])
 
     def accurate_ratio(
         self,
         tag=None,
     ):
-        traj_nf = [len(ii) for ii in self.traj_accu]
-        return float(sum(traj_nf)) / float(sum(self.traj_nframes))
+        return float(self.status_counts[self.ACCU]) / float(self.traj_offsets[-1])
 
     def candidate_ratio(
         self,
         tag=None,
     ):
-        traj_nf = [len(ii) for ii in self.traj_cand]
-        return float(sum(traj_nf)) / float(sum(self.traj_nframes))
+        return float(self.status_counts[self.CAND]) / float(self.traj_offsets[-1])
 
     @abstractmethod
     def get_candidate_ids(
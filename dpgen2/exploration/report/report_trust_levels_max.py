@@ -47,12 +47,7 @@ class ExplorationReportTrustLevelsMax(ExplorationReportTrustLevels):
         self,
         max_nframes: Optional[int] = None,
     ) -> List[List[int]]:
-        ntraj = len(self.traj_nframes)
-        id_cand = self._get_candidates(max_nframes)
-        id_cand_list = [[] for ii in range(ntraj)]
-        for ii in id_cand:
-            id_cand_list[ii[0]].append(ii[1])
-        return id_cand_list
+        return self._index_to_candidate_ids(self._select_candidates(max_nframes))
 
     def _get_candidates(
         self,
@@ -73,22 +68,33 @@ class ExplorationReportTrustLevelsMax(ExplorationReportTrustLevels):
         cand_frames   List[Tuple[int,int]]
             Candidate frames. A list of tuples: [(traj_idx, frame_idx), ...]
         """
-        self.traj_cand_picked = []
-        for tidx, tt in enumerate(self.traj_cand):
-            for ff in tt:
-                self.traj_cand_picked.append((tidx, ff))
-        if max_nframes is not None and max_nframes < len(self.traj_cand_picked):
+        return self._index_to_tuples(self._select_candidates(max_nframes))
+
+    def _select_candidates(
+        self,
+        max_nframes: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Select candidates as indexes in the concatenated frames. The
+        selected frames are sorted by `max_devi_f` in descending order,
+        frames with the same `max_devi_f` keep their original order.
+        """
+        idx = self._get_candidate_index()
+        if max_nframes is not None and max_nframes < idx.size:
             # select by maximum
-            max_devi_f = self.model_devi.get(DeviManager.MAX_DEVI_F)  # type: ignore
-            ret = sorted(
-                self.traj_cand_picked,
-                key=lambda x: max_devi_f[x[0]][x[1]],
-                reverse=True,
-            )
-            ret = ret[:max_nframes]
-        else:
-            ret = self.traj_cand_picked
-        return ret
+            max_devi_f = self.model_devi.get_flat(DeviManager.MAX_DEVI_F)  # type: ignore
+            max_devi_f = max_devi_f[idx]
+            if max_nframes <= 0:
+                return idx[:0]
+            part = np.argpartition(-max_devi_f, max_nframes - 1)[:max_nframes]
+            kth = max_devi_f[part].min()
+            # break the ties at the threshold by the original order
+            sel = np.flatnonzero(max_devi_f > kth)
+            ties = np.flatnonzero(max_devi_f == kth)[: max_nframes - sel.size]
+            sel = np.concatenate((sel, ties))
+            sel = sel[np.lexsort((sel, -max_devi_f[sel]))]
+            idx = idx[sel]
+        return idx
 
     @staticmethod
     def doc() -> str:
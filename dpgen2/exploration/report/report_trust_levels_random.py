@@ -47,12 +47,7 @@ class ExplorationReportTrustLevelsRandom(ExplorationReportTrustLevels):
         self,
         max_nframes: Optional[int] = None,
     ) -> List[List[int]]:
-        ntraj = len(self.traj_nframes)
-        id_cand = self._get_candidates(max_nframes)
-        id_cand_list = [[] for ii in range(ntraj)]
-        for ii in id_cand:
-            id_cand_list[ii[0]].append(ii[1])
-        return id_cand_list
+        return self._index_to_candidate_ids(self._select_candidates(max_nframes))
 
     def _get_candidates(
         self,
@@ -72,17 +67,22 @@ class ExplorationReportTrustLevelsRandom(ExplorationReportTrustLevels):
         cand_frames   List[Tuple[int,int]]
             Candidate frames. A list of tuples: [(traj_idx, frame_idx), ...]
         """
-        self.traj_cand_picked = []
-        for tidx, tt in enumerate(self.traj_cand):
-            for ff in tt:
-                self.traj_cand_picked.append((tidx, ff))
-        if max_nframes is not None and max_nframes < len(self.traj_cand_picked):
-            # random selection
-            random.shuffle(self.traj_cand_picked)
-            ret = sorted(self.traj_cand_picked[:max_nframes])
-        else:
-            ret = self.traj_cand_picked
-        return ret
+        return self._index_to_tuples(self._select_candidates(max_nframes))
+
+    def _select_candidates(
+        self,
+        max_nframes: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Select candidates as indexes in the concatenated frames.
+        """
+        idx = self._get_candidate_index()
+        if max_nframes is not None and max_nframes < idx.size:
+            # random selection, shuffle and slice as the list of candidates
+            sel = list(range(idx.size))
+            random.shuffle(sel)
+            idx = idx[np.sort(np.array(sel[: max(max_nframes, 0)], dtype=np.int64))]
+        return idx
 
     @staticmethod
     def doc() -> str:
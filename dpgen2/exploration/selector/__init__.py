@@ -8,3 +8,16 @@ from .conf_selector import (
 from .conf_selector_frame import (
     ConfSelectorFrames,
 )
+from .structure_conf_filter import (
+    BoxLengthConfFilter,
+    BoxSkewnessConfFilter,
+    DensityConfFilter,
+    DistanceConfFilter,
+)
+
+conf_filter_styles = {
+    "distance": DistanceConfFilter,
+    "box_skewness": BoxSkewnessConfFilter,
+    "box_length": BoxLengthConfFilter,
+    "density": DensityConfFilter,
+}
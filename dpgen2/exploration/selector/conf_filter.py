@@ -41,6 +41,44 @@ class ConfFilter(ABC):
         """
         pass
 
+    def check_batch(
+        self,
+        coords: np.ndarray,
+        cells: np.ndarray,
+        atom_types: np.ndarray,
+        nopbc: bool,
+    ) -> np.ndarray:
+        """Check if the configurations are valid.
+
+        The default implementation calls `check` frame by frame.
+        Filters that can check all frames at once should override it.
+
+        Parameters
+        ----------
+        coords : numpy.array
+            The coordinates, numpy array of shape nframes x natoms x 3
+        cells : numpy.array
+            The cell tensors. numpy array of shape nframes x 3 x 3
+        atom_types : numpy.array
+            The atom types. numpy array of shape natoms
+        nopbc : bool
+            If no periodic boundary condition.
+
+        Returns
+        -------
+        valid : numpy.array
+            A boolean array of shape nframes, `True` if the configuration
+            is a valid configuration, else `False`.
+
+        """
+        return np.array(
+            [
+                self.check(coords[ii], cells[ii], atom_types, nopbc)
+                for ii in range(coords.shape[0])
+            ],
+            dtype=bool,
+        )
+
 
 class ConfFilters:
     def __init__(
@@ -59,19 +97,12 @@ class ConfFilters:
         self,
         conf: dpdata.System,
     ) -> dpdata.System:
-        natoms = sum(conf["atom_numbs"])  # type: ignore
-        selected_idx = np.arange(conf.get_nframes())
+        selected = np.ones(conf.get_nframes(), dtype=bool)
         for ff in self._filters:
-            fsel = np.where(
-                [
-                    ff.check(
-                        conf["coords"][ii],
-                        conf["cells"][ii],
-                        conf["atom_types"],
-                        conf.nopbc,
-                    )
-                    for ii in range(conf.get_nframes())
-                ]
-            )[0]
-            selected_idx = np.intersect1d(selected_idx, fsel)
-        return conf.sub_system(selected_idx)
+            selected &= ff.check_batch(
+                conf["coords"],
+                conf["cells"],
+                conf["atom_types"],
+                conf.nopbc,
+            )
+        return conf.sub_system(np.flatnonzero(selected))
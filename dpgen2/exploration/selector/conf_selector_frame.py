@@ -6,6 +6,7 @@ from pathlib import (
     Path,
 )
 from typing import (
+    Iterator,
     List,
     Optional,
     Tuple,
@@ -25,6 +26,9 @@ from . import (
     ConfFilters,
     ConfSelector,
 )
+from .npy_writer import (
+    DeepmdNpyWriter,
+)
 
 
 class ConfSelectorFrames(ConfSelector):
@@ -85,14 +89,55 @@ class ConfSelectorFrames(ConfSelector):
 
         self.report.clear()
         self.report.record(md_model_devi)
-        id_cand_list = self.report.get_candidate_ids(self.max_numb_sel)
-
-        ms = self.traj_render.get_confs(
-            trajs, id_cand_list, type_map, self.conf_filters
-        )
-
+        if self.conf_filters is not None and self.max_numb_sel is not None:
+            confs = self._iter_filtered_confs(trajs, type_map)
+        else:
+            id_cand_list = self.report.get_candidate_ids(self.max_numb_sel)
+            confs = self.traj_render.iter_confs(
+                trajs, id_cand_list, type_map, self.conf_filters
+            )
+
+        # the selected frames of each trajectory are written once extracted
         out_path = Path("confs")
-        out_path.mkdir(exist_ok=True)
-        ms.to_deepmd_npy(out_path)  # type: ignore
+        writer = DeepmdNpyWriter(out_path, type_map)
+        for ss in confs:
+            writer.append(ss)
 
         return [out_path], copy.deepcopy(self.report)
+
+    def _iter_filtered_confs(
+        self,
+        trajs: List[Path],
+        type_map: Optional[List[str]] = None,
+    ) -> Iterator[dpdata.System]:
+        r"""Draw `max_numb_sel` candidates, filter the drawn frames, and top
+        up the rejected ones by drawing more candidates, until
+        `max_numb_sel` frames are accepted or the candidates run out. Only
+        the drawn frames are read from the trajectories.
+        """
+        assert self.max_numb_sel is not None
+        ncand = sum([len(ii) for ii in self.report.get_candidate_ids()])
+        drawn: List[set] = [set() for _ in trajs]
+        ndrawn, nsel = 0, 0
+        ndraw = self.max_numb_sel
+        while nsel < self.max_numb_sel and ndrawn < ncand:
+            # the frames drawn before are not read again
+            id_new = [
+                sorted(set(cc) - dd)
+                for cc, dd in zip(self.report.get_candidate_ids(ndraw), drawn)
+            ]
+            for dd, nn in zip(drawn, id_new):
+                dd.update(nn)
+            ndrawn += sum([len(nn) for nn in id_new])
+            for ss in self.traj_render.iter_confs(
+                trajs, id_new, type_map, self.conf_filters
+            ):
+                nframes = min(ss.get_nframes(), self.max_numb_sel - nsel)
+                if nframes == 0:
+                    break
+                if nframes < ss.get_nframes():
+                    ss = ss.sub_system(range(nframes))
+                nsel += nframes
+                yield ss
+            # draw as many more candidates as the frames still needed
+            ndraw += self.max_numb_sel - nsel
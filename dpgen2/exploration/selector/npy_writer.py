@@ -0,0 +1,116 @@
+import shutil
+import tempfile
+from pathlib import (
+    Path,
+)
+from typing import (
+    Dict,
+    List,
+    Optional,
+)
+
+import dpdata
+import numpy as np
+from dpdata.data_type import (
+    Axis,
+)
+
+# the set names are padded so that they sort in the order of writing
+npy_set_name_pattern = "set.%06d"
+
+
+class DeepmdNpyWriter:
+    r"""Write configurations to a folder in deepmd/npy format by streaming.
+
+    The configurations are grouped by formula as `dpdata.MultiSystems`
+    does, each appended system is written to disk immediately as a new
+    set (`set.000000`, `set.000001`, ...) of the system of its formula. Thus
+    the memory usage is bounded by the largest appended system. The atoms
+    of a set are reordered to the atom types of the first set of the
+    system. The folder can be parsed as `dpdata.MultiSystems` by
+    `from_deepmd_npy`.
+
+    Parameters
+    ----------
+    out_path : Path
+        The output folder. It should not hold systems written before.
+    type_map : List[str], optional
+        The type map.
+    """
+
+    def __init__(
+        self,
+        out_path: Path,
+        type_map: Optional[List[str]] = None,
+    ):
+        self.out_path = Path(out_path)
+        self.type_map = type_map
+        self.out_path.mkdir(parents=True, exist_ok=True)
+        self.nsets: Dict[str, int] = {}
+        self.atom_types: Dict[str, np.ndarray] = {}
+
+    def append(
+        self,
+        system: dpdata.System,
+    ) -> None:
+        r"""Write the frames of a system.
+
+        Parameters
+        ----------
+        system : dpdata.System
+            The system.
+        """
+        if system.get_nframes() == 0:
+            return
+        for ss in dpdata.MultiSystems(system, type_map=self.type_map):
+            self._write_set(ss)
+
+    def _write_set(
+        self,
+        system: dpdata.System,
+    ) -> None:
+        name = system.short_name
+        iset = self.nsets.get(name, 0)
+        sys_path = self.out_path / name
+        if iset == 0:
+            self.atom_types[name] = system["atom_types"].copy()
+        elif not np.array_equal(system["atom_types"], self.atom_types[name]):
+            system = _reorder_atoms(system, self.atom_types[name])
+        with tempfile.TemporaryDirectory(dir=self.out_path.parent) as tmp:
+            tmp_path = Path(tmp) / name
+            system.to_deepmd_npy(tmp_path, set_size=system.get_nframes())
+            if iset == 0:
+                # the frame independent files: type.raw, type_map.raw, ...
+                if sys_path.exists():
+                    raise FileExistsError(
+                        f"the system {sys_path} exists, the configurations "
+                        "should be written to a new folder"
+                    )
+                sys_path.mkdir()
+                for ff in tmp_path.iterdir():
+                    if not ff.name.startswith("set."):
+                        shutil.move(str(ff), sys_path / ff.name)
+            (tmp_path / "set.000").rename(sys_path / (npy_set_name_pattern % iset))
+        self.nsets[name] = iset + 1
+
+
+def _reorder_atoms(
+    system: dpdata.System,
+    atom_types: np.ndarray,
+) -> dpdata.System:
+    r"""Reorder the atoms of a copy of the system to the atom types."""
+    system = system.copy()
+    # the atoms of each type keep their order
+    idx = np.empty_like(atom_types)
+    idx[np.argsort(atom_types, kind="stable")] = np.argsort(
+        system["atom_types"], kind="stable"
+    )
+    for tt in system.DTYPES:
+        if tt.name not in system.data:
+            continue
+        if tt.shape is not None and Axis.NATOMS in tt.shape:
+            axis_natoms = tt.shape.index(Axis.NATOMS)
+            new_shape = [slice(None) for _ in system.data[tt.name].shape]
+            new_shape[axis_natoms] = idx
+            system.data[tt.name] = system.data[tt.name][tuple(new_shape)]
+    return system
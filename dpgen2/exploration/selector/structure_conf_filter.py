@@ -0,0 +1,312 @@
+import itertools
+from typing import (
+    List,
+    Optional,
+)
+
+import numpy as np
+from dargs import (
+    Argument,
+)
+
+from .conf_filter import (
+    ConfFilter,
+)
+
+# the number of atoms (nframes x natoms) processed at once
+_chunk_natoms = 1 << 18
+# g/mol/angstrom^3 to g/cm^3
+_mass_density_unit = 1.66053906660
+
+
+class _BatchConfFilter(ConfFilter):
+    def check(
+        self,
+        coords: np.ndarray,
+        cell: np.ndarray,
+        atom_types: np.ndarray,
+        nopbc: bool,
+    ) -> bool:
+        valid = self.check_batch(coords[None], cell[None], atom_types, nopbc)
+        return bool(valid[0])
+
+
+class DistanceConfFilter(_BatchConfFilter):
+    r"""Filter out the configurations that have any pair of atoms
+    closer than `safe_dist`.
+
+    All frames are checked at once by cell lists. Under periodic
+    boundary condition, the distances between the periodic images are
+    considered.
+
+    Parameters
+    ----------
+    safe_dist : float
+        The minimal allowed distance between two atoms.
+    """
+
+    def __init__(
+        self,
+        safe_dist: float = 1.0,
+    ):
+        self.safe_dist = safe_dist
+
+    def check_batch(
+        self,
+        coords: np.ndarray,
+        cells: np.ndarray,
+        atom_types: np.ndarray,
+        nopbc: bool,
+    ) -> np.ndarray:
+        nframes, natoms = coords.shape[:2]
+        ret = np.ones(nframes, dtype=bool)
+        chunk = max(1, _chunk_natoms // max(natoms, 1))
+        for ii in range(0, nframes, chunk):
+            ret[ii : ii + chunk] = ~_has_close_pairs(
+                coords[ii : ii + chunk], cells[ii : ii + chunk], self.safe_dist, nopbc
+            )
+        return ret
+
+    @staticmethod
+    def args() -> List[Argument]:
+        doc_safe_dist = "The minimal allowed distance between two atoms."
+        return [
+            Argument("safe_dist", float, optional=True, default=1.0, doc=doc_safe_dist),
+        ]
+
+    @staticmethod
+    def doc() -> str:
+        return "Filter out the configurations that have any pair of atoms closer than `safe_dist`."
+
+
+class BoxSkewnessConfFilter(_BatchConfFilter):
+    r"""Filter out the configurations with a too skewed box.
+
+    A configuration is valid if all the angles between the cell vectors
+    are in the range [`theta`, 180 - `theta`] degrees.
+    Always valid without periodic boundary condition.
+
+    Parameters
+    ----------
+    theta : float
+        The minimal allowed angle (in degree) between the cell vectors.
+    """
+
+    def __init__(
+        self,
+        theta: float = 60.0,
+    ):
+        self.theta = theta
+
+    def check_batch(
+        self,
+        coords: np.ndarray,
+        cells: np.ndarray,
+        atom_types: np.ndarray,
+        nopbc: bool,
+    ) -> np.ndarray:
+        if nopbc:
+            return np.ones(coords.shape[0], dtype=bool)
+        lengths = np.linalg.norm(cells, axis=2)
+        ret = np.ones(cells.shape[0], dtype=bool)
+        bound = np.cos(np.deg2rad(self.theta))
+        for ii, jj in ((0, 1), (0, 2), (1, 2)):
+            cos = np.einsum("fi,fi->f", cells[:, ii], cells[:, jj]) / (
+                lengths[:, ii] * lengths[:, jj]
+            )
+            ret &= np.abs(cos) <= bound
+        return ret
+
+    @staticmethod
+    def args() -> List[Argument]:
+        doc_theta = "The minimal allowed angle (in degree) between the cell vectors."
+        return [
+            Argument("theta", float, optional=True, default=60.0, doc=doc_theta),
+        ]
+
+    @staticmethod
+    def doc() -> str:
+        return "Filter out the configurations with any angle between the cell vectors smaller than `theta` or larger than 180 - `theta`."
+
+
+class BoxLengthConfFilter(_BatchConfFilter):
+    r"""Filter out the configurations with a too elongated box.
+
+    A configuration is valid if the ratio between the lengths of the
+    longest and the shortest cell vectors is not larger than
+    `length_ratio`. Always valid without periodic boundary condition.
+
+    Parameters
+    ----------
+    length_ratio : float
+        The maximal allowed ratio between the cell vector lengths.
+    """
+
+    def __init__(
+        self,
+        length_ratio: float = 5.0,
+    ):
+        self.length_ratio = length_ratio
+
+    def check_batch(
+        self,
+        coords: np.ndarray,
+        cells: np.ndarray,
+        atom_types: np.ndarray,
+        nopbc: bool,
+    ) -> np.ndarray:
+        if nopbc:
+            return np.ones(coords.shape[0], dtype=bool)
+        lengths = np.linalg.norm(cells, axis=2)
+        return lengths.max(axis=1) <= self.length_ratio * lengths.min(axis=1)
+
+    @staticmethod
+    def args() -> List[Argument]:
+        doc_length_ratio = "The maximal allowed ratio between the cell vector lengths."
+        return [
+            Argument(
+                "length_ratio", float, optional=True, default=5.0, doc=doc_length_ratio
+            ),
+        ]
+
+    @staticmethod
+    def doc() -> str:
+        return "Filter out the configurations with the ratio between the longest and the shortest cell vectors larger than `length_ratio`."
+
+
+class DensityConfFilter(_BatchConfFilter):
+    r"""Filter out the configurations with a too high density.
+
+    If `mass_map` is provided, the density is the mass density in
+    g/cm^3, otherwise it is the number density in 1/angstrom^3.
+    Always valid without periodic boundary condition.
+
+    Parameters
+    ----------
+    max_density : float
+        The maximal allowed density.
+    mass_map : List[float], optional
+        The mass of each atom type.
+    """
+
+    def __init__(
+        self,
+        max_density: float,
+        mass_map: Optional[List[float]] = None,
+    ):
+        self.max_density = max_density
+        self.mass_map = mass_map
+
+    def check_batch(
+        self,
+        coords: np.ndarray,
+        cells: np.ndarray,
+        atom_types: np.ndarray,
+        nopbc: bool,
+    ) -> np.ndarray:
+        if nopbc:
+            return np.ones(coords.shape[0], dtype=bool)
+        if self.mass_map is None:
+            mass = float(len(atom_types))
+        else:
+            mass = np.sum(np.asarray(self.mass_map)[atom_types]) * _mass_density_unit
+        volume = np.abs(np.linalg.det(cells))
+        return mass <= self.max_density * volume
+
+    @staticmethod
+    def args() -> List[Argument]:
+        doc_max_density = "The maximal allowed density."
+        doc_mass_map = "The mass of each atom type. If provided, the density is the mass density in g/cm^3, otherwise it is the number density in 1/angstrom^3."
+        return [
+            Argument("max_density", float, optional=False, doc=doc_max_density),
+            Argument(
+                "mass_map", List[float], optional=True, default=None, doc=doc_mass_map
+            ),
+        ]
+
+    @staticmethod
+    def doc() -> str:
+        return "Filter out the configurations with a density larger than `max_density`."
+
+
+def _has_close_pairs(
+    coords: np.ndarray,
+    cells: np.ndarray,
+    rcut: float,
+    nopbc: bool,
+) -> np.ndarray:
+    r"""Check if any pair of atoms is closer than `rcut` in each frame.
+
+    The frames are divided into cells not thinner than `rcut`, so only
+    the atoms in the neighboring cells are checked. The cells of all
+    frames are numbered globally, and the pairs of all frames are
+    enumerated at once.
+
+    Returns a boolean array of shape nframes.
+    """
+    nframes, natoms = coords.shape[:2]
+    ret = np.zeros(nframes, dtype=bool)
+    if natoms < 2:
+        return ret
+    if nopbc:
+        # a box enclosing all atoms, no periodic images
+        orig = coords.min(axis=1)
+        extent = np.maximum(coords.max(axis=1) - orig, rcut)
+        cells = extent[:, :, None] * np.eye(3)
+        frac = (coords - orig[:, None, :]) / extent[:, None, :]
+        width = extent
+    else:
+        inv = np.linalg.inv(cells)
+        frac = np.einsum("fai,fij->faj", coords, inv)
+        frac -= np.floor(frac)
+        # the distances between the opposite faces of the box
+        width = 1.0 / np.linalg.norm(inv, axis=1)
+    ncells = np.maximum(np.floor(width / rcut), 1).astype(np.int64)
+    # the number of neighboring cells to check in each direction
+    if nopbc:
+        nrange = 1
+    else:
+        nrange = int(np.max(np.ceil(rcut * ncells / width)))
+
+    fidx = np.repeat(np.arange(nframes), natoms)
+    frac = frac.reshape(-1, 3)
+    ncells_a = ncells[fidx]
+    bins = np.minimum(np.floor(frac * ncells_a).astype(np.int64), ncells_a - 1)
+    nbins = np.prod(ncells, axis=1)
+    base = (np.cumsum(nbins) - nbins)[fidx]
+
+    def bin_id(bb):
+        return base + (bb[:, 0] * ncells_a[:, 1] + bb[:, 1]) * ncells_a[:, 2] + bb[:, 2]
+
+    ids = bin_id(bins)
+    order = np.argsort(ids, kind="stable")
+    sorted_ids = ids[order]
+    atom_idx = np.arange(frac.shape[0])
+    for offset in itertools.product(range(-nrange, nrange + 1), repeat=3):
+        nbb = bins + np.array(offset)
+        if nopbc:
+            valid = np.all((nbb >= 0) & (nbb < ncells_a), axis=1)
+            shift = np.zeros_like(nbb)
+        else:
+            valid = np.ones(frac.shape[0], dtype=bool)
+            shift = np.floor_divide(nbb, ncells_a)
+            nbb = nbb - shift * ncells_a
+        nid = bin_id(nbb)
+        start = np.searchsorted(sorted_ids, nid, side="left")
+        count = np.searchsorted(sorted_ids, nid, side="right") - start
+        count[~valid] = 0
+        npairs = count.sum()
+        if npairs == 0:
+            continue
+        ii = np.repeat(atom_idx, count)
+        # the index of each pair in the range of its neighboring cell
+        rank = np.arange(npairs) - np.repeat(np.cumsum(count) - count, count)
+        jj = order[np.repeat(start, count) + rank]
+        keep = ii != jj
+        ii = ii[keep]
+        jj = jj[keep]
+        dfrac = frac[jj] - frac[ii] + shift[ii]
+        dd = np.einsum("pi,pij->pj", dfrac, cells[fidx[ii]])
+        close = np.einsum("pi,pi->p", dd, dd) < rcut * rcut
+        ret[fidx[ii[close]]] = True
+    return ret
@@ -108,6 +108,7 @@ class CalyTaskGroup(ExplorationTaskGroup):
         ctrl_range: List[List[int]] = [[1, 10]],
         max_numb_atoms: int = 100,
         opt_step: int = 1000,
+        opt_batch_size: int = 1,
     ):
         """
         Set calypso parameters
@@ -187,6 +188,7 @@ class CalyTaskGroup(ExplorationTaskGroup):
         self.ctrl_range = ctrl_range
         self.max_numb_atoms = max_numb_atoms
         self.opt_step = opt_step
+        self.opt_batch_size = opt_batch_size
 
         self.caly_set = True
 
@@ -237,6 +239,7 @@ class CalyTaskGroup(ExplorationTaskGroup):
             self.ctrl_range,
             self.max_numb_atoms,
             opt_step=self.opt_step,
+            opt_batch_size=self.opt_batch_size,
         )
         task = ExplorationTask()
         task.add_file(calypso_input_file, input_file_str)
@@ -21,12 +21,22 @@ import os
 import sys
 import time
 import glob
+import threading
 import numpy as np
+from queue import Queue, Empty
 
 from ase.io import read, write
 from ase.io.trajectory import Trajectory
 from ase.optimize import LBFGS
-from ase.constraints import UnitCellFilter
+try:
+    from ase.filters import UnitCellFilter
+except ImportError:
+    from ase.constraints import UnitCellFilter
+from ase.calculators.calculator import (
+    Calculator,
+    PropertyNotImplementedError,
+    all_changes,
+)
 
 from deepmd.calculator import DP
 
@@ -98,8 +108,123 @@ def Write_Outcar(outcar, element, ele, volume, lat, pos, ene, force, stress, pst
     enthalpy = ene + pstress * volume / 1602.17733
     f.write('enthalpy is  TOTEN    = %20.6f %20.6f\\n' % (enthalpy, enthalpy/na))
 
-def run_opt(fmax, stress, opt_step):
+class BatchEvaluator:
+    # The structures relaxed by the workers are evaluated in lockstep:
+    # the evaluation waits until every active worker requests one, then
+    # the structures with the same atom types are evaluated by one
+    # DeepPot call. A worker drops out of the batch when it is finished.
+    def __init__(self, dp, nworkers):
+        self.dp = dp
+        self.nactive = nworkers
+        self.cond = threading.Condition()
+        self.pending = {}
+        self.results = {}
+
+    def evaluate(self, key, coord, cell, atype):
+        with self.cond:
+            self.pending[key] = (coord, cell, atype)
+            self._run_batch()
+            while key not in self.results:
+                self.cond.wait()
+            ret = self.results.pop(key)
+        if isinstance(ret, Exception):
+            raise ret
+        return ret
+
+    def finish(self):
+        with self.cond:
+            self.nactive -= 1
+            self._run_batch()
+
+    def _run_batch(self):
+        if len(self.pending) == 0 or len(self.pending) < self.nactive:
+            return
+        groups = {}
+        for key, (coord, cell, atype) in self.pending.items():
+            groups.setdefault((tuple(atype), cell is None), []).append(key)
+        for (atype, nopbc), keys in groups.items():
+            coords = np.array([self.pending[kk][0] for kk in keys]).reshape(len(keys), -1)
+            cells = None
+            if not nopbc:
+                cells = np.array([self.pending[kk][1] for kk in keys]).reshape(len(keys), 9)
+            try:
+                e, f, v = self.dp.eval(coords=coords, cells=cells, atom_types=list(atype))
+                for ii, kk in enumerate(keys):
+                    self.results[kk] = (e[ii], f[ii], v[ii])
+            except Exception as err:
+                for kk in keys:
+                    self.results[kk] = err
+        self.pending = {}
+        self.cond.notify_all()
+
+class BatchDP(Calculator):
+    # the DP calculator evaluated by the BatchEvaluator
+    implemented_properties = ["energy", "free_energy", "forces", "virial", "stress"]
+
+    def __init__(self, calc, evaluator, **kwargs):
+        Calculator.__init__(self, **kwargs)
+        self.type_dict = calc.type_dict
+        self.evaluator = evaluator
+
+    def calculate(self, atoms=None, properties=["energy", "forces", "virial"], system_changes=all_changes):
+        if atoms is not None:
+            self.atoms = atoms.copy()
+        pbc = sum(self.atoms.get_pbc()) > 0
+        coord = self.atoms.get_positions().reshape([1, -1])
+        cell = self.atoms.get_cell().reshape([1, -1]) if pbc else None
+        atype = [self.type_dict[k] for k in self.atoms.get_chemical_symbols()]
+        e, f, v = self.evaluator.evaluate(id(self), coord, cell, atype)
+        virial = np.reshape(v, (3, 3))
+        self.results["energy"] = np.reshape(e, [-1])[0]
+        self.results["free_energy"] = self.results["energy"]
+        self.results["forces"] = np.reshape(f, (-1, 3))
+        self.results["virial"] = virial
+        # the stress is always computed, so UnitCellFilter does not
+        # evaluate the structure again
+        if pbc:
+            stress = -0.5 * (virial + virial.T) / self.atoms.get_volume()
+            self.results["stress"] = stress.flat[[0, 4, 8, 5, 2, 1]]
+        elif "stress" in properties:
+            raise PropertyNotImplementedError
+
+def relax_one(poscar, calc, fmax, aim_stress, pstress, opt_step):
+    to_be_opti = read(poscar)
+    to_be_opti.calc = calc
+    ucf = UnitCellFilter(to_be_opti, scalar_pressure=aim_stress)
+    opt = LBFGS(ucf,trajectory=poscar.strip("POSCAR_") + '.traj')
+    opt.run(fmax=fmax,steps=opt_step)
+    atoms_lat = to_be_opti.cell
+    atoms_pos = to_be_opti.positions
+    atoms_force = to_be_opti.get_forces()
+    atoms_stress = to_be_opti.get_stress()
+    # eV/A^3 to GPa
+    atoms_stress = atoms_stress/(0.01*0.6242)
+    atoms_symbols = to_be_opti.get_chemical_symbols()
+    atoms_ene = to_be_opti.get_potential_energy()
+    atoms_vol = to_be_opti.get_volume()
+    element, ele = Get_Element_Num(atoms_symbols)
+    outcar = poscar.replace("POSCAR", "OUTCAR")
+    contcar = poscar.replace("POSCAR", "CONTCAR")
+
+    Write_Contcar(contcar, element, ele, atoms_lat, atoms_pos)
+    Write_Outcar(outcar, element, ele, atoms_vol, atoms_lat, atoms_pos, atoms_ene, atoms_force, atoms_stress * -10.0, pstress)
+
+def relax_worker(queue, calc, evaluator, errors, *args):
+    try:
+        while len(errors) == 0:
+            try:
+                poscar = queue.get_nowait()
+            except Empty:
+                break
+            relax_one(poscar, calc, *args)
+    except Exception as err:
+        errors.append(err)
+    finally:
+        evaluator.finish()
+
+def run_opt(fmax, stress, opt_step, batch_size=1):
     # Using the ASE&DP to Optimize Configures
+    # batch_size > 1 structures are relaxed at once, each by a worker thread
 
     calc = DP(model=sys.argv[1])    # init the model before iteration
 
@@ -112,32 +237,34 @@ def run_opt(fmax, stress, opt_step):
     aim_stress = 1.0 * pstress* 0.01 * 0.6242 / 10.0
 
     poscar_list = sorted(glob.glob("POSCAR_*"), key=lambda x: x.strip("POSCAR_"))
+    if int(batch_size) <= 1:
+        for poscar in poscar_list:
+            relax_one(poscar, calc, fmax, aim_stress, pstress, opt_step)
+        return
+    queue = Queue()
     for poscar in poscar_list:
-        to_be_opti = read(poscar)
-        to_be_opti.calc = calc
-        ucf = UnitCellFilter(to_be_opti, scalar_pressure=aim_stress)
-        opt = LBFGS(ucf,trajectory=poscar.strip("POSCAR_") + '.traj')
-        opt.run(fmax=fmax,steps=opt_step)
-        atoms_lat = to_be_opti.cell
-        atoms_pos = to_be_opti.positions
-        atoms_force = to_be_opti.get_forces()
-        atoms_stress = to_be_opti.get_stress()
-        # eV/A^3 to GPa
-        atoms_stress = atoms_stress/(0.01*0.6242)
-        atoms_symbols = to_be_opti.get_chemical_symbols()
-        atoms_ene = to_be_opti.get_potential_energy()
-        atoms_vol = to_be_opti.get_volume()
-        element, ele = Get_Element_Num(atoms_symbols)
-        outcar = poscar.replace("POSCAR", "OUTCAR")
-        contcar = poscar.replace("POSCAR", "CONTCAR")
-
-        Write_Contcar(contcar, element, ele, atoms_lat, atoms_pos)
-        Write_Outcar(outcar, element, ele, atoms_vol, atoms_lat, atoms_pos, atoms_ene, atoms_force, atoms_stress * -10.0, pstress)
+        queue.put(poscar)
+    nworkers = max(1, min(int(batch_size), len(poscar_list)))
+    evaluator = BatchEvaluator(calc.dp, nworkers)
+    errors = []
+    workers = [
+        threading.Thread(
+            target=relax_worker,
+            args=(queue, BatchDP(calc, evaluator), evaluator, errors, fmax, aim_stress, pstress, opt_step),
+        )
+        for _ in range(nworkers)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    if len(errors) > 0:
+        raise errors[0]
 """
 
 calypso_run_opt_str_end = """
 if __name__ == '__main__':
-    run_opt(fmax=%.3f, stress=%.3f, opt_step=%.3f)
+    run_opt(fmax=%.3f, stress=%.3f, opt_step=%.3f, batch_size=%d)
 """
 
 calypso_check_opt_str = """#!/usr/bin/env python3
@@ -333,10 +460,12 @@ def make_calypso_input(
     file_str += "@End\n"
 
     opt_step = kwargs.get("opt_step", 1000)
+    opt_batch_size = kwargs.get("opt_batch_size", 1)
     run_opt_str = calypso_run_opt_str + calypso_run_opt_str_end % (
         fmax,
         pressure,
         opt_step,
+        opt_batch_size,
     )
     check_opt_str = calypso_check_opt_str
 
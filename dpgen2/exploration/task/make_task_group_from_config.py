@@ -358,6 +358,13 @@ def caly_task_grp_args():
             default=1000,
             doc="the converge criterion. The force on all individual atoms should be less than `fmax`.",
         ),
+        Argument(
+            "opt_batch_size",
+            int,
+            optional=True,
+            default=1,
+            doc="the number of structures relaxed at once by the DP model. The structures with the same atom types are evaluated in one model call per optimization step. By default the structures are relaxed one by one.",
+        ),
         Argument(
             "volume",
             float,
@@ -40,6 +40,9 @@ from dflow.python import (
     Slices,
 )
 
+from dpgen2.constants import (
+    block_id_pattern,
+)
 from dpgen2.exploration.report import (
     ExplorationReport,
 )
@@ -149,7 +152,7 @@ class MakeBlockId(OP):
 
         return OPIO(
             {
-                "block_id": f"iter-{iteration:06d}",
+                "block_id": block_id_pattern % iteration,
             }
         )
 
@@ -6,6 +6,7 @@ from typing import (
 )
 
 import dpdata
+import numpy as np
 from dargs import (
     Argument,
 )
@@ -111,8 +112,15 @@ class PrepFpOpAbacus(OP):
                         atom_numbs.append(numb)
                         atom_names.append(name)
                 if atom_names != s["atom_names"]:
-                    for i, t in enumerate(s["atom_types"]):  # type: ignore https://github.com/microsoft/pyright/issues/5620
-                        s["atom_types"][i] = atom_names.index(s["atom_names"][t])  # type: ignore https://github.com/microsoft/pyright/issues/5620
+                    # the new type of each old type, -1 for the types with 0 atom
+                    type_index = np.array(
+                        [
+                            atom_names.index(name) if name in atom_names else -1
+                            for name in s["atom_names"]  # type: ignore https://github.com/microsoft/pyright/issues/5620
+                        ],
+                        dtype=int,
+                    )
+                    s.data["atom_types"] = type_index[s["atom_types"]]  # type: ignore https://github.com/microsoft/pyright/issues/5620
                     s.data["atom_numbs"] = atom_numbs
                     s.data["atom_names"] = atom_names
                     target = "output/%s" % system
@@ -49,11 +49,31 @@ deepmd_temp_path = "one_frame_temp"
 class DeepmdInputs:
     @staticmethod
     def args() -> List[Argument]:
-        return []
+        doc_max_nframes_per_task = (
+            "The maximal number of frames labeled by one deepmd task. "
+            "The frames of the same composition are labeled by one batched "
+            "evaluation of the teacher model, which is loaded once per task. "
+            "The default of 1 labels each frame by its own task. A few hundred "
+            "to a few thousand frames per task are recommended, as long as "
+            "the batch fits in the memory of the device."
+        )
+        return [
+            Argument(
+                "max_nframes_per_task",
+                int,
+                optional=True,
+                default=1,
+                doc=doc_max_nframes_per_task,
+            ),
+        ]
 
     def __init__(self, **kwargs: Any):
         self.data = kwargs
 
+    @property
+    def max_nframes_per_task(self) -> int:
+        return self.data.get("max_nframes_per_task", 1)
+
 
 class PrepDeepmd(PrepFp):
     def prep_task(
@@ -66,11 +86,33 @@ class PrepDeepmd(PrepFp):
         Parameters
         ----------
         conf_frame : dpdata.System
-            One frame of configuration in the dpdata format.
+            The frames of configuration in the dpdata format.
         inputs : str or dict
             This parameter is useless in deepmd.
         """
-        conf_frame.to("deepmd/npy", deepmd_input_path)
+        # all frames in one set, which is read by `_dp_infer`
+        conf_frame.to(
+            "deepmd/npy", deepmd_input_path, set_size=conf_frame.get_nframes()
+        )
+
+    def task_confs(
+        self,
+        system: dpdata.System,
+        inputs,
+    ) -> List[dpdata.System]:
+        r"""Split a system into chunks of at most
+        `inputs.max_nframes_per_task` frames. The frames of a system
+        have the same composition, so each chunk is labeled by one
+        evaluation of the teacher model.
+        """
+        max_nframes = (
+            inputs.max_nframes_per_task if isinstance(inputs, DeepmdInputs) else 1
+        )
+        max_nframes = max(max_nframes, 1)
+        return [
+            system[ii : ii + max_nframes]
+            for ii in range(0, system.get_nframes(), max_nframes)
+        ]
 
 
 class RunDeepmd(RunFp):
@@ -159,7 +201,8 @@ class RunDeepmd(RunFp):
         temp_type_map = [ele for ele in type_map_teacher if ele in set(conf_type_map)]  # type: ignore
 
         ss.apply_type_map(temp_type_map)
-        ss.to("deepmd/npy", deepmd_temp_path)
+        # the frames are labeled in one set
+        ss.to("deepmd/npy", deepmd_temp_path, set_size=ss.get_nframes())
         return conf_type_map, temp_type_map
 
     def _dp_infer(self, dp, type_map_teacher, out_name):
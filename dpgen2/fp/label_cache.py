@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import shutil
+from abc import (
+    ABC,
+    abstractmethod,
+)
+from pathlib import (
+    Path,
+)
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Union,
+)
+
+from dpgen2.utils import (
+    BinaryFileInput,
+)
+
+
+class LabelCache(ABC):
+    r"""The cache of FP labels.
+
+    The labels in the `deepmd/npy` format are stored by a key computed
+    by `label_cache_key` from the inputs of the FP task, so an FP task
+    with the same inputs as an earlier one, e.g. from an earlier
+    iteration or workflow, loads the labels instead of running the FP.
+
+    """
+
+    @abstractmethod
+    def load(
+        self,
+        key: str,
+        target: Path,
+    ) -> bool:
+        r"""Load the labels of `key` to `target`.
+
+        Returns
+        -------
+        hit : bool
+            If the labels are found in the cache.
+        """
+        pass
+
+    @abstractmethod
+    def store(
+        self,
+        key: str,
+        labeled_data: Path,
+    ) -> None:
+        r"""Store the labels in `labeled_data` by `key`."""
+        pass
+
+
+class LabelCacheDir(LabelCache):
+    r"""The label cache in a local (or shared) directory.
+
+    The labels of a key are stored in `path/key[:2]/key`. The labels
+    are written to a temporary directory and renamed, so a cache
+    directory shared by concurrent tasks never holds partial labels.
+
+    Parameters
+    ----------
+    path : str or Path
+        The directory of the cache.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+    ):
+        # the tasks run in their own working directories
+        self.path = Path(path).absolute()
+
+    def _entry(
+        self,
+        key: str,
+    ) -> Path:
+        return self.path / key[:2] / key
+
+    def load(
+        self,
+        key: str,
+        target: Path,
+    ) -> bool:
+        entry = self._entry(key)
+        if not entry.is_dir():
+            return False
+        shutil.copytree(entry, target)
+        return True
+
+    def store(
+        self,
+        key: str,
+        labeled_data: Path,
+    ) -> None:
+        entry = self._entry(key)
+        if entry.is_dir():
+            return
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = entry.with_name(".%s.%d.tmp" % (key, os.getpid()))
+        shutil.copytree(labeled_data, tmp)
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # stored by another task in the meantime
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+label_cache_styles = {
+    "dir": LabelCacheDir,
+}
+
+
+def make_label_cache(
+    config: Optional[Dict],
+) -> Optional[LabelCache]:
+    r"""Make the label cache from the config, e.g.
+    `{"type": "dir", "path": "/path/to/cache"}`. None if the config is None.
+    """
+    if config is None:
+        return None
+    config = dict(config)
+    style = config.pop("type", "dir")
+    if style not in label_cache_styles:
+        raise RuntimeError(f"unknown label cache type {style}")
+    return label_cache_styles[style](**config)
+
+
+def label_cache_key(
+    style: str,
+    config: Dict,
+    files: List[Path],
+) -> str:
+    r"""The key of the labels of an FP task.
+
+    The key is the hash of the FP style, the run config and the names
+    and contents of the input files prepared by `PrepFp`. The input
+    files hold the configuration (coordinates, cell and types in the
+    precision written by the FP style) and all FP inputs (e.g.
+    INCAR, POTCAR and KPOINTS). The run config should only hold the
+    entries that change the labels, e.g. the teacher model of
+    `RunDeepmd`, not the command.
+
+    Parameters
+    ----------
+    style : str
+        The name of the FP style.
+    config : Dict
+        The run config of the FP task.
+    files : List[Path]
+        The input files or directories of the FP task.
+
+    Returns
+    -------
+    key : str
+        The key.
+    """
+    sha = hashlib.sha256()
+    sha.update(style.encode())
+    sha.update(b"\0")
+    sha.update(json.dumps(config, sort_keys=True, default=_json_default).encode())
+    for ff in files:
+        ff = Path(ff)
+        if ff.is_dir():
+            members = sorted(pp for pp in ff.rglob("*") if pp.is_file())
+            names = [ff.name + "/" + pp.relative_to(ff).as_posix() for pp in members]
+        else:
+            members = [ff]
+            names = [ff.name]
+        for nn, pp in zip(names, members):
+            sha.update(b"\0" + nn.encode() + b"\0")
+            with open(pp, "rb") as fp:
+                for chunk in iter(lambda: fp.read(1 << 20), b""):
+                    sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _json_default(obj: Any) -> str:
+    if isinstance(obj, BinaryFileInput):
+        return hashlib.sha256(obj._data).hexdigest()
+    return str(obj)
@@ -4,6 +4,9 @@ from abc import (
     ABC,
     abstractmethod,
 )
+from concurrent.futures import (
+    ProcessPoolExecutor,
+)
 from pathlib import (
     Path,
 )
@@ -11,6 +14,7 @@ from typing import (
     Any,
     Dict,
     List,
+    Optional,
     Set,
     Tuple,
     Union,
@@ -42,6 +46,12 @@ class PrepFp(OP, ABC):
     `op["task_paths"]`. The identities of the tasks are returned as
     `op["task_names"]`.
 
+    If `config["prep_workers"]` is not 1, the tasks are prepared in a
+    `concurrent.futures.ProcessPoolExecutor` of `prep_workers`
+    processes (None for the number of CPUs). The tasks are named in the
+    order of the configurations, so the task directories do not depend
+    on the scheduling.
+
     """
 
     @classmethod
@@ -81,6 +91,30 @@ class PrepFp(OP, ABC):
         """
         pass
 
+    def task_confs(
+        self,
+        system: dpdata.System,
+        inputs: Any,
+    ) -> List[dpdata.System]:
+        r"""Split a system into the configurations of FP tasks.
+
+        By default each frame is an FP task. Styles that label several
+        frames in one task override this method.
+
+        Parameters
+        ----------
+        system : dpdata.System
+            The frames of the same composition.
+        inputs : Any
+            The class object handels all other input files of the task.
+
+        Returns
+        -------
+        confs : List[dpdata.System]
+            The configurations, each prepared as an FP task by `prep_task`.
+        """
+        return [system[ff] for ff in range(system.get_nframes())]
+
     @OP.exec_sign_check
     def execute(
         self,
@@ -93,7 +127,7 @@ class PrepFp(OP, ABC):
         ip : dict
             Input dict with components:
 
-            - `config` : (`dict`) Should have `config['inputs']`, which defines the input files of the FP task.
+            - `config` : (`dict`) Should have `config['inputs']`, which defines the input files of the FP task. The optional `config['prep_workers']` is the number of processes preparing the tasks.
             - `confs` : (`Artifact(List[Path])`) Configurations for the FP tasks. Stored in folders as deepmd/npy format. Can be parsed as dpdata.MultiSystems.
 
         Returns
@@ -108,23 +142,39 @@ class PrepFp(OP, ABC):
         inputs = ip["config"]["inputs"]
         confs = ip["confs"]
         type_map = ip["type_map"]
+        prep_workers = ip["config"].get("prep_workers", 1)
 
-        task_names = []
-        task_paths = []
-        counter = 0
+        task_confs = []
         # loop over list of MultiSystems
         for mm in confs:
             ms = dpdata.MultiSystems(type_map=type_map)
             ms.from_deepmd_npy(mm, labeled=False)  # type: ignore
             # loop over Systems in MultiSystems
-            for ii in range(len(ms)):
-                ss = ms[ii]
-                # loop over frames
-                for ff in range(ss.get_nframes()):
-                    nn, pp = self._exec_one_frame(counter, inputs, ss[ff])
-                    task_names.append(nn)
-                    task_paths.append(pp)
-                    counter += 1
+            for ss in ms:
+                task_confs += self.task_confs(ss, inputs)
+
+        indexes = range(len(task_confs))
+        if prep_workers == 1 or len(task_confs) <= 1:
+            tasks = [
+                self._exec_one_frame(ii, inputs, conf)
+                for ii, conf in zip(indexes, task_confs)
+            ]
+        else:
+            nworkers = prep_workers or os.cpu_count() or 1
+            # a few chunks per worker to balance the load
+            chunksize = max(1, len(task_confs) // (4 * nworkers))
+            with ProcessPoolExecutor(
+                max_workers=nworkers,
+                initializer=_init_prep_worker,
+                initargs=(self, inputs),
+            ) as executor:
+                tasks = list(
+                    executor.map(
+                        _prep_one_task, indexes, task_confs, chunksize=chunksize
+                    )
+                )
+        task_names = [nn for nn, _ in tasks]
+        task_paths = [pp for _, pp in tasks]
         return OPIO(
             {
                 "task_names": task_names,
@@ -143,3 +193,24 @@ class PrepFp(OP, ABC):
         with set_directory(task_path):
             self.prep_task(conf_frame, inputs)
         return task_name, task_path
+
+
+# the OP and the inputs of the tasks, passed once to each worker process
+_prep_worker_state = {}
+
+
+def _init_prep_worker(
+    op: PrepFp,
+    inputs: Any,
+):
+    _prep_worker_state["op"] = op
+    _prep_worker_state["inputs"] = inputs
+
+
+def _prep_one_task(
+    idx: int,
+    conf: dpdata.System,
+) -> Tuple[str, Path]:
+    return _prep_worker_state["op"]._exec_one_frame(
+        idx, _prep_worker_state["inputs"], conf
+    )
@@ -26,10 +26,20 @@ from dflow.python import (
     TransientError,
 )
 
+from dpgen2.constants import (
+    fp_default_log_name,
+    fp_default_out_data_name,
+)
 from dpgen2.utils.chdir import (
     set_directory,
 )
 
+from .label_cache import (
+    LabelCache,
+    label_cache_key,
+    make_label_cache,
+)
+
 
 class RunFp(OP, ABC):
     r"""Execute a first-principles (FP) task.
@@ -40,6 +50,11 @@ class RunFp(OP, ABC):
     `op["labeled_data"]` in `"deepmd/npy"` format (HF5 in the future)
     provided by `dpdata` will be created.
 
+    If `config["label_cache"]` is provided, the labels are looked up in
+    the label cache (see `make_label_cache`) by the hash of the input
+    files and the run config other than the command and the output
+    names before running the task, and stored in the cache after.
+
     """
 
     @classmethod
@@ -154,7 +169,7 @@ class RunFp(OP, ABC):
         ip : dict
             Input dict with components:
 
-            - `config`: (`dict`) The config of FP task. Should have `config['run']`, which defines the runtime configuration of the FP task.
+            - `config`: (`dict`) The config of FP task. Should have `config['run']`, which defines the runtime configuration of the FP task. The optional `config['label_cache']` defines the label cache.
             - `task_name`: (`str`) The name of task.
             - `task_path`: (`Artifact(Path)`) The path that contains all input files prepareed by `PrepFp`.
 
@@ -180,6 +195,7 @@ class RunFp(OP, ABC):
         opt_input_files = self.optional_input_files()
         opt_input_files = [(Path(task_path) / ii).resolve() for ii in opt_input_files]
         work_dir = Path(task_name)
+        label_cache = make_label_cache(ip["config"].get("label_cache"))
 
         with set_directory(work_dir):
             # link input files
@@ -194,7 +210,12 @@ class RunFp(OP, ABC):
                 if os.path.isfile(ii) or os.path.isdir(ii):
                     iname = ii.name
                     Path(iname).symlink_to(ii)
-            out_name, log_name = self.run_task(**config)
+            if label_cache is None:
+                out_name, log_name = self.run_task(**config)
+            else:
+                out_name, log_name = self._run_task_cached(
+                    label_cache, config, input_files + opt_input_files
+                )
 
         return OPIO(
             {
@@ -202,3 +223,26 @@ class RunFp(OP, ABC):
                 "labeled_data": work_dir / out_name,
             }
         )
+
+    def _run_task_cached(
+        self,
+        label_cache: LabelCache,
+        config: Dict,
+        files: List[Path],
+    ) -> Tuple[str, str]:
+        # the labels are determined by the inputs, not by the command
+        # running the task (e.g. the number of MPI processes) or the names
+        # of the output files
+        key_config = {
+            kk: vv for kk, vv in config.items() if kk not in ("command", "out", "log")
+        }
+        files = [ii for ii in files if ii.exists()]
+        key = label_cache_key(type(self).__name__, key_config, files)
+        out_name = config.get("out", fp_default_out_data_name)
+        log_name = config.get("log", fp_default_log_name)
+        if label_cache.load(key, Path(out_name)):
+            Path(log_name).write_text(f"labels loaded from the label cache: {key}\n")
+            return out_name, log_name
+        out_name, log_name = self.run_task(**config)
+        label_cache.store(key, Path(out_name))
+        return out_name, log_name
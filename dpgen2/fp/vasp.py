@@ -1,4 +1,8 @@
 import logging
+import mmap
+import os
+import re
+import shutil
 from pathlib import (
     Path,
 )
@@ -32,6 +36,10 @@ from dflow.python import (
 from dpgen2.constants import (
     fp_default_log_name,
     fp_default_out_data_name,
+    fp_index_pattern,
+)
+from dpgen2.utils.chdir import (
+    set_directory,
 )
 from dpgen2.utils.run_command import (
     run_command,
@@ -53,9 +61,81 @@ vasp_conf_name = "POSCAR"
 vasp_input_name = "INCAR"
 vasp_pot_name = "POTCAR"
 vasp_kp_name = "KPOINTS"
+vasp_warm_start_dir = "warm_start_frames"
+vasp_warm_start_files = ["WAVECAR", "CHGCAR"]
+# the OUTCARs larger than this (in bytes) are streamed to a lean OUTCAR
+# before being parsed by dpdata
+vasp_lean_outcar_size = 16 << 20
+
+
+def similarity_order(
+    coords: np.ndarray,
+    cells: np.ndarray,
+) -> np.ndarray:
+    r"""Order the frames of the same atoms by structural similarity.
+
+    Starting from the first frame, the next frame is the nearest of the
+    remaining frames by the norm of the differences of the coordinates
+    and the cells, so the neighboring frames in the order are similar.
+
+    Parameters
+    ----------
+    coords : np.ndarray
+        The coordinates, shape (nframes, natoms, 3).
+    cells : np.ndarray
+        The cells, shape (nframes, 3, 3).
+
+    Returns
+    -------
+    order : np.ndarray
+        The indexes of the frames in the order.
+    """
+    nframes = coords.shape[0]
+    feats = np.concatenate(
+        (coords.reshape(nframes, -1), cells.reshape(nframes, -1)), axis=1
+    )
+    order = np.zeros(nframes, dtype=int)
+    remaining = np.ones(nframes, dtype=bool)
+    remaining[0] = False
+    for ii in range(1, nframes):
+        cand = np.flatnonzero(remaining)
+        dist = np.linalg.norm(feats[cand] - feats[order[ii - 1]], axis=1)
+        order[ii] = cand[np.argmin(dist)]
+        remaining[order[ii]] = False
+    return order
 
 
 class PrepVasp(PrepFp):
+    def task_confs(
+        self,
+        system: dpdata.System,
+        vasp_inputs: VaspInputs,
+    ) -> List[dpdata.System]:
+        r"""Split a system into the configurations of vasp tasks.
+
+        Without warm start, each frame is a task. Otherwise the frames
+        with the same k-points are ordered by `similarity_order` and
+        split into chains of at most `vasp_inputs.warm_start_nframes`
+        frames, each chain is a task.
+        """
+        nframes_chain = vasp_inputs.warm_start_nframes
+        if nframes_chain <= 1:
+            return super().task_confs(system, vasp_inputs)
+        # the wavefunctions are only reused with the same k-points
+        groups = {}
+        for ff in range(system.get_nframes()):
+            kp = vasp_inputs.make_kpoints(system["cells"][ff])  # type: ignore
+            groups.setdefault(kp, []).append(ff)
+        confs = []
+        for idx in groups.values():
+            idx = np.array(idx)
+            order = idx[
+                similarity_order(system["coords"][idx], system["cells"][idx])  # type: ignore
+            ]
+            for ii in range(0, len(order), nframes_chain):
+                confs.append(system.sub_system(order[ii : ii + nframes_chain]))
+        return confs
+
     def prep_task(
         self,
         conf_frame: dpdata.System,
@@ -66,17 +146,28 @@ class PrepVasp(PrepFp):
         Parameters
         ----------
         conf_frame : dpdata.System
-            One frame of configuration in the dpdata format.
+            One frame of configuration in the dpdata format. The frames
+            after the first of a warm-start chain are written to
+            `vasp_warm_start_dir`.
         vasp_inputs : VaspInputs
             The VaspInputs object handels all other input files of the task.
         """
 
         conf_frame.to("vasp/poscar", vasp_conf_name)
         Path(vasp_input_name).write_text(vasp_inputs.incar_template)
-        # fix the case when some element have 0 atom, e.g. H0O2
-        tmp_frame = dpdata.System(vasp_conf_name, fmt="vasp/poscar")
-        Path(vasp_pot_name).write_text(vasp_inputs.make_potcar(tmp_frame["atom_names"]))
+        # fix the case when some element have 0 atom, e.g. H0O2, the
+        # elements with 0 atom are not written to the POSCAR
+        atom_names = [
+            nn
+            for nn, numb in zip(conf_frame["atom_names"], conf_frame["atom_numbs"])
+            if numb > 0
+        ]
+        Path(vasp_pot_name).write_text(vasp_inputs.make_potcar(atom_names))
         Path(vasp_kp_name).write_text(vasp_inputs.make_kpoints(conf_frame["cells"][0]))  # type: ignore
+        for ff in range(1, conf_frame.get_nframes()):
+            frame_dir = Path(vasp_warm_start_dir) / (fp_index_pattern % ff)
+            frame_dir.mkdir(parents=True)
+            conf_frame[ff].to("vasp/poscar", frame_dir / vasp_conf_name)
 
 
 class RunVasp(RunFp):
@@ -100,7 +191,7 @@ class RunVasp(RunFp):
             A list of optional input files names.
 
         """
-        return []
+        return [vasp_warm_start_dir]
 
     def run_task(
         self,
@@ -130,17 +221,27 @@ class RunVasp(RunFp):
         log_name = log
         out_name = out
         # run vasp
-        command = " ".join([command, ">", log_name])
-        ret, out, err = run_command(command, shell=True)
-        if ret != 0:
-            logging.error(
-                "".join(
-                    ("vasp failed\n", "out msg: ", out, "\n", "err msg: ", err, "\n")
-                )
-            )
-            raise TransientError("vasp failed")
+        _run_vasp(command, log_name)
         # convert the output to deepmd/npy format
-        sys = dpdata.LabeledSystem("OUTCAR")
+        sys = load_outcar("OUTCAR")
+        # the frames of a warm-start chain, each starts from the
+        # wavefunction and charge density of the previous one, which are
+        # moved rather than copied as they may be large
+        prev_dir = Path(".")
+        frame_dirs = sorted(Path(vasp_warm_start_dir).glob("*"))
+        for frame_dir in frame_dirs:
+            run_dir = Path(vasp_warm_start_dir + "." + frame_dir.name)
+            run_dir.mkdir()
+            for ii in [vasp_input_name, vasp_pot_name, vasp_kp_name]:
+                (run_dir / ii).symlink_to(Path(ii).resolve())
+            shutil.copyfile(frame_dir / vasp_conf_name, run_dir / vasp_conf_name)
+            for ii in vasp_warm_start_files:
+                if (prev_dir / ii).is_file() and (prev_dir / ii).stat().st_size > 0:
+                    os.replace(prev_dir / ii, run_dir / ii)
+            with set_directory(run_dir):
+                _run_vasp(command, log_name)
+            sys.append(load_outcar(run_dir / "OUTCAR"))
+            prev_dir = run_dir
         sys.to("deepmd/npy", out_name)
         return out_name, log_name
 
@@ -170,3 +271,115 @@ class RunVasp(RunFp):
                 "log", str, optional=True, default=fp_default_log_name, doc=doc_vasp_log
             ),
         ]
+
+
+def _run_vasp(
+    command: str,
+    log_name: str,
+):
+    command = " ".join([command, ">", log_name])
+    ret, out, err = run_command(command, shell=True)
+    if ret != 0:
+        logging.error(
+            "".join(("vasp failed\n", "out msg: ", out, "\n", "err msg: ", err, "\n"))
+        )
+        raise TransientError("vasp failed")
+
+
+def load_outcar(
+    outcar: Union[str, Path],
+) -> dpdata.LabeledSystem:
+    r"""Load the labels from an OUTCAR.
+
+    An OUTCAR larger than `vasp_lean_outcar_size` is first streamed to
+    a lean OUTCAR by `lean_outcar`, so dpdata parses only the lines of
+    the labels instead of the whole file. The labels are the same.
+    """
+    outcar = Path(outcar)
+    if outcar.is_file() and outcar.stat().st_size > vasp_lean_outcar_size:
+        lean = lean_outcar(outcar, outcar.with_name(outcar.name + ".lean"))
+        return dpdata.LabeledSystem(str(lean), fmt="vasp/outcar")
+    return dpdata.LabeledSystem(str(outcar))
+
+
+def lean_outcar(
+    outcar: Union[str, Path],
+    output: Union[str, Path],
+) -> Path:
+    r"""Write the lines of an OUTCAR read by the `vasp/outcar` format of
+    dpdata to a lean OUTCAR.
+
+    The OUTCAR is memory-mapped and scanned for the tokens of the
+    labels. The header before the first electronic iteration is kept.
+    After that, only the iteration lines, the energies, and the
+    contiguous blocks of the cells, the stresses and the positions and
+    forces are kept, so the lines in the blocks keep their offsets. All
+    the other lines, e.g. the eigenvalues and the timings, are dropped.
+
+    Parameters
+    ----------
+    outcar : str or Path
+        The OUTCAR.
+    output : str or Path
+        The lean OUTCAR.
+
+    Returns
+    -------
+    output : Path
+        The lean OUTCAR.
+    """
+    with open(outcar, "rb") as fin, open(output, "wb") as fout:
+        if os.fstat(fin.fileno()).st_size == 0:
+            return Path(output)
+        with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header_end = mm.find(b"Iteration")
+            if header_end < 0:
+                fout.write(mm[:])
+                return Path(output)
+            header_end = mm.rfind(b"\n", 0, header_end) + 1
+            header = mm[:header_end]
+            fout.write(header)
+            match = re.search(rb"ions per type =([ 0-9]*)", header)
+            ntot = sum(int(ii) for ii in match.group(1).split()) if match else 0
+            # the end of the kept lines
+            pos = header_end
+            for match in _outcar_tokens.finditer(mm, header_end):
+                start = mm.rfind(b"\n", 0, match.start()) + 1
+                end = _next_lines(mm, match.end(), 1)
+                token = match.group()
+                if token == b"VOLUME and BASIS":
+                    end = _next_lines(mm, end, 7)
+                elif token == b"TOTAL-FORCE":
+                    end = _next_lines(mm, end, ntot + 1)
+                elif token == b"FORCE on cell =-STRESS":
+                    # the stress in kB, not earlier than the 14th line of the block
+                    end = _next_lines(mm, end, 13)
+                    while end < len(mm):
+                        line_end = _next_lines(mm, end, 1)
+                        end, line = line_end, mm[end:line_end]
+                        if line.split()[0:2] == [b"in", b"kB"]:
+                            break
+                if end > pos:
+                    fout.write(mm[max(start, pos) : end])
+                    pos = end
+    return Path(output)
+
+
+_outcar_tokens = re.compile(
+    rb"Iteration|free  energy   TOTEN|VOLUME and BASIS|FORCE on cell =-STRESS"
+    rb"|TOTAL-FORCE"
+)
+
+
+def _next_lines(
+    buff: mmap.mmap,
+    pos: int,
+    nlines: int,
+) -> int:
+    # the position after the next `nlines` line breaks from `pos`
+    for _ in range(nlines):
+        idx = buff.find(b"\n", pos)
+        if idx < 0:
+            return len(buff)
+        pos = idx + 1
+    return pos
@@ -1,3 +1,4 @@
+import functools
 from pathlib import (
     Path,
 )
@@ -27,6 +28,7 @@ class VaspInputs:
         incar: str,
         pp_files: Dict[str, str],
         kgamma: bool = True,
+        warm_start_nframes: int = 1,
     ):
         """
         Parameters
@@ -45,11 +47,29 @@ class VaspInputs:
             }
         kgamma : bool
             K-mesh includes the gamma point
+        warm_start_nframes : int
+            The maximal number of similar frames labeled in sequence by
+            one task, each starting from the WAVECAR and CHGCAR of the
+            previous one. 1 for no warm start.
         """
         self.kspacing = kspacing
         self.kgamma = kgamma
+        self.warm_start_nframes = warm_start_nframes
         self.incar_from_file(incar)
         self.potcars_from_file(pp_files)
+        self._potcar_cache = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # the cache is not sent with the inputs
+        state.pop("_potcar_cache", None)
+        return state
+
+    def __setstate__(self, state):
+        # the inputs pickled by an older version have no warm start
+        state.setdefault("warm_start_nframes", 1)
+        self.__dict__.update(state)
+        self._potcar_cache = {}
 
     @property
     def incar_template(self):
@@ -77,10 +97,13 @@ class VaspInputs:
         self,
         atom_names,
     ) -> str:
-        potcar_contents = []
-        for nn in atom_names:
-            potcar_contents.append(self._potcars[nn])
-        return "".join(potcar_contents)
+        key = tuple(atom_names)
+        if key not in self._potcar_cache:
+            potcar_contents = []
+            for nn in atom_names:
+                potcar_contents.append(self._potcars[nn])
+            self._potcar_cache[key] = "".join(potcar_contents)
+        return self._potcar_cache[key]
 
     def make_kpoints(
         self,
@@ -94,11 +117,25 @@ class VaspInputs:
         doc_incar = "The path to the template incar file"
         doc_kspacing = "The spacing of k-point sampling. `ksapcing` will overwrite the incar template"
         doc_kgamma = "If the k-mesh includes the gamma point. `kgamma` will overwrite the incar template"
+        doc_warm_start_nframes = (
+            "The maximal number of frames labeled in sequence by one vasp task. "
+            "The frames of the same composition and k-points are ordered by "
+            "similarity, and each frame starts from the WAVECAR and CHGCAR of "
+            "the previous one, so the incar template should keep LWAVE on. "
+            "1 for no warm start."
+        )
         return [
             Argument("incar", str, optional=False, doc=doc_incar),
             Argument("pp_files", dict, optional=False, doc=doc_pp_files),
             Argument("kspacing", float, optional=False, doc=doc_kspacing),
             Argument("kgamma", bool, optional=True, default=True, doc=doc_kgamma),
+            Argument(
+                "warm_start_nframes",
+                int,
+                optional=True,
+                default=1,
+                doc=doc_warm_start_nframes,
+            ),
         ]
 
     @staticmethod
@@ -119,7 +156,7 @@ def make_kspacing_kpoints(box, kspacing, kgamma):
         max(1, (np.ceil(2 * np.pi * np.linalg.norm(ii) / ks).astype(int)))
         for ii, ks in zip(rbox, kspacing)  # type: ignore
     ]
-    ret = _make_vasp_kpoints(kpoints, kgamma)
+    ret = _make_vasp_kpoints(tuple(kpoints), kgamma)
     return ret
 
 
@@ -143,6 +180,8 @@ def _make_vasp_kp_mp(kpoints):
     return ret
 
 
+# the KPOINTS are cached by the k-mesh, not by the box
+@functools.lru_cache(maxsize=256)
 def _make_vasp_kpoints(kpoints, kgamma=False):
     if kgamma:
         ret = _make_vasp_kp_gamma(kpoints)
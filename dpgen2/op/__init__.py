@@ -4,6 +4,12 @@ from .collect_data import (
 from .collect_run_caly import (
     CollRunCaly,
 )
+from .compress_models import (
+    CompressModels,
+)
+from .freeze_models import (
+    FreezeModels,
+)
 from .prep_caly_dp_optim import (
     PrepCalyDPOptim,
 )
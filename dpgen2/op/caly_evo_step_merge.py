@@ -1,21 +1,15 @@
-import json
+import inspect
 import logging
-import pickle
 import shutil
 from pathlib import (
     Path,
 )
 from typing import (
     List,
+    Optional,
     Tuple,
 )
 
-from dflow import (
-    Step,
-    Workflow,
-    download_artifact,
-    upload_artifact,
-)
 from dflow.python import (
     OP,
     OPIO,
@@ -23,30 +17,15 @@ from dflow.python import (
     BigParameter,
     OPIOSign,
     Parameter,
-    Slices,
     TransientError,
 )
-from dflow.utils import (
-    flatten,
-)
 
-from dpgen2.constants import (
-    calypso_check_opt_file,
-    calypso_run_opt_file,
-)
-from dpgen2.exploration.task import (
-    ExplorationTaskGroup,
-)
 from dpgen2.superop.caly_evo_step import (
     CalyEvoStep,
 )
 from dpgen2.utils import (
-    BinaryFileInput,
     set_directory,
 )
-from dpgen2.utils.run_command import (
-    run_command,
-)
 
 
 class CalyEvoStepMerge(OP):
@@ -88,42 +67,182 @@ class CalyEvoStepMerge(OP):
         self,
         ip: OPIO,
     ) -> OPIO:
-        from dflow import (
-            config,
-        )
+        r"""Execute the OP.
+
+        The CALYPSO generations are run in a loop in this OP: in each
+        generation `collect_run_caly`, `prep_dp_optim` and the
+        `run_dp_optim` tasks are executed in place, and the next
+        generation is fed with their outputs, until CALYPSO finishes.
+        Each generation runs in its own directory, the trajectories of
+        all the generations are gathered in
+        `{task_name}/opt_path_{idx}/traj_results`.
+
+        Parameters
+        ----------
+        ip : dict
+            Input dict with components, check `CalyEvoStep` for definitions.
 
-        config["mode"] = self.mode
-        wf = Workflow("caly-evo-workflow")
-        steps = CalyEvoStep(*self.args, **self.kwargs)
-        step = Step(
-            "caly-evo-step",
-            template=steps,
-            slices=Slices(output_artifact=["traj_results"]),
-            parameters={k: ip[k] for k in steps.inputs.parameters},
-            artifacts={
-                k: upload_artifact(ip[k]) if ip[k] is not None else None
-                for k in steps.inputs.artifacts
-            },
-            with_param=[0],
+        Returns
+        -------
+        Any
+            Output dict with components:
+            - `traj_results`: (`Artifact(List[Path])`) The dirs of the trajectories of the structure optimizations.
+        """
+        ops = inspect.signature(CalyEvoStep.__init__).bind(
+            None, *self.args, **self.kwargs
         )
-        wf.add(step)
-        wf.submit()
-        wf.wait()
-        assert wf.query_status() == "Succeeded"
-        out = OPIO()
-        step = wf.query_step("caly-evo-step")[0]
-        for k in step.outputs.parameters:
-            out[k] = step.outputs.parameters[k].value
-        output_sign = self.get_output_sign()
-        for k in step.outputs.artifacts:
-            path_list = download_artifact(step.outputs.artifacts[k])
-            if output_sign[k].type == List[Path]:
-                if not isinstance(path_list, list) or any(
-                    [p is not None and not isinstance(p, str) for p in path_list]
-                ):
-                    path_list = list(flatten(path_list).values())
-                out[k] = [Path(p) for p in path_list]
-            elif output_sign[k].type == Path:
-                assert len(path_list) == 1
-                out[k] = Path(path_list[0])
-        return out
+        ops.apply_defaults()
+        collect_run_caly = ops.arguments["collect_run_caly"]()
+        prep_dp_optim = ops.arguments["prep_dp_optim"]()
+        run_dp_optim = ops.arguments["run_dp_optim"]()
+        run_config = ops.arguments["run_config"]
+        template_slice_config = run_config.get("template_slice_config") or {}
+
+        cnt_num = ip["cnt_num"]
+        task_name = ip["task_name"]
+        models = _resolve(ip["models"])
+        collect_inputs = {
+            "input_file": _resolve(ip["input_file"]),
+            "step": _resolve(ip["step"]),
+            "results": _resolve(ip["results"]),
+            "opt_results_dir": _resolve(ip["opt_results_dir"]),
+            "qhull_input": _resolve(ip["qhull_input"]),
+        }
+        caly_run_opt_file = _resolve(ip["caly_run_opt_file"])
+        caly_check_opt_file = _resolve(ip["caly_check_opt_file"])
+
+        traj_results = []
+        while True:
+            # the OPs of a generation run in the directory of the generation
+            gen_dir = Path(f"caly-evo-step-{cnt_num}").resolve()
+            with set_directory(gen_dir):
+                out_collect = collect_run_caly.execute(
+                    OPIO(
+                        {
+                            "config": ip["expl_config"],
+                            "task_name": task_name,
+                            "cnt_num": cnt_num,
+                            **collect_inputs,
+                        }
+                    )
+                )
+                finished = out_collect["finished"]
+                out_prep = prep_dp_optim.execute(
+                    OPIO(
+                        {
+                            "task_name": out_collect["task_name"],
+                            "finished": finished,
+                            "template_slice_config": template_slice_config,
+                            "poscar_dir": out_collect["poscar_dir"],
+                            "models_dir": models,
+                            "caly_run_opt_file": caly_run_opt_file,
+                            "caly_check_opt_file": caly_check_opt_file,
+                        }
+                    )
+                )
+            out_runs = _run_tasks(
+                run_dp_optim,
+                run_config,
+                [
+                    OPIO(
+                        {
+                            "config": ip["expl_config"],
+                            "task_name": tname,
+                            "finished": finished,
+                            "cnt_num": cnt_num,
+                            "task_dir": _existing(gen_dir / tdir),
+                        }
+                    )
+                    for tname, tdir in zip(
+                        out_prep["task_names"], out_prep["task_dirs"]
+                    )
+                ],
+                gen_dir,
+            )
+            for run_dir, out_run in out_runs:
+                traj_results.append(
+                    _gather_traj_results(run_dir, Path(out_run["traj_results"]))
+                )
+            if finished != "false":
+                break
+            cnt_num += 1
+            task_name = out_collect["task_name"]
+            collect_inputs = {
+                "input_file": gen_dir / out_collect["input_file"],
+                "step": gen_dir / out_collect["step"],
+                "results": gen_dir / out_collect["results"],
+                "opt_results_dir": [
+                    run_dir / out_run["optim_results_dir"]
+                    for run_dir, out_run in out_runs
+                ],
+                "qhull_input": gen_dir / out_collect["qhull_input"],
+            }
+            caly_run_opt_file = gen_dir / out_prep["caly_run_opt_file"]
+            caly_check_opt_file = gen_dir / out_prep["caly_check_opt_file"]
+
+        return OPIO({"traj_results": list(dict.fromkeys(traj_results))})
+
+
+def _resolve(path):
+    if path is None:
+        return None
+    elif isinstance(path, list):
+        return [Path(pp).resolve() for pp in path]
+    else:
+        return Path(path).resolve()
+
+
+def _existing(path: Path) -> Optional[Path]:
+    # a missing output artifact is passed as None, as done by dflow
+    return path if path.exists() else None
+
+
+def _run_tasks(
+    run_dp_optim: OP,
+    run_config: dict,
+    task_ips: List[OPIO],
+    gen_dir: Path,
+) -> List[Tuple[Path, OPIO]]:
+    r"""Run the optimization tasks one after another, each in its own
+    directory. Returns the directories and the outputs of the
+    successful tasks. The failed tasks are
+    tolerated as the sliced `run-dp-optim` step, according to the
+    `continue_on_num_success` and `continue_on_success_ratio` of the
+    step config.
+    """
+    outs = []
+    nfailed = 0
+    for idx, task_ip in enumerate(task_ips):
+        run_dir = gen_dir / f"run-dp-optim-{idx}"
+        try:
+            with set_directory(run_dir):
+                outs.append((run_dir, run_dp_optim.execute(task_ip)))
+        except TransientError as e:
+            logging.warning(f"task {task_ip['task_name']} failed: {e}")
+            nfailed += 1
+    if nfailed > 0:
+        nsuccess = len(outs)
+        num_success = run_config.get("continue_on_num_success")
+        success_ratio = run_config.get("continue_on_success_ratio")
+        if not (
+            (num_success is not None and nsuccess >= num_success)
+            or (success_ratio is not None and nsuccess >= success_ratio * len(task_ips))
+        ):
+            raise TransientError(
+                f"{nfailed} of {len(task_ips)} optimization tasks failed"
+            )
+    return outs
+
+
+def _gather_traj_results(
+    run_dir: Path,
+    target: Path,
+) -> Path:
+    r"""Move the trajectories of a task to the same relative path in the
+    working directory. The trajectories are named by the generation, so
+    the trajectories of all the generations share the directory.
+    """
+    target.mkdir(parents=True, exist_ok=True)
+    for traj in (run_dir / target).iterdir():
+        shutil.move(str(traj), target / traj.name)
+    return target
@@ -0,0 +1,155 @@
+import logging
+import re
+import shutil
+from pathlib import (
+    Path,
+)
+from typing import (
+    List,
+    Optional,
+)
+
+from dflow.python import (
+    OP,
+    OPIO,
+    Artifact,
+    OPIOSign,
+    TransientError,
+)
+
+from dpgen2.op.freeze_models import (
+    freeze_pytorch_model,
+)
+from dpgen2.op.run_dp_train import (
+    RunDPTrain,
+)
+from dpgen2.utils.run_command import (
+    run_command,
+)
+
+compressed_model_dir = "compressed_models"
+
+
+class CompressModels(OP):
+    r"""Compress the trained models for the exploration.
+
+    If `compress` is set in the training config and the iteration is
+    not earlier than `compress_start_iter`, each model is compressed
+    once by `dp compress`. Otherwise the models are passed through.
+    The PyTorch checkpoints (`.pt`) are frozen (with the `head` of the
+    multitask training, if any) before compression, and the compressed
+    models are output as `.pth`. The original models are kept for the
+    training of the next iteration.
+
+    """
+
+    @classmethod
+    def get_input_sign(cls):
+        return OPIOSign(
+            {
+                "config": dict,
+                "block_id": str,
+                "models": Artifact(List[Path]),
+            }
+        )
+
+    @classmethod
+    def get_output_sign(cls):
+        return OPIOSign(
+            {
+                "models": Artifact(List[Path]),
+            }
+        )
+
+    @OP.exec_sign_check
+    def execute(
+        self,
+        ip: OPIO,
+    ) -> OPIO:
+        r"""Execute the OP.
+
+        Parameters
+        ----------
+        ip : dict
+            Input dict with components:
+
+            - `config`: (`dict`) The config of training task. Check `RunDPTrain.training_args` for definitions. The `compress`, `compress_args`, `compress_start_iter` and `head` are used.
+            - `block_id`: (`str`) The id of the block, e.g. `iter-000003`.
+            - `models`: (`Artifact(List[Path])`) The trained models.
+
+        Returns
+        -------
+        Any
+            Output dict with components:
+            - `models`: (`Artifact(List[Path])`) The models for the exploration, in the same order as the trained models.
+
+        Raises
+        ------
+        TransientError
+            On the failure of compression.
+        """
+        config = ip["config"] if ip["config"] is not None else {}
+        config = RunDPTrain.normalize_config(config)
+        do_compress = config["compress"] and (
+            _get_iteration(ip["block_id"]) >= config["compress_start_iter"]
+        )
+        head = config["head"]
+        compress_args = config["compress_args"]
+
+        out_dir = Path(compressed_model_dir)
+        out_dir.mkdir(exist_ok=True)
+        models = []
+        for idx, mm in enumerate(ip["models"]):
+            mm = Path(mm)
+            if not do_compress:
+                oname = out_dir / ("model.%03d%s" % (idx, mm.suffix))
+                shutil.copyfile(mm, oname)
+            elif mm.suffix == ".pb":
+                oname = out_dir / ("model.%03d.pb" % idx)
+                _compress(mm, oname, compress_args, "dp")
+            elif mm.suffix in (".pt", ".pth"):
+                oname = out_dir / ("model.%03d.pth" % idx)
+                if mm.suffix == ".pt":
+                    frozen = out_dir / ("frozen.%03d.pth" % idx)
+                    mm = freeze_pytorch_model(mm, frozen, head=head)
+                _compress(mm, oname, compress_args, "dp --pt")
+            else:
+                raise RuntimeError(
+                    "Model file with extension '%s' is not supported" % mm.suffix
+                )
+            models.append(oname)
+        return OPIO({"models": models})
+
+
+def _get_iteration(block_id: Optional[str]) -> int:
+    match = re.search(r"([0-9]+)$", block_id or "")
+    return int(match.group(1)) if match is not None else 0
+
+
+def _compress(
+    model: Path,
+    output: Path,
+    compress_args: str,
+    dp_command: str,
+) -> None:
+    command = " ".join(
+        [dp_command, "compress", "-i", str(model), "-o", str(output), compress_args]
+    ).strip()
+    ret, out, err = run_command(command, shell=True)
+    if ret != 0:
+        logging.error(
+            "".join(
+                (
+                    "compress failed\n",
+                    "command was: ",
+                    command,
+                    "out msg: ",
+                    out,
+                    "\n",
+                    "err msg: ",
+                    err,
+                    "\n",
+                )
+            )
+        )
+        raise TransientError("compress failed")
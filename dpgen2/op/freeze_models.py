@@ -0,0 +1,180 @@
+import hashlib
+import logging
+import os
+import shutil
+from pathlib import (
+    Path,
+)
+from typing import (
+    List,
+    Optional,
+    Union,
+)
+
+from dflow.python import (
+    OP,
+    OPIO,
+    Artifact,
+    BigParameter,
+    OPIOSign,
+    TransientError,
+)
+
+from dpgen2.utils.run_command import (
+    run_command,
+)
+
+frozen_model_dir = "frozen_models"
+
+
+class FreezeModels(OP):
+    r"""Freeze the PyTorch models for the exploration.
+
+    Each `.pt` model is frozen once by `dp --pt freeze` and the
+    exploration tasks link the frozen `.pth` models, instead of
+    freezing all the models in every task. Models of other formats
+    (e.g. `.pb`) are passed through.
+
+    """
+
+    @classmethod
+    def get_input_sign(cls):
+        return OPIOSign(
+            {
+                "config": BigParameter(dict),
+                "models": Artifact(List[Path]),
+            }
+        )
+
+    @classmethod
+    def get_output_sign(cls):
+        return OPIOSign(
+            {
+                "models": Artifact(List[Path]),
+            }
+        )
+
+    @OP.exec_sign_check
+    def execute(
+        self,
+        ip: OPIO,
+    ) -> OPIO:
+        r"""Execute the OP.
+
+        Parameters
+        ----------
+        ip : dict
+            Input dict with components:
+
+            - `config`: (`dict`) The config of lmp task. Check `RunLmp.lmp_args` for definitions. The `head` and `freeze_cache_dir` are used.
+            - `models`: (`Artifact(List[Path])`) The models to be frozen.
+
+        Returns
+        -------
+        Any
+            Output dict with components:
+            - `models`: (`Artifact(List[Path])`) The frozen models, in the same order as the input models.
+
+        Raises
+        ------
+        TransientError
+            On the failure of freezing.
+        """
+        config = ip["config"] if ip["config"] is not None else {}
+        head = config.get("head")
+        cache_dir = config.get("freeze_cache_dir")
+
+        out_dir = Path(frozen_model_dir)
+        out_dir.mkdir(exist_ok=True)
+        models = []
+        for idx, mm in enumerate(ip["models"]):
+            mm = Path(mm)
+            if mm.suffix == ".pt":
+                oname = out_dir / ("model.%03d.pth" % idx)
+                freeze_pytorch_model(mm, oname, head=head, cache_dir=cache_dir)
+            else:
+                oname = out_dir / ("model.%03d%s" % (idx, mm.suffix))
+                shutil.copyfile(mm, oname)
+            models.append(oname)
+        return OPIO({"models": models})
+
+
+def model_hash(
+    model: Union[str, Path],
+    head: Optional[str] = None,
+) -> str:
+    r"""The hash of the model content and the selected head."""
+    sha = hashlib.sha256()
+    with open(model, "rb") as fp:
+        for chunk in iter(lambda: fp.read(1 << 20), b""):
+            sha.update(chunk)
+    if head is not None:
+        sha.update(b"\0head=" + head.encode())
+    return sha.hexdigest()
+
+
+def freeze_pytorch_model(
+    model: Union[str, Path],
+    output: Union[str, Path],
+    head: Optional[str] = None,
+    cache_dir: Optional[Union[str, Path]] = None,
+) -> Path:
+    r"""Freeze a PyTorch model by `dp --pt freeze`.
+
+    If `cache_dir` is provided, the frozen model is stored in the
+    cache by the hash of the model content and the head, and the
+    freezing is skipped if the same model has been frozen before.
+
+    Parameters
+    ----------
+    model : str or Path
+        The PyTorch model (`.pt`).
+    output : str or Path
+        The frozen model (`.pth`).
+    head : str, optional
+        The head to select from a multitask model.
+    cache_dir : str or Path, optional
+        The directory of the frozen model cache.
+
+    Returns
+    -------
+    output : Path
+        The frozen model.
+    """
+    output = Path(output)
+    cached = None
+    if cache_dir is not None:
+        cached = Path(cache_dir) / (model_hash(model, head) + ".pth")
+        if cached.is_file():
+            shutil.copyfile(cached, output)
+            return output
+
+    freeze_cmd = "dp --pt freeze -c %s -o %s" % (model, output)
+    if head is not None:
+        freeze_cmd += " --head %s" % head
+    ret, out, err = run_command(freeze_cmd, shell=True)
+    if ret != 0:
+        logging.error(
+            "".join(
+                (
+                    "freeze failed\n",
+                    "command was",
+                    freeze_cmd,
+                    "out msg",
+                    out,
+                    "\n",
+                    "err msg",
+                    err,
+                    "\n",
+                )
+            )
+        )
+        raise TransientError("freeze failed")
+
+    if cached is not None:
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        # write to a temporary file first, the cache may be shared
+        tmp = cached.with_name(cached.name + ".%d.tmp" % os.getpid())
+        shutil.copyfile(output, tmp)
+        os.replace(tmp, cached)
+    return output
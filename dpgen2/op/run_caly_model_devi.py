@@ -6,6 +6,8 @@ from pathlib import (
 )
 from typing import (
     List,
+    Optional,
+    Tuple,
     Union,
 )
 
@@ -19,6 +21,12 @@ from dflow.python import (
     Parameter,
 )
 
+from dpgen2.exploration.render.binary_traj import (
+    lammps_dump_to_binary_traj,
+)
+from dpgen2.exploration.render.model_devi_loader import (
+    write_model_devi_sidecar,
+)
 from dpgen2.utils import (
     set_directory,
 )
@@ -40,6 +48,7 @@ class RunCalyModelDevi(OP):
                 "task_name": Parameter(str),
                 "traj_dirs": Artifact(List[Path]),
                 "models": Artifact(List[Path]),
+                "config": BigParameter(dict, default={}),
             }
         )
 
@@ -50,6 +59,7 @@ class RunCalyModelDevi(OP):
                 "task_name": Parameter(str),
                 "traj": Artifact(List[Path]),
                 "model_devi": Artifact(List[Path]),
+                "model_devi_sidecar": Artifact(List[Path]),
             }
         )
 
@@ -68,6 +78,7 @@ class RunCalyModelDevi(OP):
             - `task_name`: (`str`) The name of the task.
             - `traj_dirs`: (`Artifact(List[Path])`) The List of paths that contains trajectory files.
             - `models`: (`Artifact(List[Path])`) The frozen model to estimate the model deviation.
+            - `config`: (`dict`) The config of calypso exploration. The frames are evaluated in batches of at most `model_devi_batch_size` frames. If `model_devi_sidecar` is set, the binary sidecars of the model deviation files are also output. If `binary_traj` is set, the trajectories are output in the binary format.
 
         Returns
         -------
@@ -76,6 +87,7 @@ class RunCalyModelDevi(OP):
             - `task_name`: (`str`) The name of task.
             - `traj`: (`Artifact(List[Path])`) The output trajectory.
             - `model_devi`: (`Artifact(List[Path])`) The model deviation. The order of recorded model deviations should be consistent with the order of frames in `traj`.
+            - `model_devi_sidecar`: (`Artifact(List[Path])`) The binary sidecars of the model deviations, in the same order as `model_devi`. Empty if `model_devi_sidecar` is not set.
 
         """
         from deepmd.infer import (  # type: ignore
@@ -84,6 +96,9 @@ class RunCalyModelDevi(OP):
         )
 
         type_map = ip["type_map"]
+        config = ip["config"] if ip["config"] is not None else {}
+        model_devi_sidecar = config.get("model_devi_sidecar", False)
+        binary_traj = config.get("binary_traj")
 
         models = ip["models"]
         all_models = [model.resolve() for model in models]
@@ -97,30 +112,54 @@ class RunCalyModelDevi(OP):
         dump_file_name = "traj.%d.dump"
         model_devi_file_name = "model_devi.%d.out"
 
+        batch_size = config.get("model_devi_batch_size", 256)
+        type_lut = _type_lookup_table(type_map)
+
         tcount = 0
         with set_directory(work_dir):
             dump_str_dict = defaultdict(list)  # key: natoms, value: dump_strs
             devis_dict = defaultdict(list)  # key: natoms, value: Devis-s
+            # key: (atom types, pbc), value: (tcount, frame idx, coord, cell)
+            frames = defaultdict(list)
             for traj_dir in traj_dirs:
                 for traj_name in traj_dir.rglob("*.traj"):
                     atoms_list = parse_traj(traj_name)
                     if atoms_list is None:
                         continue
                     for atoms in atoms_list:
-                        natoms = len(atoms)
                         dump_str = atoms2lmpdump(atoms, tcount, type_map, ignore=True)
                         dump_str_dict[tcount].append(dump_str)
 
-                        pbc = np.all(atoms.get_pbc())
-                        coord = atoms.get_positions().reshape(1, -1)
-                        cell = atoms.get_cell().array.reshape(1, -1) if pbc else None
-                        atype = [type_map.index(atom.symbol) for atom in atoms]  # type: ignore
-                        devi = calc_model_devi(coord, cell, atype, graphs)[0]
-                        devis_dict[tcount].append(devi)
+                        pbc = bool(np.all(atoms.get_pbc()))
+                        atype = _get_atype(atoms, type_lut, type_map)
+                        cell = atoms.get_cell().array if pbc else None
+                        frames[(atype, pbc)].append(
+                            (
+                                tcount,
+                                len(devis_dict[tcount]),
+                                atoms.get_positions(),
+                                cell,
+                            )
+                        )
+                        devis_dict[tcount].append(None)
                     tcount += 1
 
+            # the frames with the same atom types are evaluated in batches
+            for (atype, pbc), group in frames.items():
+                devis = calc_model_devi_batched(
+                    calc_model_devi,
+                    [ff[2] for ff in group],
+                    [ff[3] for ff in group] if pbc else None,
+                    list(atype),
+                    graphs,
+                    batch_size,
+                )
+                for (tt, ii, _, _), devi in zip(group, devis):
+                    devis_dict[tt][ii] = devi
+
             traj_file_list = []
             model_devi_file_list = []
+            sidecar_file_list = []
             keys = dump_str_dict.keys()
             for key in keys:
                 dump_file = Path().joinpath(dump_file_name % key)
@@ -137,9 +176,18 @@ class RunCalyModelDevi(OP):
 
                 traj_str = "".join(traj_str)
                 dump_file.write_text(traj_str)
+                if binary_traj is not None:
+                    binary_file = dump_file.with_suffix(".bin")
+                    lammps_dump_to_binary_traj(dump_file, binary_file, **binary_traj)
+                    dump_file.unlink()
+                    dump_file = binary_file
 
                 model_devis = np.vstack(model_devis)
                 write_model_devi_out(model_devis, model_devi_file)
+                if model_devi_sidecar:
+                    sidecar_file_list.append(
+                        write_model_devi_sidecar(model_devi_file, model_devis[:, 1:7])
+                    )
 
                 traj_file_list.append(dump_file)
                 model_devi_file_list.append(model_devi_file)
@@ -152,11 +200,81 @@ class RunCalyModelDevi(OP):
             "task_name": str(work_dir),
             "traj": traj_file_list,
             "model_devi": model_devi_file_list,
+            "model_devi_sidecar": [work_dir / ff for ff in sidecar_file_list],
         }
 
         return OPIO(ret_dict)
 
 
+def _type_lookup_table(type_map: List[str]) -> np.ndarray:
+    r"""The type index of each atomic number, -1 if not in the type map."""
+    from ase.data import (  # type: ignore
+        atomic_numbers,
+    )
+
+    lut = np.full(len(atomic_numbers) + 1, -1, dtype=np.int64)
+    for idx, name in enumerate(type_map):
+        if name in atomic_numbers and lut[atomic_numbers[name]] < 0:
+            lut[atomic_numbers[name]] = idx
+    return lut
+
+
+def _get_atype(atoms, type_lut: np.ndarray, type_map: List[str]) -> Tuple[int, ...]:
+    atype = type_lut[atoms.numbers]
+    if np.any(atype < 0):
+        # raise the same error as type_map.index
+        for symbol in np.array(atoms.get_chemical_symbols())[atype < 0]:
+            type_map.index(symbol)
+    return tuple(atype.tolist())
+
+
+def calc_model_devi_batched(
+    calc_model_devi,
+    coords: List[np.ndarray],
+    cells: Optional[List[np.ndarray]],
+    atype: List[int],
+    graphs: list,
+    batch_size: int = 256,
+) -> np.ndarray:
+    r"""Calculate the model deviations of frames sharing the atom types.
+
+    The frames are evaluated by `calc_model_devi` in batches of at most
+    `batch_size` frames, each batch is evaluated by each model once.
+
+    Parameters
+    ----------
+    calc_model_devi
+        The `calc_model_devi` of `deepmd.infer`.
+    coords : List[np.ndarray]
+        The coordinates of the frames, each of shape natoms x 3.
+    cells : List[np.ndarray], optional
+        The cells of the frames, each of shape 3 x 3. None without
+        periodic boundary condition.
+    atype : List[int]
+        The atom types.
+    graphs : list
+        The models.
+    batch_size : int
+        The maximal number of frames evaluated at once.
+
+    Returns
+    -------
+    devi : np.ndarray
+        The model deviations, one row of the `calc_model_devi` output
+        per frame.
+    """
+    nframes = len(coords)
+    devis = []
+    for ii in range(0, nframes, batch_size):
+        batch = coords[ii : ii + batch_size]
+        coord = np.array(batch).reshape(len(batch), -1)
+        cell = None
+        if cells is not None:
+            cell = np.array(cells[ii : ii + batch_size]).reshape(len(batch), 9)
+        devis.append(np.asarray(calc_model_devi(coord, cell, atype, graphs)))
+    return np.concatenate(devis) if len(devis) > 0 else np.zeros((0, 8))
+
+
 def atoms2lmpdump(atoms, struc_idx, type_map, ignore=False):
     """down triangle cell can be obtained from
     cell params: a, b, c, alpha, beta, gamma.
@@ -225,105 +343,111 @@ def atoms2lmpdump(atoms, struc_idx, type_map, ignore=False):
     return dump_str
 
 
+# the safe distance (in bohr) of the elements in the sanity check
+safe_dist_dict = {
+    "He": 0.0,
+    "Li": 1.5,
+    "Na": 1.45,
+    "K": 2.3,
+    "Rb": 2.5,
+    "Mg": 1.7,
+    "Ca": 2.3,
+    "Sr": 2.5,
+    "Al": 1.7,
+    "Sc": 2.0,
+    "Y": 2.1,
+    "La": 2.5,
+    "Ti": 2.0,
+    "Zr": 2.1,
+    "Hf": 2.4,
+    "Mo": 2.1,
+    "W": 2.3,
+    "B": 1.1,
+    "C": 1.1,
+    "Si": 1.6,
+    "P": 1.5,
+    "As": 2.0,
+    "S": 1.5,
+    "Se": 2.1,
+    "Te": 2.0,
+    "Br": 2.3,
+    "H": 0.813,
+}
+_safe_dist_index = {ee: ii for ii, ee in enumerate(safe_dist_dict)}
+_safe_dist = np.array(list(safe_dist_dict.values()))
+# the minimal allowed distance (in angstrom) of each pair of elements
+_pair_thresholds = (_safe_dist[:, None] + _safe_dist[None, :]) * 0.529 / 1.2
+
+
 def parse_traj(traj_file):
     from ase import (  # type: ignore
         Atoms,
     )
-    from ase.build import (  # type: ignore
-        make_supercell,
-    )
-    from ase.io import (  # type: ignore
-        read,
+    from ase.io.trajectory import (  # type: ignore
+        Trajectory,
     )
 
-    safe_dist_dict = {
-        "He": 0.0,
-        "Li": 1.5,
-        "Na": 1.45,
-        "K": 2.3,
-        "Rb": 2.5,
-        "Mg": 1.7,
-        "Ca": 2.3,
-        "Sr": 2.5,
-        "Al": 1.7,
-        "Sc": 2.0,
-        "Y": 2.1,
-        "La": 2.5,
-        "Ti": 2.0,
-        "Zr": 2.1,
-        "Hf": 2.4,
-        "Mo": 2.1,
-        "W": 2.3,
-        "B": 1.1,
-        "C": 1.1,
-        "Si": 1.6,
-        "P": 1.5,
-        "As": 2.0,
-        "S": 1.5,
-        "Se": 2.1,
-        "Te": 2.0,
-        "Br": 2.3,
-        "H": 0.813,
-    }
-
-    trajs: List[Atoms] = read(traj_file, index=":", format="traj")  # type: ignore
     dthresh = 0.72
-    numb_traj = len(trajs)
-    assert numb_traj >= 1, "traj file is broken."
-
-    # 1st Filter, initial configuration
-    origin = trajs[0]
-    origin = make_supercell(origin, [[2, 0, 0], [0, 2, 0], [0, 0, 2]])
-    dis_mtx = origin.get_all_distances(mic=True)
-    row, col = np.diag_indices_from(dis_mtx)
-    dis_mtx[row, col] = np.nan
-    is_reasonable = np.nanmin(dis_mtx) > dthresh
-
-    selected_traj: Union[List[Atoms], None] = None
-    if is_reasonable:
-        if len(trajs) >= 20:
-            selected_traj = [trajs[iii] for iii in [4, 9, -10, -5, -1]]
-        elif 5 <= len(trajs) < 20:
-            selected_traj = [
-                trajs[np.random.randint(3, len(trajs) - 1)] for _ in range(4)
-            ]
-            selected_traj.append(trajs[-1])
-        elif 3 <= len(trajs) < 5:
-            selected_traj = [trajs[round((len(trajs) - 1) / 2)]]
-            selected_traj.append(trajs[-1])
-        elif len(trajs) == 2:
-            selected_traj = [trajs[0], trajs[-1]]
+    with Trajectory(traj_file) as trajs:
+        numb_traj = len(trajs)
+        assert numb_traj >= 1, "traj file is broken."
+
+        # 1st Filter, initial configuration
+        origin = trajs[0]
+        dis_mtx = _supercell(origin).get_all_distances(mic=True)
+        row, col = np.diag_indices_from(dis_mtx)
+        dis_mtx[row, col] = np.nan
+        is_reasonable = np.nanmin(dis_mtx) > dthresh
+
+        selected_traj: Union[List[Atoms], None] = None
+        if is_reasonable:
+            # only the selected frames are read
+            if numb_traj >= 20:
+                selected_idx = [4, 9, -10, -5, -1]
+            elif 5 <= numb_traj < 20:
+                selected_idx = [np.random.randint(3, numb_traj - 1) for _ in range(4)]
+                selected_idx.append(-1)
+            elif 3 <= numb_traj < 5:
+                selected_idx = [round((numb_traj - 1) / 2), -1]
+            elif numb_traj == 2:
+                selected_idx = [0, -1]
+            else:
+                selected_idx = [0]
+            frames = {0: origin}
+            selected_traj = []
+            for ii in selected_idx:
+                ii = ii % numb_traj
+                if ii not in frames:
+                    frames[ii] = trajs[ii]
+                selected_traj.append(frames[ii])
+
+            # 2nd filter for selected traj. It filters out all FRAMES that are to close.
+            selected_traj = [t for t in selected_traj if _is_frame_reasonable(t)]
         else:
-            selected_traj = [trajs[0]]
-
-        # 2nd filter for selected traj. It filters out all FRAMES that are to close.
-        i_keep = []
-        for t in selected_traj:
-            t2 = make_supercell(t, [[2, 0, 0], [0, 2, 0], [0, 0, 2]])
-
-            frame_is_reasonable = True
-            dist_dict = t2.get_all_distances(mic=True)
-            atype = t2.get_chemical_symbols()
-            for a in range(len(atype)):
-                for b in range(a + 1, len(atype)):
-                    dd = dist_dict[a][b]
-                    dr = (
-                        (safe_dist_dict[atype[a]] + safe_dist_dict[atype[b]])
-                        * 0.529
-                        / 1.2
-                    )
-                    if dd < dr:
-                        frame_is_reasonable = False
-
-            if frame_is_reasonable:
-                i_keep.append(selected_traj.index(t))
-        selected_traj = [selected_traj[iii] for iii in i_keep]
-    else:
-        selected_traj = None
+            selected_traj = None
 
     return selected_traj
 
 
+def _supercell(atoms):
+    from ase.build import (  # type: ignore
+        make_supercell,
+    )
+
+    return make_supercell(atoms, [[2, 0, 0], [0, 2, 0], [0, 0, 2]])
+
+
+def _is_frame_reasonable(atoms) -> bool:
+    r"""If no pair of atoms is closer than the sum of their safe distances."""
+    sc = _supercell(atoms)
+    row, col = np.triu_indices(len(sc), k=1)
+    dists = sc.get_all_distances(mic=True)[row, col]
+    atype = np.array(
+        [_safe_dist_index[ee] for ee in sc.get_chemical_symbols()], dtype=np.int64
+    )
+    return not bool(np.any(dists < _pair_thresholds[atype[row], atype[col]]))
+
+
 def write_model_devi_out(devi: np.ndarray, fname: Union[str, Path], header: str = ""):
     assert devi.shape[1] == 8
     header = "%s\n%10s" % (header, "step")
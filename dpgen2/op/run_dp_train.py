@@ -566,6 +566,11 @@ class RunDPTrain(OP):
             "A dict mapping from task name to list of indices in the init data"
         )
         doc_init_model_with_finetune = "Use finetune for init model"
+        doc_compress = "Compress the trained models by `dp compress` for the exploration. The original models are used by the training of the next iteration"
+        doc_compress_args = "Extra arguments for `dp compress`"
+        doc_compress_start_iter = (
+            "The models are compressed from this iteration on, if `compress` is set"
+        )
         return [
             Argument(
                 "impl",
@@ -660,6 +665,27 @@ class RunDPTrain(OP):
                 default=None,
                 doc=doc_multi_init_data_idx,
             ),
+            Argument(
+                "compress",
+                bool,
+                optional=True,
+                default=False,
+                doc=doc_compress,
+            ),
+            Argument(
+                "compress_args",
+                str,
+                optional=True,
+                default="",
+                doc=doc_compress_args,
+            ),
+            Argument(
+                "compress_start_iter",
+                int,
+                optional=True,
+                default=0,
+                doc=doc_compress_start_iter,
+            ),
         ]
 
     @staticmethod
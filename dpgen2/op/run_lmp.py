@@ -3,6 +3,9 @@ import logging
 import os
 import random
 import re
+import signal
+import subprocess
+import tempfile
 from pathlib import (
     Path,
 )
@@ -11,8 +14,10 @@ from typing import (
     Optional,
     Set,
     Tuple,
+    Union,
 )
 
+import numpy as np
 from dargs import (
     Argument,
     ArgumentEncoder,
@@ -30,6 +35,7 @@ from dflow.python import (
 )
 
 from dpgen2.constants import (
+    lmp_binary_traj_name,
     lmp_conf_name,
     lmp_input_name,
     lmp_log_name,
@@ -40,6 +46,21 @@ from dpgen2.constants import (
     plm_output_name,
     pytorch_model_name_pattern,
 )
+from dpgen2.exploration.render.binary_traj import (
+    BinaryTrajReader,
+    lammps_dump_to_binary_traj,
+)
+from dpgen2.exploration.render.lammps_dump_reader import (
+    index_lammps_dump,
+)
+from dpgen2.exploration.render.model_devi_loader import (
+    load_model_devi,
+    model_devi_cols,
+    write_model_devi_sidecar,
+)
+from dpgen2.op.freeze_models import (
+    freeze_pytorch_model,
+)
 from dpgen2.utils import (
     BinaryFileInput,
     set_directory,
@@ -78,6 +99,7 @@ class RunLmp(OP):
                 "log": Artifact(Path),
                 "traj": Artifact(Path),
                 "model_devi": Artifact(Path),
+                "model_devi_sidecar": Artifact(Path, optional=True),
                 "plm_output": Artifact(Path, optional=True),
             }
         )
@@ -97,15 +119,16 @@ class RunLmp(OP):
             - `config`: (`dict`) The config of lmp task. Check `RunLmp.lmp_args` for definitions.
             - `task_name`: (`str`) The name of the task.
             - `task_path`: (`Artifact(Path)`) The path that contains all input files prepareed by `PrepLmp`.
-            - `models`: (`Artifact(List[Path])`) The frozen model to estimate the model deviation. The first model with be used to drive molecular dynamics simulation.
+            - `models`: (`Artifact(List[Path])`) The frozen model to estimate the model deviation. The first model with be used to drive molecular dynamics simulation. The `.pth` models frozen by `FreezeModels` are linked, the `.pt` models are frozen in the task.
 
         Returns
         -------
         Any
             Output dict with components:
             - `log`: (`Artifact(Path)`) The log file of LAMMPS.
-            - `traj`: (`Artifact(Path)`) The output trajectory.
+            - `traj`: (`Artifact(Path)`) The output trajectory. It is the binary trajectory if `binary_traj` is set.
             - `model_devi`: (`Artifact(Path)`) The model deviation. The order of recorded model deviations should be consistent with the order of frames in `traj`.
+            - `model_devi_sidecar`: (`Artifact(Path)`) The binary sidecar of the model deviation, output if `model_devi_sidecar` is set.
 
         Raises
         ------
@@ -147,31 +170,19 @@ class RunLmp(OP):
                 if ext == ".pb":
                     mname = model_name_pattern % (idx)
                     Path(mname).symlink_to(mm)
+                elif ext == ".pth":
+                    # already frozen by FreezeModels
+                    mname = pytorch_model_name_pattern % (idx)
+                    Path(mname).symlink_to(mm)
                 elif ext == ".pt":
                     # freeze model
                     mname = pytorch_model_name_pattern % (idx)
-                    freeze_args = "-o %s" % mname
-                    if config.get("head") is not None:
-                        freeze_args += " --head %s" % config["head"]
-                    freeze_cmd = "dp --pt freeze -c %s %s" % (mm, freeze_args)
-                    ret, out, err = run_command(freeze_cmd, shell=True)
-                    if ret != 0:
-                        logging.error(
-                            "".join(
-                                (
-                                    "freeze failed\n",
-                                    "command was",
-                                    freeze_cmd,
-                                    "out msg",
-                                    out,
-                                    "\n",
-                                    "err msg",
-                                    err,
-                                    "\n",
-                                )
-                            )
-                        )
-                        raise TransientError("freeze failed")
+                    freeze_pytorch_model(
+                        mm,
+                        mname,
+                        head=config["head"],
+                        cache_dir=config["freeze_cache_dir"],
+                    )
                 else:
                     raise RuntimeError(
                         "Model file with extension '%s' is not supported" % ext
@@ -185,8 +196,28 @@ class RunLmp(OP):
 
             # run lmp
             command = " ".join([command, "-i", lmp_input_name, "-log", lmp_log_name])
-            ret, out, err = run_command(command, shell=True)
-            if ret != 0:
+            early_stop = config["early_stop"]
+            stopped = False
+            if early_stop is not None:
+                watcher = ModelDeviWatcher(
+                    lmp_model_devi_name,
+                    early_stop["level_f_hi"],
+                    numb_fail=early_stop["numb_fail"],
+                    rate_fail=early_stop["rate_fail"],
+                    min_frames=early_stop["min_frames"],
+                )
+                ret, out, err, stopped = run_lmp_with_watcher(
+                    command, watcher, early_stop["interval"]
+                )
+            else:
+                ret, out, err = run_command(command, shell=True)
+            if stopped:
+                logging.info(
+                    "lmp stopped early with %d failed frames out of %d"
+                    % (watcher.nfail, watcher.nframes)
+                )
+                truncate_lmp_outputs(lmp_traj_name, lmp_model_devi_name)
+            elif ret != 0:
                 logging.error(
                     "".join(
                         (
@@ -204,11 +235,41 @@ class RunLmp(OP):
                 )
                 raise TransientError("lmp failed")
 
+            traj_file = Path(lmp_traj_name)
+            prune_traj = config["prune_traj"]
+            binary_traj = config["binary_traj"]
+            if traj_file.is_file() and prune_traj is not None:
+                prune_lmp_traj(
+                    traj_file,
+                    lmp_model_devi_name,
+                    lmp_binary_traj_name,
+                    **prune_traj,
+                    **(binary_traj if binary_traj is not None else {}),
+                )
+                traj_file.unlink()
+                traj_file = Path(lmp_binary_traj_name)
+            elif traj_file.is_file() and binary_traj is not None:
+                lammps_dump_to_binary_traj(
+                    traj_file, lmp_binary_traj_name, **binary_traj
+                )
+                traj_file.unlink()
+                traj_file = Path(lmp_binary_traj_name)
+
+            model_devi_sidecar = (
+                {
+                    "model_devi_sidecar": work_dir
+                    / write_model_devi_sidecar(lmp_model_devi_name)
+                }
+                if config["model_devi_sidecar"]
+                else {}
+            )
+
         ret_dict = {
             "log": work_dir / lmp_log_name,
-            "traj": work_dir / lmp_traj_name,
+            "traj": work_dir / traj_file,
             "model_devi": work_dir / lmp_model_devi_name,
         }
+        ret_dict.update(model_devi_sidecar)
         plm_output = (
             {"plm_output": work_dir / plm_output_name}
             if (work_dir / plm_output_name).is_file()
@@ -224,6 +285,38 @@ class RunLmp(OP):
         doc_teacher_model = "The teacher model in `Knowledge Distillation`"
         doc_shuffle_models = "Randomly pick a model from the group of models to drive theexploration MD simulation"
         doc_head = "Select a head from multitask"
+        doc_freeze_cache_dir = (
+            "The directory caching the frozen PyTorch models by the hash of "
+            "the model content and the head. A model frozen before is not "
+            "frozen again. It should be accessible by the freeze and the "
+            "LAMMPS steps, e.g. on a shared file system."
+        )
+        doc_early_stop = (
+            "Stop LAMMPS early when the model deviation blows up. The model "
+            "deviation file is watched while LAMMPS runs, the run is terminated "
+            "once too many frames are failed, and the trajectory and the model "
+            "deviation are truncated to the frames written by both."
+        )
+        doc_prune_traj = (
+            "Prune the trajectory against the trust window before it is "
+            "output. Only the frames that may be selected as candidates are "
+            "kept. The pruned trajectory is output in the binary format "
+            "(compressed as set by `binary_traj`), in which the pruned frames "
+            "only keep their time steps, so the frame indexes are unchanged. "
+            "The model deviation file is kept complete. The window should "
+            "enclose the trust levels of the conf selector, which is checked "
+            "when the workflow is submitted."
+        )
+        doc_binary_traj = (
+            "Convert the trajectory to the compact binary format and output "
+            "it instead of the LAMMPS dump."
+        )
+        doc_model_devi_sidecar = (
+            "Write the model deviation also in a binary sidecar (float64 .npy) "
+            "and output it alongside the text file. The sidecar is "
+            "less than half the size and is memory-mapped when selecting "
+            "configurations."
+        )
         return [
             Argument("command", str, optional=True, default="lmp", doc=doc_lmp_cmd),
             Argument(
@@ -241,6 +334,44 @@ class RunLmp(OP):
                 doc=doc_shuffle_models,
             ),
             Argument("head", str, optional=True, default=None, doc=doc_head),
+            Argument(
+                "freeze_cache_dir",
+                str,
+                optional=True,
+                default=None,
+                doc=doc_freeze_cache_dir,
+            ),
+            Argument(
+                "early_stop",
+                dict,
+                early_stop_args(),
+                optional=True,
+                default=None,
+                doc=doc_early_stop,
+            ),
+            Argument(
+                "prune_traj",
+                dict,
+                prune_traj_args(),
+                optional=True,
+                default=None,
+                doc=doc_prune_traj,
+            ),
+            Argument(
+                "binary_traj",
+                dict,
+                binary_traj_args(),
+                optional=True,
+                default=None,
+                doc=doc_binary_traj,
+            ),
+            Argument(
+                "model_devi_sidecar",
+                bool,
+                optional=True,
+                default=False,
+                doc=doc_model_devi_sidecar,
+            ),
         ]
 
     @staticmethod
@@ -252,9 +383,253 @@ class RunLmp(OP):
         return data
 
 
+def early_stop_args():
+    doc_level_f_hi = "A frame is failed if its max force model deviation is larger than `level_f_hi`. Usually the same as the `level_f_hi` of the conf selector."
+    doc_numb_fail = "Stop once the number of failed frames reaches `numb_fail`."
+    doc_rate_fail = "Stop once the ratio of failed frames is larger than `rate_fail`."
+    doc_min_frames = "The ratio of failed frames is checked only after `min_frames` frames are written."
+    doc_interval = "The interval (in seconds) of checking the model deviation file."
+    return [
+        Argument("level_f_hi", float, optional=False, doc=doc_level_f_hi),
+        Argument("numb_fail", int, optional=True, default=None, doc=doc_numb_fail),
+        Argument("rate_fail", float, optional=True, default=None, doc=doc_rate_fail),
+        Argument("min_frames", int, optional=True, default=100, doc=doc_min_frames),
+        Argument("interval", float, optional=True, default=10.0, doc=doc_interval),
+    ]
+
+
+def prune_traj_args():
+    doc_level_f_lo = "The lower trust level of the force model deviation."
+    doc_level_f_hi = "The higher trust level of the force model deviation."
+    doc_level_v_lo = "The lower trust level of the virial model deviation. Virial is not considered if not set."
+    doc_level_v_hi = "The higher trust level of the virial model deviation. Virial is not considered if not set."
+    return [
+        Argument("level_f_lo", float, optional=True, default=0.0, doc=doc_level_f_lo),
+        Argument("level_f_hi", float, optional=False, doc=doc_level_f_hi),
+        Argument("level_v_lo", float, optional=True, default=None, doc=doc_level_v_lo),
+        Argument("level_v_hi", float, optional=True, default=None, doc=doc_level_v_hi),
+    ]
+
+
+def binary_traj_args():
+    doc_compression = "Compress the frames. None or 'zstd', the latter requires the `zstandard` package."
+    return [
+        Argument(
+            "compression", [str, None], optional=True, default=None, doc=doc_compression
+        ),
+    ]
+
+
 config_args = RunLmp.lmp_args
 
 
+class ModelDeviWatcher:
+    r"""Count the failed frames in a model deviation file being written.
+
+    Each call of `update` reads the lines appended since the last call.
+    An incomplete last line is kept until it is completed.
+
+    Parameters
+    ----------
+    fname : str or Path
+        The model deviation file.
+    level_f_hi : float
+        A frame is failed if its max force model deviation is larger.
+    numb_fail : int, optional
+        Stop once the number of failed frames reaches `numb_fail`.
+    rate_fail : float, optional
+        Stop once the ratio of failed frames is larger than `rate_fail`.
+    min_frames : int
+        The ratio of failed frames is checked only after `min_frames`
+        frames.
+    """
+
+    def __init__(
+        self,
+        fname: Union[str, Path],
+        level_f_hi: float,
+        numb_fail: Optional[int] = None,
+        rate_fail: Optional[float] = None,
+        min_frames: int = 100,
+    ):
+        self.fname = Path(fname)
+        self.level_f_hi = level_f_hi
+        self.numb_fail = numb_fail
+        self.rate_fail = rate_fail
+        self.min_frames = min_frames
+        self.nframes = 0
+        self.nfail = 0
+        self._pos = 0
+        self._rest = b""
+
+    def update(self) -> bool:
+        r"""Read the new lines and check if the run should be stopped."""
+        if not self.fname.is_file():
+            return False
+        with open(self.fname, "rb") as fp:
+            fp.seek(self._pos)
+            buff = fp.read()
+        self._pos += len(buff)
+        lines = (self._rest + buff).split(b"\n")
+        self._rest = lines[-1]
+        for line in lines[:-1]:
+            words = line.split()
+            if len(words) <= 4 or words[0].startswith(b"#"):
+                continue
+            self.nframes += 1
+            if float(words[4]) > self.level_f_hi:
+                self.nfail += 1
+        return self.should_stop()
+
+    def should_stop(self) -> bool:
+        if self.numb_fail is not None and self.nfail >= self.numb_fail:
+            return True
+        if (
+            self.rate_fail is not None
+            and self.nframes >= self.min_frames
+            and self.nfail > self.rate_fail * self.nframes
+        ):
+            return True
+        return False
+
+
+def run_lmp_with_watcher(
+    command: str,
+    watcher: ModelDeviWatcher,
+    interval: float = 10.0,
+) -> Tuple[int, str, str, bool]:
+    r"""Run LAMMPS and terminate it once the watcher asks to stop.
+
+    Returns the return code, the stdout, the stderr and whether the run
+    is stopped by the watcher.
+    """
+    with tempfile.TemporaryFile() as fout, tempfile.TemporaryFile() as ferr:
+        # in a new session, so the shell and LAMMPS are terminated together
+        proc = subprocess.Popen(
+            command, shell=True, stdout=fout, stderr=ferr, start_new_session=True
+        )
+        stopped = False
+        while True:
+            try:
+                ret = proc.wait(timeout=interval)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+            if watcher.update():
+                os.killpg(proc.pid, signal.SIGTERM)
+                ret = proc.wait()
+                stopped = True
+                break
+        fout.seek(0)
+        ferr.seek(0)
+        out = fout.read().decode(errors="replace")
+        err = ferr.read().decode(errors="replace")
+    return ret, out, err, stopped
+
+
+def truncate_lmp_outputs(
+    traj: Union[str, Path],
+    model_devi: Union[str, Path],
+) -> int:
+    r"""Truncate the trajectory and the model deviation of a terminated
+    LAMMPS run to the frames completely written in both files.
+
+    The frames are matched by the time steps, the incomplete last frame
+    of the trajectory and the incomplete last line of the model deviation
+    are dropped. Returns the last kept time step, -1 if nothing is kept.
+    """
+    traj = Path(traj)
+    model_devi = Path(model_devi)
+    md_text = model_devi.read_bytes() if model_devi.is_file() else b""
+    md_lines = md_text.split(b"\n")[:-1]
+    md_steps = []
+    for ii, line in enumerate(md_lines):
+        words = line.split()
+        if len(words) > 4 and not words[0].startswith(b"#"):
+            md_steps.append((int(words[0]), ii))
+    last_step = md_steps[-1][0] if len(md_steps) > 0 else -1
+
+    traj_steps = []
+    if traj.is_file():
+        offsets = index_lammps_dump(traj)
+        with open(traj, "r+b") as fp:
+            for ii in range(len(offsets) - 1):
+                fp.seek(offsets[ii])
+                frame = fp.read(offsets[ii + 1] - offsets[ii])
+                if ii == len(offsets) - 2 and not _is_complete_dump_frame(frame):
+                    break
+                traj_steps.append(int(frame.split(b"\n")[1]))
+            last_traj_step = traj_steps[-1] if len(traj_steps) > 0 else -1
+            last_step = min(last_step, last_traj_step)
+            nkeep = sum(1 for ss in traj_steps if ss <= last_step)
+            fp.truncate(offsets[nkeep])
+
+    # keep the header
+    nlines = md_steps[0][1] if len(md_steps) > 0 else len(md_lines)
+    for step, ii in md_steps:
+        if step > last_step:
+            break
+        nlines = ii + 1
+    model_devi.write_bytes(b"".join(ll + b"\n" for ll in md_lines[:nlines]))
+    return last_step
+
+
+def prune_lmp_traj(
+    traj: Union[str, Path],
+    model_devi: Union[str, Path],
+    fname: Union[str, Path],
+    level_f_hi: float,
+    level_f_lo: float = 0.0,
+    level_v_hi: Optional[float] = None,
+    level_v_lo: Optional[float] = None,
+    compression: Optional[str] = None,
+) -> int:
+    r"""Prune the trajectory against the trust window.
+
+    A frame is kept if it is neither failed nor accurate by the trust
+    levels, i.e. it may be selected as a candidate. The frames exactly
+    on a trust level are kept, since the reports differ in whether they
+    are candidates, e.g. `ExplorationReportAdaptiveLower` selects the
+    frames on the higher trust level. The frames are
+    matched with the model deviations by the time steps, the frames
+    without model deviation are kept. The trajectory is written to the
+    binary trajectory `fname`, in which a pruned frame only keeps its
+    time step, so the indexes of the frames are unchanged.
+
+    Returns the number of kept frames.
+    """
+    md = load_model_devi(model_devi, usecols=(0,) + model_devi_cols)
+    steps = md[:, 0].astype(np.int64)
+    md_v, md_f = md[:, 1], md[:, 4]
+    failed = md_f > level_f_hi
+    accurate = md_f < level_f_lo
+    if level_v_hi is not None:
+        failed |= md_v > level_v_hi
+    if level_v_lo is not None:
+        accurate &= md_v < level_v_lo
+    pruned_steps = set(steps[failed | accurate].tolist())
+    lammps_dump_to_binary_traj(
+        traj, fname, compression=compression, pruned_steps=pruned_steps
+    )
+    reader = BinaryTrajReader(fname)
+    return int(np.count_nonzero(np.diff(reader.offsets)))
+
+
+def _is_complete_dump_frame(frame: bytes) -> bool:
+    if not frame.endswith(b"\n"):
+        return False
+    lines = frame.split(b"\n")[:-1]
+    heads = [ii for ii, ll in enumerate(lines) if ll.strip().startswith(b"ITEM:")]
+    # TIMESTEP, NUMBER OF ATOMS, BOX BOUNDS and ATOMS
+    if len(heads) < 4:
+        return False
+    try:
+        natoms = int(lines[heads[1] + 1])
+    except ValueError:
+        return False
+    return len(lines) - heads[3] - 1 >= natoms
+
+
 def set_models(lmp_input_name: str, model_names: List[str]):
     with open(lmp_input_name, encoding="utf8") as f:
         lmp_input_lines = f.readlines()
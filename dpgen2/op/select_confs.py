@@ -37,6 +37,7 @@ class SelectConfs(OP):
                 "type_map": List[str],
                 "trajs": Artifact(List[Path]),
                 "model_devis": Artifact(List[Path]),
+                "model_devi_sidecars": Artifact(List[Path], optional=True),
             }
         )
 
@@ -65,6 +66,7 @@ class SelectConfs(OP):
             - `type_map`: (`List[str]`) The type map.
             - `trajs`: (`Artifact(List[Path])`) The trajectories generated in the exploration.
             - `model_devis`: (`Artifact(List[Path])`) The file storing the model deviation of the trajectory. The order of model deviation storage is consistent with that of the trajectories. The order of frames of one model deviation storage is also consistent with tat of the corresponding trajectory.
+            - `model_devi_sidecars`: (`Artifact(List[Path])`) Optional. The binary sidecars of the model deviations, in the same order as `model_devis`. If given, they are read instead of `model_devis`.
 
         Returns
         -------
@@ -80,6 +82,16 @@ class SelectConfs(OP):
 
         trajs = ip["trajs"]
         model_devis = ip["model_devis"]
+        model_devi_sidecars = ip["model_devi_sidecars"]
+        if model_devi_sidecars is not None and any(
+            [ss is not None for ss in model_devi_sidecars]
+        ):
+            if len(model_devi_sidecars) != len(model_devis):
+                raise FatalError(
+                    "length of model_devi_sidecars list is not equal to the "
+                    "model_devis list"
+                )
+            model_devis = model_devi_sidecars
         trajs, model_devis = SelectConfs.validate_trajs(trajs, model_devis)
 
         confs, report = conf_selector.select(
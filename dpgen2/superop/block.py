@@ -240,7 +240,7 @@ def _block_cl(
             "type_map": block_steps.inputs.parameters["type_map"],
         },
         artifacts={
-            "models": prep_run_dp_train.outputs.artifacts["models"],
+            "models": prep_run_dp_train.outputs.artifacts["explore_models"],
         },
         key="--".join(
             ["%s" % block_steps.inputs.parameters["block_id"], "prep-run-explore"]
@@ -263,6 +263,9 @@ def _block_cl(
         artifacts={
             "trajs": prep_run_explore.outputs.artifacts["trajs"],
             "model_devis": prep_run_explore.outputs.artifacts["model_devis"],
+            "model_devi_sidecars": prep_run_explore.outputs.artifacts[
+                "model_devi_sidecars"
+            ],
         },
         key=step_keys["select-confs"],
         executor=select_confs_executor,
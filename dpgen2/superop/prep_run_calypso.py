@@ -77,6 +77,7 @@ class PrepRunCaly(Steps):
         self._output_artifacts = {
             "trajs": OutputArtifact(),
             "model_devis": OutputArtifact(),
+            "model_devi_sidecars": OutputArtifact(),
         }
 
         super().__init__(
@@ -272,7 +273,7 @@ def _prep_run_caly(
             slices=Slices(
                 input_parameter=["task_name"],
                 input_artifact=["traj_dirs"],
-                output_artifact=["traj", "model_devi"],
+                output_artifact=["traj", "model_devi", "model_devi_sidecar"],
             ),
             python_packages=upload_python_packages,
             **run_template_config,
@@ -280,6 +281,7 @@ def _prep_run_caly(
         parameters={
             "type_map": prep_run_caly_steps.inputs.parameters["type_map"],
             "task_name": prep_caly_model_devi.outputs.parameters["task_name_list"],
+            "config": prep_run_caly_steps.inputs.parameters["explore_config"],
         },
         artifacts={
             "traj_dirs": prep_caly_model_devi.outputs.artifacts["grouped_traj_list"],
@@ -298,5 +300,8 @@ def _prep_run_caly(
     prep_run_caly_steps.outputs.artifacts[
         "model_devis"
     ]._from = run_caly_model_devi.outputs.artifacts["model_devi"]
+    prep_run_caly_steps.outputs.artifacts[
+        "model_devi_sidecars"
+    ]._from = run_caly_model_devi.outputs.artifacts["model_devi_sidecar"]
 
     return prep_run_caly_steps
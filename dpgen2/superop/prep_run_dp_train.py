@@ -135,6 +135,7 @@ class PrepRunDPTrain(Steps):
         upload_python_packages: Optional[List[os.PathLike]] = None,
         finetune: bool = False,
         valid_data: Optional[S3Artifact] = None,
+        compress_op: Optional[Type[OP]] = None,
     ):
         self._input_parameters = {
             "block_id": InputParameter(type=str, value=""),
@@ -156,6 +157,7 @@ class PrepRunDPTrain(Steps):
         self._output_artifacts = {
             "scripts": OutputArtifact(),
             "models": OutputArtifact(),
+            "explore_models": OutputArtifact(),
             "logs": OutputArtifact(),
             "lcurves": OutputArtifact(),
         }
@@ -175,6 +177,8 @@ class PrepRunDPTrain(Steps):
         self._keys = ["prep-train", "run-train"]
         if finetune:
             self._keys.append("modify-train-script")
+        if compress_op is not None:
+            self._keys.append("compress-models")
         self.step_keys = {}
         ii = "prep-train"
         self.step_keys[ii] = "--".join(["%s" % self.inputs.parameters["block_id"], ii])
@@ -184,6 +188,8 @@ class PrepRunDPTrain(Steps):
         )
         ii = "modify-train-script"
         self.step_keys[ii] = "--".join(["%s" % self.inputs.parameters["block_id"], ii])
+        ii = "compress-models"
+        self.step_keys[ii] = "--".join(["%s" % self.inputs.parameters["block_id"], ii])
 
         self = _prep_run_dp_train(
             self,
@@ -196,6 +202,7 @@ class PrepRunDPTrain(Steps):
             upload_python_packages=upload_python_packages,
             finetune=finetune,
             valid_data=valid_data,
+            compress_op=compress_op,
         )
 
     @property
@@ -230,6 +237,7 @@ def _prep_run_dp_train(
     upload_python_packages: Optional[List[os.PathLike]] = None,
     finetune: bool = False,
     valid_data: Optional[S3Artifact] = None,
+    compress_op: Optional[Type[OP]] = None,
 ):
     prep_config = deepcopy(prep_config)
     run_config = deepcopy(run_config)
@@ -325,6 +333,36 @@ def _prep_run_dp_train(
         train_steps.outputs.parameters[
             "template_script"
         ].value_from_parameter = train_steps.inputs.parameters["template_script"]
+
+    if compress_op is not None:
+        # compressed models for the exploration, run once for all models.
+        # the models are passed through before `compress_start_iter`
+        compress_models = Step(
+            "compress-models",
+            template=PythonOPTemplate(
+                compress_op,
+                python_packages=upload_python_packages,
+                **run_template_config,
+            ),
+            parameters={
+                "config": train_steps.inputs.parameters["train_config"],
+                "block_id": train_steps.inputs.parameters["block_id"],
+            },
+            artifacts={
+                "models": run_train.outputs.artifacts["model"],
+            },
+            key=step_keys["compress-models"],
+            executor=run_executor,
+            **run_config,
+        )
+        train_steps.add(compress_models)
+        train_steps.outputs.artifacts[
+            "explore_models"
+        ]._from = compress_models.outputs.artifacts["models"]
+    else:
+        train_steps.outputs.artifacts[
+            "explore_models"
+        ]._from = run_train.outputs.artifacts["model"]
     train_steps.outputs.artifacts["scripts"]._from = run_train.outputs.artifacts[
         "script"
     ]
@@ -55,6 +55,7 @@ class PrepRunLmp(Steps):
         prep_config: dict = normalize_step_dict({}),
         run_config: dict = normalize_step_dict({}),
         upload_python_packages: Optional[List[os.PathLike]] = None,
+        freeze_op: Optional[Type[OP]] = None,
     ):
         self._input_parameters = {
             "block_id": InputParameter(type=str, value=""),
@@ -72,6 +73,7 @@ class PrepRunLmp(Steps):
             "logs": OutputArtifact(),
             "trajs": OutputArtifact(),
             "model_devis": OutputArtifact(),
+            "model_devi_sidecars": OutputArtifact(),
             "plm_output": OutputArtifact(),
         }
 
@@ -87,8 +89,13 @@ class PrepRunLmp(Steps):
             ),
         )
 
-        self._keys = ["prep-lmp", "run-lmp"]
+        if freeze_op is not None:
+            self._keys = ["prep-lmp", "freeze-models", "run-lmp"]
+        else:
+            self._keys = ["prep-lmp", "run-lmp"]
         self.step_keys = {}
+        ii = "freeze-models"
+        self.step_keys[ii] = "--".join(["%s" % self.inputs.parameters["block_id"], ii])
         ii = "prep-lmp"
         self.step_keys[ii] = "--".join(["%s" % self.inputs.parameters["block_id"], ii])
         ii = "run-lmp"
@@ -104,6 +111,7 @@ class PrepRunLmp(Steps):
             prep_config=prep_config,
             run_config=run_config,
             upload_python_packages=upload_python_packages,
+            freeze_op=freeze_op,
         )
 
     @property
@@ -135,6 +143,7 @@ def _prep_run_lmp(
     prep_config: dict = normalize_step_dict({}),
     run_config: dict = normalize_step_dict({}),
     upload_python_packages: Optional[List[os.PathLike]] = None,
+    freeze_op: Optional[Type[OP]] = None,
 ):
     prep_config = deepcopy(prep_config)
     run_config = deepcopy(run_config)
@@ -162,6 +171,30 @@ def _prep_run_lmp(
     )
     prep_run_steps.add(prep_lmp)
 
+    if freeze_op is not None:
+        # freeze the models once, rather than in every lmp task
+        freeze_models = Step(
+            "freeze-models",
+            template=PythonOPTemplate(
+                freeze_op,
+                python_packages=upload_python_packages,
+                **run_template_config,
+            ),
+            parameters={
+                "config": prep_run_steps.inputs.parameters["explore_config"],
+            },
+            artifacts={
+                "models": prep_run_steps.inputs.artifacts["models"],
+            },
+            key=step_keys["freeze-models"],
+            executor=run_executor,
+            **run_config,
+        )
+        prep_run_steps.add(freeze_models)
+        models = freeze_models.outputs.artifacts["models"]
+    else:
+        models = prep_run_steps.inputs.artifacts["models"]
+
     run_lmp = Step(
         "run-lmp",
         template=PythonOPTemplate(
@@ -170,7 +203,13 @@ def _prep_run_lmp(
                 "int('{{item}}')",
                 input_parameter=["task_name"],
                 input_artifact=["task_path"],
-                output_artifact=["log", "traj", "model_devi", "plm_output"],
+                output_artifact=[
+                    "log",
+                    "traj",
+                    "model_devi",
+                    "model_devi_sidecar",
+                    "plm_output",
+                ],
                 **template_slice_config,
             ),
             python_packages=upload_python_packages,
@@ -182,7 +221,7 @@ def _prep_run_lmp(
         },
         artifacts={
             "task_path": prep_lmp.outputs.artifacts["task_paths"],
-            "models": prep_run_steps.inputs.artifacts["models"],
+            "models": models,
         },
         with_sequence=argo_sequence(
             argo_len(prep_lmp.outputs.parameters["task_names"]),
@@ -202,6 +241,9 @@ def _prep_run_lmp(
     prep_run_steps.outputs.artifacts["model_devis"]._from = run_lmp.outputs.artifacts[
         "model_devi"
     ]
+    prep_run_steps.outputs.artifacts[
+        "model_devi_sidecars"
+    ]._from = run_lmp.outputs.artifacts["model_devi_sidecar"]
     prep_run_steps.outputs.artifacts["plm_output"]._from = run_lmp.outputs.artifacts[
         "plm_output"
     ]
@@ -17,9 +17,11 @@ from .context import (
     dpgen2,
 )
 from dpgen2.entrypoint.submit import (
+    check_prune_traj,
     copy_scheduler_plans,
     expand_idx,
     fold_keys,
+    make_concurrent_learning_op,
     print_list_steps,
     submit_concurrent_learning,
     update_reuse_step_scheduler,
@@ -29,6 +31,7 @@ from dpgen2.exploration.render import (
 )
 from dpgen2.exploration.report import (
     ExplorationReport,
+    ExplorationReportAdaptiveLower,
     ExplorationReportTrustLevelsRandom,
 )
 from dpgen2.exploration.scheduler import (
@@ -118,6 +121,32 @@ class TestSubmit(unittest.TestCase):
         expected_ostr = "       0    foo\n       1    bar"
         self.assertEqual(ostr, expected_ostr)
 
+    def test_check_prune_traj(self):
+        def window(level_f_lo, level_f_hi, level_v_lo=None, level_v_hi=None):
+            return {
+                "level_f_lo": level_f_lo,
+                "level_f_hi": level_f_hi,
+                "level_v_lo": level_v_lo,
+                "level_v_hi": level_v_hi,
+            }
+
+        report = ExplorationReportTrustLevelsRandom(0.1, 0.3)
+        check_prune_traj(None, report)
+        check_prune_traj(window(0.1, 0.3), report)
+        check_prune_traj(window(0.05, 0.4, 0.1), report)
+        for ww in [window(0.2, 0.3), window(0.1, 0.2), window(0.1, 0.3, None, 0.5)]:
+            self.assertRaises(RuntimeError, check_prune_traj, ww, report)
+        report = ExplorationReportTrustLevelsRandom(0.1, 0.3, 0.2, 0.4)
+        check_prune_traj(window(0.1, 0.3, 0.2, 0.4), report)
+        check_prune_traj(window(0.0, 0.3), report)
+        for ww in [window(0.1, 0.3), window(0.1, 0.3, 0.3), window(0, 0.3, None, 0.3)]:
+            self.assertRaises(RuntimeError, check_prune_traj, ww, report)
+        # the lower trust level is adapted
+        report = ExplorationReportAdaptiveLower(level_f_hi=0.3)
+        check_prune_traj(window(0.0, 0.3), report)
+        for ww in [window(0.05, 0.3), window(0.0, 0.3, None, 0.5)]:
+            self.assertRaises(RuntimeError, check_prune_traj, ww, report)
+
     def test_update_reuse_step_scheduler(self):
         reuse_steps = [
             MockedStep(MockedScheduler(0)),
@@ -333,6 +362,29 @@ class TestSubmit(unittest.TestCase):
         )
 
 
+class TestMakeConcurrentLearningOp(unittest.TestCase):
+    def setUp(self):
+        from dflow.config import (
+            config,
+        )
+
+        config["mode"] = "debug"
+
+    def tearDown(self):
+        from dflow.config import (
+            config,
+        )
+
+        config["mode"] = None
+
+    def test_freeze_models(self):
+        # the freeze step is only added for the models trained by pytorch
+        op = make_concurrent_learning_op("dp", "lmp", "vasp")
+        self.assertNotIn("freeze-models", op.loop_keys)
+        op = make_concurrent_learning_op("dp", "lmp", "vasp", freeze_models=True)
+        self.assertIn("freeze-models", op.loop_keys)
+
+
 class TestSubmitCmdStd(unittest.TestCase):
     def setUp(self):
         from dflow.config import (
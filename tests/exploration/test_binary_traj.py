@@ -0,0 +1,117 @@
+import importlib.util
+import shutil
+import unittest
+from pathlib import (
+    Path,
+)
+
+import dpdata
+import numpy as np
+
+# isort: off
+from .context import (
+    dpgen2,
+)
+from dpgen2.exploration.render import (
+    TrajRenderLammps,
+)
+from dpgen2.exploration.render.binary_traj import (
+    BinaryTrajReader,
+    is_binary_traj,
+    lammps_dump_to_binary_traj,
+)
+from dpgen2.exploration.render.lammps_dump_reader import (
+    LammpsDumpReader,
+)
+from .test_lammps_dump_reader import (
+    make_dump,
+)
+
+# isort: on
+
+
+class TestBinaryTraj(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = Path("test_binary_traj")
+        self.work_dir.mkdir(exist_ok=True)
+        self.dump = self.work_dir / "traj.dump"
+        make_dump(self.dump, 7, natoms=5)
+        self.type_maps = [None, ["O", "H"], ["H", "O", "C"]]
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def check_systems(self, dump, fname, idx_list):
+        ref_reader = LammpsDumpReader(dump)
+        reader = BinaryTrajReader(fname)
+        for type_map in self.type_maps:
+            for idx in idx_list:
+                expected = ref_reader.get_system(idx, type_map=type_map)
+                ss = reader.get_system(idx, type_map=type_map)
+                self.assertEqual(ss["atom_names"], expected["atom_names"])
+                self.assertEqual(list(ss["atom_numbs"]), list(expected["atom_numbs"]))
+                np.testing.assert_array_equal(ss["atom_types"], expected["atom_types"])
+                np.testing.assert_array_equal(ss["cells"], expected["cells"])
+                np.testing.assert_allclose(
+                    ss["coords"], expected["coords"], rtol=1e-6, atol=1e-6
+                )
+
+    def test_convert(self):
+        fname = self.work_dir / "traj.bin"
+        lammps_dump_to_binary_traj(self.dump, fname)
+        self.assertTrue(is_binary_traj(fname))
+        self.assertFalse(is_binary_traj(self.dump))
+        reader = BinaryTrajReader(fname)
+        self.assertEqual(reader.nframes, 7)
+        np.testing.assert_array_equal(reader.timesteps, np.arange(7) * 10)
+        self.check_systems(self.dump, fname, [[0], [6, 2, 3], [1, 1]])
+        self.assertRaises(IndexError, reader.read_coords, [7])
+        self.assertLess(fname.stat().st_size, self.dump.stat().st_size)
+
+    def test_pruned(self):
+        fname = self.work_dir / "traj.bin"
+        # frames 1 and 4 are pruned
+        lammps_dump_to_binary_traj(self.dump, fname, pruned_steps={10, 40})
+        reader = BinaryTrajReader(fname)
+        self.assertEqual(reader.nframes, 7)
+        np.testing.assert_array_equal(reader.timesteps, np.arange(7) * 10)
+        self.check_systems(self.dump, fname, [[0, 2, 3, 5, 6], [6]])
+        self.assertRaises(RuntimeError, reader.read_coords, [4])
+
+    def test_many_types(self):
+        # more than 10 types, the atom names of dpdata are sorted
+        # as strings without type map
+        lines = []
+        for ii in range(2):
+            lines += ["ITEM: TIMESTEP", str(ii), "ITEM: NUMBER OF ATOMS", "12"]
+            lines += ["ITEM: BOX BOUNDS pp pp pp"] + ["0.0 10.0"] * 3
+            lines += ["ITEM: ATOMS id type x y z"]
+            lines += [f"{jj+1} {12-jj} {jj*0.5} {ii} 1.0" for jj in range(12)]
+        dump = self.work_dir / "types.dump"
+        dump.write_text("\n".join(lines) + "\n")
+        fname = self.work_dir / "types.bin"
+        lammps_dump_to_binary_traj(dump, fname)
+        self.type_maps = [[f"E{ii}" for ii in range(13)]]
+        self.check_systems(dump, fname, [[0, 1]])
+
+    @unittest.skipIf(
+        importlib.util.find_spec("zstandard") is None, "zstandard is not installed"
+    )
+    def test_zstd(self):
+        fname = self.work_dir / "traj.bin"
+        lammps_dump_to_binary_traj(self.dump, fname, compression="zstd")
+        self.assertEqual(BinaryTrajReader(fname).compression, "zstd")
+        self.check_systems(self.dump, fname, [[0], [6, 2, 3]])
+
+    def test_render(self):
+        fname = self.work_dir / "traj.bin"
+        lammps_dump_to_binary_traj(self.dump, fname)
+        render = TrajRenderLammps()
+        ms = render.get_confs([fname], [[1, 5]], type_map=["O", "H"])
+        ref = render.get_confs([self.dump], [[1, 5]], type_map=["O", "H"])
+        self.assertEqual(ms.get_nframes(), 2)
+        self.assertEqual(list(ms.systems.keys()), list(ref.systems.keys()))
+        for kk in ref.systems.keys():
+            np.testing.assert_allclose(
+                ms[kk]["coords"], ref[kk]["coords"], rtol=1e-6, atol=1e-6
+            )
@@ -0,0 +1,158 @@
+import os
+import shutil
+import subprocess
+import sys
+import textwrap
+import unittest
+from pathlib import (
+    Path,
+)
+
+import numpy as np
+
+# isort: off
+from .context import (
+    dpgen2,
+)
+from dpgen2.exploration.task.calypso import (
+    make_calypso_input,
+)
+
+# isort: on
+
+try:
+    import ase
+    import ase.io
+except ImportError:
+    ase = None
+
+# a stand-in of deepmd.calculator.DP with a restoring potential, the
+# number of frames of each model call is logged to `eval.log`
+mocked_deepmd_calculator = textwrap.dedent(
+    """
+    import numpy as np
+    from ase.calculators.calculator import (
+        Calculator,
+        all_changes,
+    )
+
+    class DeepPot:
+        def eval(self, coords, cells, atom_types):
+            nframes = coords.shape[0]
+            with open("eval.log", "a") as fp:
+                fp.write("%d\\n" % nframes)
+            coords = coords.reshape(nframes, -1, 3)
+            cells = cells.reshape(nframes, 9)
+            cell0 = (4.0 * np.eye(3)).reshape(9)
+            dr = coords - 1.0 - 0.1 * np.array(atom_types)[None, :, None]
+            e = 0.5 * np.sum(dr * dr, axis=(1, 2)).reshape(nframes, 1)
+            f = -dr
+            v = -(cells - cell0)
+            return e, f, v
+
+    class DP(Calculator):
+        implemented_properties = ["energy", "free_energy", "forces", "virial", "stress"]
+
+        def __init__(self, model):
+            Calculator.__init__(self)
+            self.dp = DeepPot()
+            self.type_dict = {"Mg": 0, "Al": 1}
+
+        def calculate(self, atoms=None, properties=None, system_changes=all_changes):
+            if atoms is not None:
+                self.atoms = atoms.copy()
+            coord = self.atoms.get_positions().reshape([1, -1])
+            cell = self.atoms.get_cell().reshape([1, -1])
+            atype = [self.type_dict[k] for k in self.atoms.get_chemical_symbols()]
+            e, f, v = self.dp.eval(coords=coord, cells=cell, atom_types=atype)
+            virial = np.reshape(v, (3, 3))
+            self.results["energy"] = np.reshape(e, [-1])[0]
+            self.results["free_energy"] = self.results["energy"]
+            self.results["forces"] = np.reshape(f, (-1, 3))
+            self.results["virial"] = virial
+            stress = -0.5 * (virial + virial.T) / self.atoms.get_volume()
+            self.results["stress"] = stress.flat[[0, 4, 8, 5, 2, 1]]
+    """
+)
+
+
+@unittest.skipIf(ase is None, "ase is not installed")
+class TestCalyRunOpt(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = Path("caly_run_opt_test").resolve()
+        self.work_dir.mkdir(exist_ok=True)
+        stub = self.work_dir / "stub" / "deepmd"
+        stub.mkdir(parents=True, exist_ok=True)
+        (stub / "__init__.py").write_text("")
+        (stub / "calculator.py").write_text(mocked_deepmd_calculator)
+        rng = np.random.default_rng(0)
+        self.structures = []
+        for ii, symbols in enumerate(["Mg2Al", "MgAl", "Mg2Al"]):
+            atoms = ase.Atoms(
+                symbols,
+                positions=rng.uniform(0.5, 2.0, (len(ase.Atoms(symbols)), 3)),
+                cell=4.2 * np.eye(3),
+                pbc=True,
+            )
+            self.structures.append(atoms)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def run_opt(self, batch_size):
+        _, run_opt_str, _ = make_calypso_input(
+            2,
+            ["Mg", "Al"],
+            [12, 13],
+            [1, 1],
+            [[1.0, 1.0], [1.0, 1.0]],
+            fmax=0.01,
+            pressure=0.0,
+            opt_step=20,
+            opt_batch_size=batch_size,
+        )
+        task_dir = self.work_dir / f"batch_{batch_size}"
+        task_dir.mkdir()
+        for ii, atoms in enumerate(self.structures):
+            ase.io.write(task_dir / f"POSCAR_{ii + 1}", atoms, format="vasp")
+        (task_dir / "calypso_run_opt.py").write_text(run_opt_str)
+        env = dict(os.environ, PYTHONPATH=str(self.work_dir / "stub"))
+        ret = subprocess.run(
+            [sys.executable, "calypso_run_opt.py", "frozen_model.pb"],
+            cwd=task_dir,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(ret.returncode, 0, ret.stderr)
+        return task_dir
+
+    def test_batch(self):
+        ref_dir = self.run_opt(1)
+        batch_dir = self.run_opt(3)
+        for ii in range(1, 4):
+            for name in ("CONTCAR", "OUTCAR"):
+                self.assertEqual(
+                    (batch_dir / f"{name}_{ii}").read_text(),
+                    (ref_dir / f"{name}_{ii}").read_text(),
+                )
+            ref_traj = ase.io.read(ref_dir / f"{ii}.traj", index=":")
+            traj = ase.io.read(batch_dir / f"{ii}.traj", index=":")
+            self.assertEqual(len(traj), len(ref_traj))
+            np.testing.assert_allclose(
+                traj[-1].get_positions(), ref_traj[-1].get_positions()
+            )
+        ref_evals = np.loadtxt(ref_dir / "eval.log", dtype=int)
+        evals = np.loadtxt(batch_dir / "eval.log", dtype=int)
+        # one call per structure per step without batching
+        self.assertTrue(np.all(ref_evals == 1))
+        # the structures of the same atom types are evaluated at once
+        self.assertEqual(evals.sum(), ref_evals.sum())
+        self.assertEqual(evals.max(), 2)
+        self.assertLess(evals.size, ref_evals.size)
+
+    def test_default_unbatched(self):
+        _, run_opt_str, _ = make_calypso_input(
+            2, ["Mg", "Al"], [12, 13], [1, 1], [[1.0, 1.0], [1.0, 1.0]]
+        )
+        self.assertIn("batch_size=1)", run_opt_str)
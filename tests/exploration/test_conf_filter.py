@@ -1,3 +1,4 @@
+import itertools
 import os
 import unittest
 
@@ -15,8 +16,12 @@ from .context import (
     dpgen2,
 )
 from dpgen2.exploration.selector import (
+    BoxLengthConfFilter,
+    BoxSkewnessConfFilter,
     ConfFilter,
     ConfFilters,
+    DensityConfFilter,
+    DistanceConfFilter,
 )
 
 # isort: on
@@ -137,3 +142,104 @@ class TestConfFilter(unittest.TestCase):
         filters.add(FooFilter()).add(FooFilter()).add(FooFilter())
         sel_sys = filters.check(faked_sys)
         self.assertEqual(sel_sys.get_nframes(), 0)
+
+
+def brute_force_min_dist(coords, cell, nopbc):
+    natoms = coords.shape[0]
+    shifts = [(0, 0, 0)] if nopbc else itertools.product(range(-2, 3), repeat=3)
+    ret = np.inf
+    for ss in shifts:
+        dd = coords[None, :, :] + np.array(ss) @ cell - coords[:, None, :]
+        dist = np.linalg.norm(dd, axis=-1)
+        np.fill_diagonal(dist, np.inf)
+        ret = min(ret, dist.min())
+    return ret
+
+
+class TestStructureConfFilter(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.nframes = 20
+        self.natoms = 16
+        self.cells = np.zeros([self.nframes, 3, 3])
+        for ii in range(self.nframes):
+            self.cells[ii] = np.diag(rng.uniform(3.0, 6.0, 3))
+            self.cells[ii] += np.triu(rng.uniform(-1.0, 1.0, [3, 3]), 1)
+        self.coords = np.einsum(
+            "fai,fij->faj", rng.random([self.nframes, self.natoms, 3]), self.cells
+        )
+        self.atom_types = np.array([0, 1] * (self.natoms // 2))
+
+    def test_distance(self):
+        for nopbc in (False, True):
+            min_dist = np.array(
+                [
+                    brute_force_min_dist(cc, ce, nopbc)
+                    for cc, ce in zip(self.coords, self.cells)
+                ]
+            )
+            safe_dist = np.median(min_dist)
+            ff = DistanceConfFilter(safe_dist=safe_dist)
+            valid = ff.check_batch(self.coords, self.cells, self.atom_types, nopbc)
+            np.testing.assert_array_equal(valid, min_dist >= safe_dist)
+            self.assertEqual(
+                ff.check(self.coords[0], self.cells[0], self.atom_types, nopbc),
+                valid[0],
+            )
+
+    def test_box(self):
+        cells = np.array(
+            [
+                np.eye(3),
+                [[1.0, 0.0, 0.0], [1.0, 1.0, 0.0], [0.0, 0.0, 1.0]],
+                [[1.0, 0.0, 0.0], [3.0, 1.0, 0.0], [0.0, 0.0, 1.0]],
+                np.diag([1.0, 1.0, 6.0]),
+            ]
+        )
+        coords = np.zeros([4, 2, 3])
+        atom_types = np.array([0, 0])
+        valid = BoxSkewnessConfFilter(theta=30.0).check_batch(
+            coords, cells, atom_types, False
+        )
+        np.testing.assert_array_equal(valid, [True, True, False, True])
+        valid = BoxLengthConfFilter(length_ratio=5.0).check_batch(
+            coords, cells, atom_types, False
+        )
+        np.testing.assert_array_equal(valid, [True, True, True, False])
+        valid = BoxSkewnessConfFilter(theta=30.0).check_batch(
+            coords, cells, atom_types, True
+        )
+        np.testing.assert_array_equal(valid, [True, True, True, True])
+
+    def test_density(self):
+        cells = np.array([np.eye(3) * 2.0, np.eye(3) * 1.0])
+        coords = np.zeros([2, 2, 3])
+        atom_types = np.array([0, 1])
+        valid = DensityConfFilter(max_density=1.0).check_batch(
+            coords, cells, atom_types, False
+        )
+        np.testing.assert_array_equal(valid, [True, False])
+        # mass density of 1 + 2 g/mol in 8 angstrom^3 is 0.62 g/cm^3
+        valid = DensityConfFilter(max_density=0.6, mass_map=[1.0, 2.0]).check_batch(
+            coords, cells, atom_types, False
+        )
+        np.testing.assert_array_equal(valid, [False, False])
+        valid = DensityConfFilter(max_density=0.7, mass_map=[1.0, 2.0]).check_batch(
+            coords, cells, atom_types, False
+        )
+        np.testing.assert_array_equal(valid, [True, False])
+
+    def test_filters(self):
+        faked_sys = fake_system(self.nframes, self.natoms)
+        faked_sys.data["coords"] = self.coords
+        faked_sys.data["cells"] = self.cells
+        faked_sys.data["atom_types"] = self.atom_types
+        ff = DistanceConfFilter(safe_dist=0.8)
+        expected = np.flatnonzero(
+            ff.check_batch(self.coords, self.cells, self.atom_types, False)
+        )
+        filters = ConfFilters()
+        filters.add(ff).add(BoxLengthConfFilter())
+        sel_sys = filters.check(faked_sys)
+        self.assertEqual(sel_sys.get_nframes(), len(expected))
+        np.testing.assert_array_equal(sel_sys["coords"], self.coords[expected])
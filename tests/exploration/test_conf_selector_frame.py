@@ -1,10 +1,14 @@
 import os
+import random
 import shutil
 import textwrap
 import unittest
 from pathlib import (
     Path,
 )
+from unittest import (
+    mock,
+)
 
 import dpdata
 import numpy as np
@@ -16,11 +20,16 @@ from .context import (
 from dpgen2.exploration.render import (
     TrajRenderLammps,
 )
+from dpgen2.exploration.render.lammps_dump_reader import (
+    LammpsDumpReader,
+)
 from dpgen2.exploration.report import (
     ExplorationReportTrustLevelsRandom,
 )
 from dpgen2.exploration.selector import (
+    ConfFilters,
     ConfSelectorFrames,
+    DistanceConfFilter,
 )
 
 # isort: on
@@ -120,6 +129,85 @@ class TestConfSelectorFrames(unittest.TestCase):
         self.assertAlmostEqual(report.accurate_ratio(), 0.0)
         self.assertAlmostEqual(report.failed_ratio(), 0.0)
 
+    def test_conf_workers(self):
+        report = ExplorationReportTrustLevelsRandom(0.1, 0.5, conv_accuracy=0.9)
+        traj_render = TrajRenderLammps(conf_workers=2)
+        conf_selector = ConfSelectorFrames(traj_render, report)
+        confs, report = conf_selector.select(
+            self.trajs, self.model_devis, self.type_map
+        )
+        ms = dpdata.MultiSystems(type_map=self.type_map)
+        ms.from_deepmd_npy(confs[0], labeled=False)
+        self.assertEqual(len(ms), 1)
+        ss = ms[0]
+        self.assertEqual(ss.get_nframes(), 6)
+        for ii in range(6):
+            self.assertAlmostEqual(ss["coords"][ii][0][1], 2.87 + ii % 3, places=2)
+
+    def test_conf_filters(self):
+        report = ExplorationReportTrustLevelsRandom(0.1, 0.5, conv_accuracy=0.9)
+        traj_render = TrajRenderLammps()
+        for safe_dist, nframes in ((0.5, 6), (1.5, 0)):
+            conf_filters = ConfFilters().add(DistanceConfFilter(safe_dist=safe_dist))
+            conf_selector = ConfSelectorFrames(
+                traj_render, report, conf_filters=conf_filters
+            )
+            confs, _ = conf_selector.select(self.trajs, self.model_devis, self.type_map)
+            ms = dpdata.MultiSystems(type_map=self.type_map)
+            ms.from_deepmd_npy(confs[0], labeled=False)
+            self.assertEqual(ms.get_nframes(), nframes)
+            shutil.rmtree(confs[0])
+
+    def test_conf_filters_max_numb_sel(self):
+        # the atoms of the frames in bar.dump are too close
+        self.trajs[1].write_text(
+            self.dump_file.replace("11.83", "11.09").replace("2.18", "2.74")
+        )
+        conf_filters = ConfFilters().add(DistanceConfFilter(safe_dist=0.5))
+        for conf_workers in (1, 2):
+            traj_render = TrajRenderLammps(conf_workers=conf_workers)
+            for seed in range(5):
+                random.seed(seed)
+                report = ExplorationReportTrustLevelsRandom(0.1, 0.5, conv_accuracy=0.9)
+                conf_selector = ConfSelectorFrames(
+                    traj_render, report, max_numb_sel=3, conf_filters=conf_filters
+                )
+                confs, report = conf_selector.select(
+                    self.trajs, self.model_devis, self.type_map
+                )
+                # the rejected frames do not take the places of valid ones
+                ms = dpdata.MultiSystems(type_map=self.type_map)
+                ms.from_deepmd_npy(confs[0], labeled=False)
+                self.assertEqual(ms.get_nframes(), 3)
+                # the report is not changed by the filters
+                self.assertEqual(report.get_candidate_ids(), [[0, 1, 2], [0, 1, 2]])
+                self.assertAlmostEqual(report.candidate_ratio(), 1.0)
+                shutil.rmtree(confs[0])
+
+    def test_conf_filters_read_drawn(self):
+        conf_filters = ConfFilters().add(DistanceConfFilter(safe_dist=0.5))
+        get_system = LammpsDumpReader.get_system
+        nread = []
+
+        def count_read(reader, id_selected, *args, **kwargs):
+            nread.append(len(id_selected))
+            return get_system(reader, id_selected, *args, **kwargs)
+
+        report = ExplorationReportTrustLevelsRandom(0.1, 0.5, conv_accuracy=0.9)
+        conf_selector = ConfSelectorFrames(
+            TrajRenderLammps(), report, max_numb_sel=2, conf_filters=conf_filters
+        )
+        with mock.patch.object(LammpsDumpReader, "get_system", count_read):
+            confs, report = conf_selector.select(
+                self.trajs, self.model_devis, self.type_map
+            )
+        # all the drawn frames pass the filters, the others are not read
+        self.assertEqual(sum(nread), 2)
+        ms = dpdata.MultiSystems(type_map=self.type_map)
+        ms.from_deepmd_npy(confs[0], labeled=False)
+        self.assertEqual(ms.get_nframes(), 2)
+        shutil.rmtree(confs[0])
+
     def test_f_1(self):
         report = ExplorationReportTrustLevelsRandom(0.25, 0.35, conv_accuracy=0.9)
         traj_render = TrajRenderLammps()
@@ -12,6 +12,7 @@ from .context import (
 )
 from dpgen2.exploration.deviation import (
     DeviManager,
+    DeviManagerColumnar,
     DeviManagerStd,
 )
 
@@ -53,7 +54,7 @@ class TestDeviManagerStd(unittest.TestCase):
 
         self.assertRaisesRegex(
             AssertionError,
-            "Error: deviation\(shape: ",
+            r"Error: deviation\(shape: ",
             model_devi.add,
             DeviManager.MAX_DEVI_F,
             np.array([[1], [2], [3]]),
@@ -61,7 +62,7 @@ class TestDeviManagerStd(unittest.TestCase):
 
         self.assertRaisesRegex(
             AssertionError,
-            "Error: deviation\(type: ",
+            r"Error: deviation\(type: ",
             model_devi.add,
             DeviManager.MAX_DEVI_F,
             "foo",
@@ -109,3 +110,108 @@ class TestDeviManagerStd(unittest.TestCase):
             model_devi.get,
             DeviManager.MAX_DEVI_V,
         )
+
+
+class TestDeviManagerColumnar(unittest.TestCase):
+    def test_success(self):
+        model_devi = DeviManagerColumnar()
+        model_devi.add(DeviManager.MAX_DEVI_F, np.array([1, 2, 3]))
+        model_devi.add(DeviManager.MAX_DEVI_F, np.array([4, 5]))
+
+        self.assertEqual(model_devi.ntraj, 2)
+        md_f = model_devi.get(DeviManager.MAX_DEVI_F)
+        self.assertEqual(len(md_f), 2)
+        np.testing.assert_equal(md_f[0], np.array([1, 2, 3]))
+        np.testing.assert_equal(md_f[1], np.array([4, 5]))
+        self.assertEqual(model_devi.get(DeviManager.MAX_DEVI_V), [None, None])
+        np.testing.assert_equal(
+            model_devi.get_flat(DeviManager.MAX_DEVI_F), np.array([1, 2, 3, 4, 5])
+        )
+        self.assertTrue(model_devi.get_flat(DeviManager.MAX_DEVI_V) is None)
+        np.testing.assert_equal(model_devi.get_offsets(), np.array([0, 3, 5]))
+        traj_idx, frame_idx = model_devi.get_frame_index()
+        np.testing.assert_equal(traj_idx, np.array([0, 0, 0, 1, 1]))
+        np.testing.assert_equal(frame_idx, np.array([0, 1, 2, 0, 1]))
+
+        # add after freezing
+        model_devi.add(DeviManager.MAX_DEVI_F, np.array([6]))
+        self.assertEqual(model_devi.ntraj, 3)
+        np.testing.assert_equal(
+            model_devi.get_flat(DeviManager.MAX_DEVI_F),
+            np.array([1, 2, 3, 4, 5, 6]),
+        )
+        np.testing.assert_equal(model_devi.get_offsets(), np.array([0, 3, 5, 6]))
+
+        model_devi.clear()
+        self.assertEqual(model_devi.ntraj, 0)
+        self.assertEqual(model_devi.get(DeviManager.MAX_DEVI_F), [])
+        self.assertEqual(model_devi.get(DeviManager.MAX_DEVI_V), [])
+        self.assertEqual(model_devi.get_flat(DeviManager.MAX_DEVI_F).size, 0)
+
+    def test_same_as_std(self):
+        model_devi = DeviManagerColumnar()
+        model_devi_std = DeviManagerStd()
+        for md in (model_devi, model_devi_std):
+            md.add(DeviManager.MAX_DEVI_F, np.array([0.1, 0.2, 0.3]))
+            md.add(DeviManager.MAX_DEVI_F, np.array([0.4, 0.5]))
+            md.add(DeviManager.MAX_DEVI_V, np.array([0.6, 0.7, 0.8]))
+            md.add(DeviManager.MAX_DEVI_V, np.array([0.9, 1.0]))
+        for name in (DeviManager.MAX_DEVI_F, DeviManager.MAX_DEVI_V):
+            for aa, bb in zip(model_devi.get(name), model_devi_std.get(name)):
+                np.testing.assert_equal(aa, bb)
+            np.testing.assert_equal(
+                model_devi.get_flat(name), model_devi_std.get_flat(name)
+            )
+        np.testing.assert_equal(model_devi.get_offsets(), model_devi_std.get_offsets())
+
+    def test_add_invalid_deviation(self):
+        model_devi = DeviManagerColumnar()
+
+        self.assertRaisesRegex(
+            AssertionError,
+            r"Error: deviation\(shape: ",
+            model_devi.add,
+            DeviManager.MAX_DEVI_F,
+            np.array([[1], [2], [3]]),
+        )
+
+        self.assertRaisesRegex(
+            AssertionError,
+            r"Error: deviation\(type: ",
+            model_devi.add,
+            DeviManager.MAX_DEVI_F,
+            "foo",
+        )
+
+    def test_check_data(self):
+        model_devi = DeviManagerColumnar()
+        model_devi.add(DeviManager.MAX_DEVI_F, np.array([1, 2, 3]))
+        model_devi.add(DeviManager.MAX_DEVI_F, np.array([4, 5, 6]))
+        model_devi.add(DeviManager.MAX_DEVI_V, np.array([4, 5, 6]))
+
+        self.assertRaisesRegex(
+            AssertionError,
+            "Error: the number of model deviation",
+            model_devi.get,
+            DeviManager.MAX_DEVI_V,
+        )
+
+        model_devi = DeviManagerColumnar()
+        model_devi.add(DeviManager.MAX_DEVI_V, np.array([1, 2, 3]))
+        self.assertRaisesRegex(
+            AssertionError,
+            f"Error: cannot find model deviation {DeviManager.MAX_DEVI_F}",
+            model_devi.freeze,
+        )
+
+        model_devi = DeviManagerColumnar()
+        model_devi.add(DeviManager.MAX_DEVI_F, np.array([1, 2, 3]))
+        model_devi.add(DeviManager.MAX_DEVI_F, np.array([4, 5, 6]))
+        model_devi.add(DeviManager.MAX_DEVI_V, np.array([1, 2, 3]))
+        model_devi.add(DeviManager.MAX_DEVI_V, np.array([4, 5]))
+        self.assertRaisesRegex(
+            AssertionError,
+            f"Error: the number of frames in",
+            model_devi.get,
+            DeviManager.MAX_DEVI_F,
+        )
@@ -0,0 +1,82 @@
+import os
+import shutil
+import unittest
+from pathlib import (
+    Path,
+)
+
+import dpdata
+import numpy as np
+
+# isort: off
+from .context import (
+    dpgen2,
+)
+from dpgen2.exploration.render.lammps_dump_reader import (
+    LammpsDumpReader,
+    index_lammps_dump,
+)
+
+# isort: on
+
+
+def make_dump(fname, nframes, natoms=4):
+    rng = np.random.default_rng(0)
+    ret = []
+    for ii in range(nframes):
+        ret.append("ITEM: TIMESTEP")
+        ret.append(f"{ii * 10}")
+        ret.append("ITEM: NUMBER OF ATOMS")
+        ret.append(f"{natoms}")
+        ret.append("ITEM: BOX BOUNDS xy xz yz pp pp pp")
+        ret.append(f"0.0 {10.0 + ii * 0.1:.6f} 0.1")
+        ret.append("0.0 10.0 0.0")
+        ret.append("0.0 10.0 0.0")
+        ret.append("ITEM: ATOMS id type x y z")
+        for jj in range(natoms):
+            xx = rng.random(3) * 10.0
+            ret.append(f"{jj+1} {jj%2+1} {xx[0]:.6f} {xx[1]:.6f} {xx[2]:.6f}")
+    Path(fname).write_text("\n".join(ret) + "\n")
+
+
+class TestLammpsDumpReader(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = Path("test_lammps_dump_reader")
+        self.work_dir.mkdir(exist_ok=True)
+        self.fname = self.work_dir / "traj.dump"
+        make_dump(self.fname, 7)
+        self.type_map = ["O", "H"]
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_index(self):
+        offsets = index_lammps_dump(self.fname)
+        self.assertEqual(len(offsets), 8)
+        self.assertEqual(offsets[0], 0)
+        self.assertEqual(offsets[-1], self.fname.stat().st_size)
+        text = self.fname.read_bytes()
+        for ii in range(7):
+            self.assertTrue(text[offsets[ii] :].startswith(b"ITEM: TIMESTEP"))
+        empty = self.work_dir / "empty.dump"
+        empty.write_text("")
+        self.assertEqual(index_lammps_dump(empty).tolist(), [0])
+
+    def test_get_system(self):
+        reader = LammpsDumpReader(self.fname)
+        self.assertEqual(reader.nframes, 7)
+        ref = dpdata.System(self.fname, fmt="lammps/dump", type_map=self.type_map)
+        for idx in ([0], [6, 2, 3], [1, 1]):
+            ss = reader.get_system(idx, type_map=self.type_map)
+            expected = ref.sub_system(idx)
+            self.assertEqual(ss.get_nframes(), len(idx))
+            self.assertEqual(ss["atom_names"], expected["atom_names"])
+            self.assertEqual(ss["atom_numbs"], expected["atom_numbs"])
+            np.testing.assert_array_equal(ss["atom_types"], expected["atom_types"])
+            np.testing.assert_array_equal(ss["coords"], expected["coords"])
+            np.testing.assert_array_equal(ss["cells"], expected["cells"])
+
+    def test_out_of_range(self):
+        reader = LammpsDumpReader(self.fname)
+        self.assertRaises(IndexError, reader.read_frames, [7])
+        self.assertRaises(IndexError, reader.read_frames, [-1])
@@ -0,0 +1,171 @@
+import os
+import shutil
+import textwrap
+import unittest
+from pathlib import (
+    Path,
+)
+from unittest import (
+    mock,
+)
+
+import numpy as np
+
+# isort: off
+from .context import (
+    dpgen2,
+)
+from dpgen2.exploration.deviation import (
+    DeviManager,
+    DeviManagerColumnar,
+)
+from dpgen2.exploration.render import (
+    TrajRenderLammps,
+)
+from dpgen2.exploration.render.model_devi_loader import (
+    _parse_fixed_width,
+    _strip_comments,
+    load_model_devi,
+    load_model_devis,
+    model_devi_sidecar_path,
+    write_model_devi_sidecar,
+)
+from dpgen2.op.run_caly_model_devi import (
+    write_model_devi_out,
+)
+
+# isort: on
+
+
+class TestLoadModelDevi(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = Path("test_model_devi_loader")
+        self.work_dir.mkdir(exist_ok=True)
+        rng = np.random.default_rng(0)
+        nframes = 50
+        self.devi = np.zeros((nframes, 8))
+        self.devi[:, 0] = np.arange(nframes) * 10
+        self.devi[:, 1:] = rng.standard_normal((nframes, 7)) * 10.0 ** rng.integers(
+            -12, 5, (nframes, 7)
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def check_same_as_loadtxt(self, fname):
+        expected = np.loadtxt(fname, ndmin=2)[:, 1:7]
+        data = load_model_devi(fname)
+        self.assertEqual(data.shape, expected.shape)
+        np.testing.assert_array_equal(data, expected)
+
+    def test_fixed_width(self):
+        fname = self.work_dir / "model_devi.out"
+        write_model_devi_out(self.devi, fname)
+        body = _strip_comments(fname.read_bytes())
+        self.assertIsNotNone(_parse_fixed_width(body, (1, 2, 3, 4, 5, 6)))
+        self.check_same_as_loadtxt(fname)
+
+    def test_appended(self):
+        fname = self.work_dir / "model_devi.out"
+        write_model_devi_out(self.devi[:20], fname)
+        write_model_devi_out(self.devi[20:], fname)
+        self.check_same_as_loadtxt(fname)
+
+    def test_lammps(self):
+        fname = self.work_dir / "model_devi.out"
+        fname.write_text(
+            textwrap.dedent(
+                """\
+                #       step         max_devi_v         min_devi_v         avg_devi_v         max_devi_f         min_devi_f         avg_devi_f
+                           0       1.438427e-04       5.689551e-05       1.083383e-04       8.835352e-04       5.833999e-04       7.092065e-04
+                          10      -1.512387e-02       2.309443e-03       7.432311e-03       1.009131e-01       2.110211e-02       5.391012e-02
+                """
+            )
+        )
+        self.check_same_as_loadtxt(fname)
+
+    def test_not_fixed_width(self):
+        fname = self.work_dir / "model_devi.out"
+        fname.write_text("# step\n0 1.0 2 3 4 5 6\n10 1.5 2 3 4 5 6e1")
+        body = _strip_comments(fname.read_bytes())
+        self.assertIsNone(_parse_fixed_width(body, (1, 2, 3, 4, 5, 6)))
+        self.check_same_as_loadtxt(fname)
+
+    def test_one_frame(self):
+        fname = self.work_dir / "model_devi.out"
+        write_model_devi_out(self.devi[:1], fname)
+        self.check_same_as_loadtxt(fname)
+
+    def test_empty(self):
+        fname = self.work_dir / "model_devi.out"
+        fname.write_text("# step\n")
+        self.assertEqual(load_model_devi(fname).shape, (0, 6))
+
+    def test_sidecar(self):
+        fname = self.work_dir / "model_devi.out"
+        write_model_devi_out(self.devi, fname)
+        expected = np.loadtxt(fname)[:, 1:7]
+        sidecar = write_model_devi_sidecar(fname)
+        self.assertEqual(sidecar, self.work_dir / "model_devi.npy")
+        self.assertEqual(model_devi_sidecar_path(fname), sidecar)
+        self.assertEqual(np.load(sidecar).dtype, np.float64)
+        # the sidecar is preferred to the text file
+        fname.write_text("broken")
+        for ff in (fname, sidecar):
+            data = load_model_devi(ff)
+            self.assertIsInstance(data, np.memmap)
+            np.testing.assert_array_equal(data, expected)
+        # fall back to the text file if the sidecar is missing
+        fname.unlink()
+        write_model_devi_out(self.devi, fname)
+        sidecar.unlink()
+        np.testing.assert_array_equal(load_model_devi(fname), expected)
+
+    def test_render_sidecar(self):
+        fname = self.work_dir / "model_devi.out"
+        write_model_devi_out(self.devi, fname)
+        sidecar = write_model_devi_sidecar(fname)
+        added = []
+        add = DeviManagerColumnar.add
+
+        def record(manager, name, deviation):
+            added.append(deviation)
+            add(manager, name, deviation)
+
+        with mock.patch.object(DeviManagerColumnar, "add", record):
+            md = TrajRenderLammps().get_model_devi([sidecar])
+        # the columns of the memory map are added without copying
+        self.assertEqual(len(added), 6)
+        for dd in added:
+            self.assertIsInstance(dd, np.memmap)
+        np.testing.assert_array_equal(
+            md.get(DeviManager.MAX_DEVI_F)[0], np.loadtxt(fname)[:, 4]
+        )
+
+    def test_sidecar_trust_levels(self):
+        # frames exactly on the trust levels are classified as from the text
+        levels = (0.1, 0.3)
+        devi = np.zeros((6, 7))
+        devi[:, 0] = np.arange(6)
+        devi[:, 4] = [0.05, 0.1, 0.2, 0.3, 0.4, 0.3 - 1e-9]
+        fname = self.work_dir / "model_devi.out"
+        np.savetxt(fname, devi, fmt="%20.10e")
+        text = load_model_devi(fname)
+        sidecar = write_model_devi_sidecar(fname)
+        data = load_model_devi(sidecar)
+        for ll in levels:
+            np.testing.assert_array_equal(data[:, 3] < ll, text[:, 3] < ll)
+        np.testing.assert_array_equal(data[:, 3] < 0.1, [1, 0, 0, 0, 0, 0])
+        np.testing.assert_array_equal(data[:, 3] < 0.3, [1, 1, 1, 0, 0, 1])
+
+    def test_load_model_devis(self):
+        fnames = []
+        for ii in range(5):
+            fname = self.work_dir / f"model_devi.{ii}.out"
+            write_model_devi_out(self.devi[ii * 10 : (ii + 1) * 10], fname)
+            fnames.append(fname)
+        for max_workers in (1, None, 3):
+            data = load_model_devis(fnames, max_workers=max_workers)
+            self.assertEqual(len(data), 5)
+            for ii in range(5):
+                np.testing.assert_array_equal(data[ii], np.loadtxt(fnames[ii])[:, 1:7])
@@ -0,0 +1,107 @@
+import shutil
+import unittest
+from pathlib import (
+    Path,
+)
+
+import dpdata
+import numpy as np
+
+# isort: off
+from .context import (
+    dpgen2,
+)
+from dpgen2.exploration.selector.npy_writer import (
+    DeepmdNpyWriter,
+)
+
+# isort: on
+
+
+def make_system(atom_numbs, nframes, seed):
+    rng = np.random.default_rng(seed)
+    natoms = sum(atom_numbs)
+    return dpdata.System(
+        data={
+            "atom_names": ["O", "H"],
+            "atom_numbs": atom_numbs,
+            "atom_types": np.repeat([0, 1], atom_numbs),
+            "orig": np.zeros(3),
+            "cells": np.tile(np.eye(3) * 10.0, (nframes, 1, 1)),
+            "coords": rng.random((nframes, natoms, 3)) * 10.0,
+        }
+    )
+
+
+class TestDeepmdNpyWriter(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = Path("test_npy_writer")
+        self.work_dir.mkdir(exist_ok=True)
+        self.systems = [
+            make_system([1, 2], 3, 0),
+            make_system([2, 1], 2, 1),
+            make_system([1, 2], 0, 2),
+            make_system([1, 2], 4, 3),
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_append(self):
+        type_map = ["O", "H", "C"]
+        writer = DeepmdNpyWriter(self.work_dir / "confs", type_map)
+        for ss in self.systems:
+            writer.append(ss)
+        self.assertEqual(writer.nsets, {"O1H2C0": 2, "O2H1C0": 1})
+        self.assertTrue((self.work_dir / "confs" / "O1H2C0" / "set.000001").is_dir())
+
+        ms = dpdata.MultiSystems(type_map=type_map)
+        ms.from_deepmd_npy(self.work_dir / "confs", labeled=False)
+        ref = dpdata.MultiSystems(type_map=type_map)
+        for ss in self.systems:
+            if ss.get_nframes() > 0:
+                ref.append(ss)
+        self.assertEqual(ms.get_nframes(), 9)
+        self.assertEqual(sorted(ms.systems.keys()), sorted(ref.systems.keys()))
+        for kk in ref.systems.keys():
+            self.assertEqual(ms[kk]["atom_names"], ref[kk]["atom_names"])
+            np.testing.assert_array_equal(ms[kk]["atom_types"], ref[kk]["atom_types"])
+            np.testing.assert_allclose(ms[kk]["coords"], ref[kk]["coords"])
+            np.testing.assert_allclose(ms[kk]["cells"], ref[kk]["cells"])
+
+    def test_many_sets(self):
+        writer = DeepmdNpyWriter(self.work_dir / "confs")
+        writer.append(self.systems[0])
+        # the sets sort in the order of writing beyond 1000 sets
+        writer.nsets["O1H2"] = 1000
+        writer.append(self.systems[3])
+        ss = dpdata.System(self.work_dir / "confs" / "O1H2", fmt="deepmd/npy")
+        np.testing.assert_allclose(
+            ss["coords"],
+            np.concatenate([self.systems[0]["coords"], self.systems[3]["coords"]]),
+        )
+
+    def test_exists(self):
+        (self.work_dir / "confs" / "O1H2").mkdir(parents=True)
+        writer = DeepmdNpyWriter(self.work_dir / "confs")
+        with self.assertRaises(FileExistsError):
+            writer.append(self.systems[0])
+
+    def test_atom_order(self):
+        ss0 = make_system([1, 2], 1, 0)
+        ss1 = make_system([1, 2], 1, 1)
+        # the same formula with the atoms in another order: H O H
+        perm = np.array([1, 0, 2])
+        ss1.data["atom_types"] = ss1["atom_types"][perm]
+        ss1.data["coords"] = ss1["coords"][:, perm]
+        writer = DeepmdNpyWriter(self.work_dir / "confs")
+        writer.append(ss0)
+        writer.append(ss1)
+        # the appended system is not changed
+        np.testing.assert_array_equal(ss1["atom_types"], [1, 0, 1])
+
+        ss = dpdata.System(self.work_dir / "confs" / "O1H2", fmt="deepmd/npy")
+        np.testing.assert_array_equal(ss["atom_types"], [0, 1, 1])
+        np.testing.assert_allclose(ss["coords"][0], ss0["coords"][0])
+        # the O atom of each frame stays an O atom
+        np.testing.assert_allclose(ss["coords"][1], ss1["coords"][0][[1, 0, 2]])
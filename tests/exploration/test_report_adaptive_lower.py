@@ -1,4 +1,5 @@
 import os
+import random
 import textwrap
 import unittest
 from collections import (
@@ -17,6 +18,7 @@ from .context import (
 )
 from dpgen2.exploration.deviation import (
     DeviManager,
+    DeviManagerColumnar,
     DeviManagerStd,
 )
 from dpgen2.exploration.report import (
@@ -165,6 +167,28 @@ class TestTrajsExplorationReport(unittest.TestCase):
         self.assertEqual(ter.accurate_ratio(), 9.0 / 18.0)
         self.assertEqual(ter.failed_ratio(), 6.0 / 18.0)
 
+    def test_uniform_random_state(self):
+        model_devi = DeviManagerStd()
+        model_devi.add(DeviManager.MAX_DEVI_F, np.linspace(0.0, 0.5, 20))
+        model_devi.add(DeviManager.MAX_DEVI_F, np.linspace(0.05, 0.55, 20))
+        ter = ExplorationReportAdaptiveLower(
+            level_f_hi=1.0,
+            numb_candi_f=30,
+            rate_candi_f=0.0,
+        )
+        ter.record(model_devi)
+        candi = sorted(ter.candi)
+        # the same random numbers are drawn as shuffling the candidates
+        random.seed(3)
+        ref = list(candi)
+        random.shuffle(ref)
+        ref = sorted(ref[:5])
+        ref_next = random.random()
+        random.seed(3)
+        picked = ter.get_candidate_ids(5)
+        self.assertEqual([(ii, jj) for ii in range(2) for jj in picked[ii]], ref)
+        self.assertEqual(random.random(), ref_next)
+
     def test_f_inv_pop(self):
         model_devi = DeviManagerStd()
         model_devi.add(
@@ -195,38 +219,38 @@ class TestTrajsExplorationReport(unittest.TestCase):
             n_checked_steps=2,
             conv_tolerance=0.1,
             candi_sel_prob="inv_pop_f:2",
+            candi_sel_seed=1,
         )
 
-        def faked_choices(
-            candi,
-            weights=None,
-            k=0,
-        ):
-            # hist: 2bins, 0.1-0.4 5candi, 0.4-0.7 7candi
-            # only return those with mdf 0.1-0.4
-            self.assertEqual(len(weights), 12)
-            self.assertEqual(len(candi), 12)
-            ret = []
-            for ii in range(len(candi)):
-                tidx, fidx = candi[ii]
-                this_mdf = md_f[tidx][fidx]
-                if this_mdf < 0.4:
-                    self.assertAlmostEqual(weights[ii], 1.0 / 5.0)
-                    ret.append(candi[ii])
-                else:
-                    self.assertAlmostEqual(weights[ii], 1.0 / 7.0)
-            return ret
-
         ter.record(model_devi)
-        with mock.patch("random.choices", faked_choices):
-            picked = ter.get_candidate_ids(11)
         self.assertFalse(ter.converged([]))
         self.assertEqual(ter.candi, expected_cand)
         self.assertEqual(ter.accur, expected_accu)
         self.assertEqual(set(ter.failed), expected_fail)
+
+        # hist: 2bins, 0.1-0.4 5candi, 0.4-0.7 7candi
+        candi = np.flatnonzero(ter.frame_status == ter.CAND)
+        prob = ter._choice_prob_inv_pop_f(candi)
+        self.assertEqual(len(prob), 12)
+        for ii, pp in zip(candi, prob):
+            tidx, fidx = divmod(ii, 9)
+            if md_f[tidx][fidx] < 0.4:
+                self.assertAlmostEqual(pp, 1.0 / 5.0)
+            else:
+                self.assertAlmostEqual(pp, 1.0 / 7.0)
+
+        # sampled without replacement, reproducible with the seed
+        picked = ter.get_candidate_ids(11)
         self.assertEqual(len(picked), 2)
-        self.assertEqual(sorted(picked[0]), [1, 3])
-        self.assertEqual(sorted(picked[1]), [1, 5, 7])
+        self.assertEqual(sum([len(ii) for ii in picked]), 11)
+        for ii in range(2):
+            self.assertEqual(len(set(picked[ii])), len(picked[ii]))
+            for jj in picked[ii]:
+                self.assertTrue((ii, jj) in expected_cand)
+        self.assertEqual(ter.get_candidate_ids(11), picked)
+        with mock.patch("random.randrange", return_value=1):
+            ter.candi_sel_seed = None
+            self.assertEqual(ter.get_candidate_ids(11), picked)
 
     def test_v(self):
         model_devi = DeviManagerStd()
@@ -296,6 +320,24 @@ class TestTrajsExplorationReport(unittest.TestCase):
         self.assertEqual(ter.accurate_ratio(), 9.0 / 18.0)
         self.assertEqual(ter.failed_ratio(), 6.0 / 18.0)
 
+    def test_f_ties(self):
+        model_devi = DeviManagerColumnar()
+        model_devi.add(DeviManager.MAX_DEVI_F, np.array([0.50, 0.50, 0.10]))
+        model_devi.add(DeviManager.MAX_DEVI_F, np.array([0.50, 0.90, 0.20]))
+
+        ter = ExplorationReportAdaptiveLower(
+            level_f_hi=0.7,
+            numb_candi_f=2,
+            rate_candi_f=0.0,
+        )
+        ter.record(model_devi)
+        # frames with the same model deviation are picked from the last one
+        self.assertEqual(ter.candi, set([(0, 1), (1, 0)]))
+        self.assertEqual(ter.accur, set([(0, 0), (0, 2), (1, 2)]))
+        self.assertEqual(ter.failed, [(1, 1)])
+        self.assertEqual(ter.level_f_lo, 0.5)
+        self.assertEqual(ter.get_candidate_ids(), [[1], [0]])
+
     def test_args(self):
         input_dict = {
             "level_f_hi": 1.0,
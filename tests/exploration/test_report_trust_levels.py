@@ -1,4 +1,5 @@
 import os
+import random
 import textwrap
 import unittest
 from collections import (
@@ -16,6 +17,7 @@ from context import (
 )
 from dpgen2.exploration.deviation import (
     DeviManager,
+    DeviManagerColumnar,
     DeviManagerStd,
 )
 from dpgen2.exploration.report import (
@@ -193,6 +195,22 @@ class TestTrajsExplorationReport(unittest.TestCase):
         self.assertAlmostEqual(data["conv_accuracy"], 0.9)
         exploration_report(*data)
 
+    def test_random_selection_state(self):
+        model_devi = DeviManagerStd()
+        model_devi.add(DeviManager.MAX_DEVI_F, np.linspace(0.3, 0.59, 20))
+        model_devi.add(DeviManager.MAX_DEVI_F, np.linspace(0.0, 0.59, 20))
+        ter = ExplorationReportTrustLevelsRandom(0.3, 0.6, conv_accuracy=0.2)
+        ter.record(model_devi)
+        candi = [(ii, jj) for ii in range(2) for jj in ter.get_candidate_ids(None)[ii]]
+        # the same selection as shuffling the list of candidates
+        random.seed(3)
+        ref = list(candi)
+        random.shuffle(ref)
+        ref = sorted(ref[:5])
+        random.seed(3)
+        picked = ter.get_candidate_ids(5)
+        self.assertEqual([(ii, jj) for ii in range(2) for jj in picked[ii]], ref)
+
     def test_max_selection(self):
         model_devi = DeviManagerStd()
         model_devi.add(
@@ -217,6 +235,28 @@ class TestTrajsExplorationReport(unittest.TestCase):
                 npicked += 1
         self.assertEqual(npicked, 2)
 
+    def test_max_selection_order(self):
+        model_devi = DeviManagerColumnar()
+        model_devi.add(
+            DeviManager.MAX_DEVI_F,
+            np.array([0.90, 0.10, 0.50, 0.11, 0.50, 0.12, 0.51, 0.40, 0.92]),
+        )
+        model_devi.add(
+            DeviManager.MAX_DEVI_F,
+            np.array([0.40, 0.20, 0.80, 0.81, 0.52, 0.21, 0.50, 0.22, 0.42]),
+        )
+
+        ter = ExplorationReportTrustLevelsMax(0.3, 0.6, 0.3, 0.6, conv_accuracy=0.2)
+        ter.record(model_devi)
+        self.assertEqual(ter.traj_nframes, [9, 9])
+        self.assertEqual(ter.candidate_ratio(), 8.0 / 18.0)
+        self.assertEqual(ter.get_candidate_ids(), [[2, 4, 6, 7], [0, 4, 6, 8]])
+        # sorted by max_devi_f, ties are broken by the frame order
+        self.assertEqual(ter.get_candidate_ids(2), [[6], [4]])
+        self.assertEqual(ter.get_candidate_ids(3), [[6, 2], [4]])
+        self.assertEqual(ter.get_candidate_ids(5), [[6, 2, 4], [4, 6]])
+        self.assertEqual(ter._get_candidates(4), [(1, 4), (0, 6), (0, 2), (0, 4)])
+
     def test_random_selection_convergence(self):
         # case 1
         model_devi = DeviManagerStd()
@@ -1,6 +1,7 @@
 import glob
 import json
 import os
+import pickle
 import shutil
 import sys
 import textwrap
@@ -34,10 +35,12 @@ from dpgen2.constants import (
 from dpgen2.fp.vasp import (
     PrepVasp,
     VaspInputs,
+    similarity_order,
     vasp_conf_name,
     vasp_input_name,
     vasp_kp_name,
     vasp_pot_name,
+    vasp_warm_start_dir,
 )
 from dpgen2.utils import (
     dump_object_to_file,
@@ -147,3 +150,86 @@ Gamma
         self.assertEqual(sys_record_1[2], 2)
         self.assertEqual(sys_record_1[3], 4)
         self.assertEqual(sys_record_1[5], 3)
+
+    def test_prep_workers(self):
+        iincar = "template.incar"
+        ipotcar = {"H": "POTCAR_H", "O": "POTCAR_O"}
+        vi = VaspInputs(0.1, iincar, ipotcar, True)
+        op = PrepVasp()
+        ref = op.execute(
+            OPIO(
+                {
+                    "config": {"inputs": vi},
+                    "confs": self.confs,
+                    "type_map": self.type_map,
+                }
+            )
+        )
+        ref_files = {}
+        for pp in ref["task_paths"]:
+            for ff in sorted(Path(pp).iterdir()):
+                ref_files[str(ff)] = ff.read_text()
+            shutil.rmtree(pp)
+        opout = op.execute(
+            OPIO(
+                {
+                    "config": {"inputs": vi, "prep_workers": 2},
+                    "confs": self.confs,
+                    "type_map": self.type_map,
+                }
+            )
+        )
+        self.assertEqual(opout["task_names"], ref["task_names"])
+        self.assertEqual(opout["task_paths"], ref["task_paths"])
+        files = {}
+        for pp in opout["task_paths"]:
+            for ff in sorted(Path(pp).iterdir()):
+                files[str(ff)] = ff.read_text()
+        self.assertEqual(files, ref_files)
+
+    def test_warm_start(self):
+        iincar = "template.incar"
+        ipotcar = {"H": "POTCAR_H", "O": "POTCAR_O"}
+        vi = VaspInputs(0.1, iincar, ipotcar, True, warm_start_nframes=2)
+        op = PrepVasp()
+        opout = op.execute(
+            OPIO(
+                {
+                    "config": {"inputs": vi},
+                    "confs": self.confs,
+                    "type_map": self.type_map,
+                }
+            )
+        )
+        # the systems of [2, 5, 3] and [3, 4, 2] frames in chains of 2 frames
+        self.assertEqual(len(opout["task_names"]), 1 + 3 + 2 + 2 + 2 + 1)
+        nframes = 0
+        for pp in opout["task_paths"]:
+            self.assertTrue((pp / vasp_conf_name).is_file())
+            frames = sorted((pp / vasp_warm_start_dir).glob("*/" + vasp_conf_name))
+            self.assertLessEqual(len(frames), 1)
+            nframes += 1 + len(frames)
+        self.assertEqual(nframes, sum(self.nframes_0) + sum(self.nframes_1))
+
+    def test_similarity_order(self):
+        shifts = np.array([0.0, 3.0, 1.0, 2.5, 0.4])
+        coords = shifts[:, None, None] * np.ones((5, 2, 3))
+        cells = np.tile(np.eye(3), (5, 1, 1))
+        np.testing.assert_array_equal(similarity_order(coords, cells), [0, 4, 2, 3, 1])
+
+    def test_inputs_pickle(self):
+        iincar = "template.incar"
+        ipotcar = {"H": "POTCAR_H", "O": "POTCAR_O"}
+        vi = VaspInputs(0.1, iincar, ipotcar, True, warm_start_nframes=2)
+        vi.make_potcar(["H", "O"])
+        vi1 = pickle.loads(pickle.dumps(vi))
+        self.assertEqual(vi1._potcar_cache, {})
+        self.assertEqual(vi1.warm_start_nframes, 2)
+        self.assertEqual(vi1.make_potcar(["O", "H"]), "bar O\nbar H\n")
+        # the inputs pickled by an older version
+        state = vi.__getstate__()
+        state.pop("warm_start_nframes")
+        vi2 = VaspInputs.__new__(VaspInputs)
+        vi2.__setstate__(state)
+        self.assertEqual(vi2.warm_start_nframes, 1)
+        self.assertEqual(vi2.make_potcar(["H"]), "bar H\n")
@@ -35,6 +35,7 @@ from dpgen2.fp.vasp import (
     vasp_input_name,
     vasp_kp_name,
     vasp_pot_name,
+    vasp_warm_start_dir,
 )
 
 # isort: on
@@ -175,3 +176,136 @@ class TestRunVasp(unittest.TestCase):
             call(" ".join(["myvasp", ">", fp_default_log_name]), shell=True),
         ]
         mocked_run.assert_has_calls(calls)
+
+
+class TestRunVaspLabelCache(unittest.TestCase):
+    def setUp(self):
+        self.task_path = Path("task/path")
+        self.task_path.mkdir(parents=True, exist_ok=True)
+        (self.task_path / vasp_conf_name).write_text("foo")
+        (self.task_path / vasp_input_name).write_text("bar")
+        (self.task_path / vasp_pot_name).write_text("dee")
+        (self.task_path / vasp_kp_name).write_text("por")
+        self.task_names = ["task_000", "task_001", "task_002"]
+        self.cache_dir = Path("label_cache")
+
+    def tearDown(self):
+        for ii in ["task", self.cache_dir] + self.task_names:
+            if Path(ii).is_dir():
+                shutil.rmtree(ii)
+
+    def execute(self, task_name, command="myvasp"):
+        def new_to(obj, foo, bar):
+            data_path = Path("data")
+            data_path.mkdir()
+            (data_path / "foo").write_text("bar")
+
+        def new_init(obj, foo):
+            pass
+
+        with mock.patch.object(dpgen2.fp.vasp.dpdata.LabeledSystem, "to", new=new_to):
+            with mock.patch.object(
+                dpgen2.fp.vasp.dpdata.LabeledSystem, "__init__", new=new_init
+            ):
+                return RunVasp().execute(
+                    OPIO(
+                        {
+                            "config": {
+                                "run": {
+                                    "command": command,
+                                },
+                                "label_cache": {
+                                    "type": "dir",
+                                    "path": str(self.cache_dir),
+                                },
+                            },
+                            "task_name": task_name,
+                            "task_path": self.task_path,
+                        }
+                    )
+                )
+
+    @patch("dpgen2.fp.vasp.run_command")
+    def test_cache(self, mocked_run):
+        mocked_run.side_effect = [(0, "foo\n", ""), (0, "foo\n", "")]
+        out = self.execute(self.task_names[0])
+        self.assertEqual(mocked_run.call_count, 1)
+        self.assertEqual((out["labeled_data"] / "foo").read_text(), "bar")
+        # the same inputs, the labels are loaded from the cache, the
+        # command does not change the labels
+        out = self.execute(self.task_names[1], command="mpirun -n 64 myvasp")
+        self.assertEqual(mocked_run.call_count, 1)
+        self.assertEqual(out["labeled_data"], Path(self.task_names[1]) / "data")
+        self.assertEqual((out["labeled_data"] / "foo").read_text(), "bar")
+        self.assertIn("label cache", out["log"].read_text())
+        # another input, the task runs
+        (self.task_path / vasp_kp_name).write_text("kpt")
+        self.execute(self.task_names[2])
+        self.assertEqual(mocked_run.call_count, 2)
+
+
+class TestRunVaspWarmStart(unittest.TestCase):
+    def setUp(self):
+        self.task_path = Path("task/path")
+        self.task_path.mkdir(parents=True, exist_ok=True)
+        (self.task_path / vasp_conf_name).write_text("foo")
+        (self.task_path / vasp_input_name).write_text("bar")
+        (self.task_path / vasp_pot_name).write_text("dee")
+        (self.task_path / vasp_kp_name).write_text("por")
+        for ii in range(1, 3):
+            frame_dir = self.task_path / vasp_warm_start_dir / ("%06d" % ii)
+            frame_dir.mkdir(parents=True)
+            (frame_dir / vasp_conf_name).write_text("foo %d" % ii)
+        self.task_name = "task_000"
+
+    def tearDown(self):
+        if Path("task").is_dir():
+            shutil.rmtree("task")
+        if Path(self.task_name).is_dir():
+            shutil.rmtree(self.task_name)
+
+    @patch("dpgen2.fp.vasp.dpdata.LabeledSystem")
+    @patch("dpgen2.fp.vasp.run_command")
+    def test_warm_start(self, mocked_run, mocked_sys):
+        restarts = []
+
+        def fake_vasp(command, shell):
+            # the WAVECAR of the previous frame is reused
+            wavecar = Path("WAVECAR")
+            restarts.append(
+                (
+                    Path(vasp_conf_name).read_text(),
+                    wavecar.read_text() if wavecar.is_file() else None,
+                )
+            )
+            Path("WAVECAR").write_text(Path(vasp_conf_name).read_text())
+            return 0, "", ""
+
+        mocked_run.side_effect = fake_vasp
+        out = RunVasp().execute(
+            OPIO(
+                {
+                    "config": {"run": {"command": "myvasp"}},
+                    "task_name": self.task_name,
+                    "task_path": self.task_path,
+                }
+            )
+        )
+        self.assertEqual(
+            restarts, [("foo", None), ("foo 1", "foo"), ("foo 2", "foo 1")]
+        )
+        work_dir = Path(self.task_name)
+        # the WAVECARs are moved along the chain
+        self.assertFalse((work_dir / "WAVECAR").exists())
+        self.assertFalse(
+            (work_dir / (vasp_warm_start_dir + ".000001") / "WAVECAR").exists()
+        )
+        self.assertEqual(
+            (work_dir / (vasp_warm_start_dir + ".000002") / "WAVECAR").read_text(),
+            "foo 2",
+        )
+        # the labels of the chain are appended to the first frame
+        sys = mocked_sys.return_value
+        self.assertEqual(sys.append.call_count, 2)
+        sys.to.assert_called_once_with("deepmd/npy", fp_default_out_data_name)
+        self.assertEqual(out["labeled_data"], work_dir / fp_default_out_data_name)
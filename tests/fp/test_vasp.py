@@ -11,6 +11,9 @@ from pathlib import (
 
 import dpdata
 import numpy as np
+from mock import (
+    patch,
+)
 
 # isort: off
 from .context import (
@@ -18,6 +21,8 @@ from .context import (
 )
 from dpgen2.fp.vasp import (
     VaspInputs,
+    lean_outcar,
+    load_outcar,
     make_kspacing_kpoints,
 )
 
@@ -119,3 +124,73 @@ Cartesian
         ss = dpdata.System("POSCAR")
         kps = vi.make_kpoints(ss["cells"][0])
         self.assertEqual(ref, kps)
+
+
+def make_outcar(fname, nsteps, nscf, nfill, nelm=60, seed=0):
+    r"""Write a synthetic OUTCAR of an H2O cell readable by dpdata."""
+    rng = np.random.default_rng(seed)
+    ntot = 3
+    with open(fname, "w") as fp:
+        fp.write(" vasp.6.3.0 synthetic\n")
+        for _ in range(2):
+            fp.write("   POTCAR:    PAW_PBE H 15Jun2001\n")
+            fp.write("   POTCAR:    PAW_PBE O 08Apr2002\n")
+        fp.write("   POSCAR = H2O1\n")
+        fp.write("   ions per type =               2   1\n")
+        fp.write(f"   NELM   =    {nelm};   NELMIN=  2; NELMDL= -5\n")
+        fp.write("   NWRITE =      2    write-flag & timer\n")
+        for ii in range(nsteps):
+            # the 2nd ionic step is not converged
+            scf = nelm if ii == 1 else nscf
+            for jj in range(scf):
+                fp.write(f"{'-' * 40} Iteration {ii + 1:6d}({jj + 1:4d})  {'-' * 40}\n")
+                for kk in range(nfill):
+                    fp.write(f"  eigenvalue {kk:6d} {rng.random():14.8f} in kB\n")
+                fp.write(f"  free energy    TOTEN  = {rng.normal():18.8f} eV\n")
+            cell = np.diag(rng.uniform(4.0, 6.0, 3)) + rng.uniform(-0.1, 0.1, (3, 3))
+            fp.write("  VOLUME and BASIS-vectors are now :\n")
+            fp.write(f" {'-' * 77}\n")
+            fp.write("  energy-cutoff  :      400.00\n")
+            fp.write(f"  volume of cell : {np.linalg.det(cell):14.2f}\n")
+            fp.write("      direct lattice vectors      reciprocal lattice vectors\n")
+            for vv in cell:
+                fp.write("  " + "".join(f"{xx:13.9f}" for xx in vv) + "\n")
+            fp.write("\n  FORCE on cell =-STRESS in cart. coord.  units (eV):\n")
+            fp.write("  Direction    XX          YY          ZZ          XY\n")
+            for kk in range(12):
+                terms = "".join(f"{xx:12.5f}" for xx in rng.random(6))
+                fp.write(f"  Term{kk:<6d}{terms}\n")
+            stress = "".join(f"{xx:12.5f}" for xx in rng.normal(size=6))
+            fp.write(f"  in kB {stress}\n")
+            fp.write(" POSITION                       TOTAL-FORCE (eV/Angst)\n")
+            fp.write(f" {'-' * 83}\n")
+            for _ in range(ntot):
+                posi = "".join(f"{xx:13.5f}" for xx in rng.uniform(0, 4, 3))
+                force = "".join(f"{xx:14.6f}" for xx in rng.normal(size=3))
+                fp.write(f" {posi}{force}\n")
+            fp.write(f"  free  energy   TOTEN  = {rng.normal():18.8f} eV\n")
+        fp.write(" General timing and accounting informations for this job:\n")
+
+
+class TestLeanOutcar(unittest.TestCase):
+    def setUp(self):
+        self.outcar = Path("OUTCAR")
+        make_outcar(self.outcar, nsteps=4, nscf=5, nfill=20)
+
+    def tearDown(self):
+        for ii in [self.outcar, Path("OUTCAR.lean")]:
+            if ii.is_file():
+                os.remove(ii)
+
+    def test_lean_outcar(self):
+        ref = dpdata.LabeledSystem(str(self.outcar), fmt="vasp/outcar")
+        # the unconverged step is not collected
+        self.assertEqual(ref.get_nframes(), 3)
+        lean = lean_outcar(self.outcar, "OUTCAR.lean")
+        self.assertLess(lean.stat().st_size, self.outcar.stat().st_size / 4)
+        with patch("dpgen2.fp.vasp.vasp_lean_outcar_size", 0):
+            ss = load_outcar(self.outcar)
+        self.assertEqual(ss["atom_names"], ref["atom_names"])
+        self.assertEqual(ss["atom_numbs"], ref["atom_numbs"])
+        for kk in ["atom_types", "cells", "coords", "energies", "forces", "virials"]:
+            np.testing.assert_array_equal(ss[kk], ref[kk])
@@ -73,6 +73,9 @@ from dpgen2.op.collect_data import (
 from dpgen2.op.collect_run_caly import (
     CollRunCaly,
 )
+from dpgen2.op.compress_models import (
+    CompressModels,
+)
 from dpgen2.op.prep_caly_dp_optim import (
     PrepCalyDPOptim,
 )
@@ -955,6 +958,22 @@ class MockedModifyTrainScript(ModifyTrainScript):
         return op
 
 
+class MockedCompressModels(CompressModels):
+    @OP.exec_sign_check
+    def execute(
+        self,
+        ip: OPIO,
+    ) -> OPIO:
+        out_dir = Path("compressed_models")
+        out_dir.mkdir(exist_ok=True)
+        models = []
+        for idx, mm in enumerate(ip["models"]):
+            oname = out_dir / ("model.%03d.pb" % idx)
+            oname.write_text("compressed " + Path(mm).read_text())
+            models.append(oname)
+        return OPIO({"models": models})
+
+
 class MockedCollRunCaly(CollRunCaly):
     @OP.exec_sign_check
     def execute(
@@ -1233,5 +1252,6 @@ ITEM: ATOMS id type x y z fx fy fz
                 "task_name": str(work_dir),
                 "traj": [work_dir / dump_file_name],
                 "model_devi": [work_dir / model_devi_file_name],
+                "model_devi_sidecar": [],
             }
         )
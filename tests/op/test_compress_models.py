@@ -0,0 +1,134 @@
+import shutil
+import unittest
+from pathlib import (
+    Path,
+)
+
+from dflow.python import (
+    OPIO,
+    TransientError,
+)
+from mock import (
+    patch,
+)
+
+# isort: off
+from .context import (
+    dpgen2,
+)
+from dpgen2.op.compress_models import (
+    CompressModels,
+)
+
+# isort: on
+
+
+def fake_run(cmd, shell=False):
+    words = cmd.split()
+    model = Path(words[words.index("-c" if "freeze" in words else "-i") + 1])
+    output = Path(words[words.index("-o") + 1])
+    action = "frozen" if "freeze" in words else "compressed"
+    output.write_text(f"{action} " + model.read_text())
+    return 0, "", ""
+
+
+class TestCompressModels(unittest.TestCase):
+    def setUp(self):
+        self.model_path = Path("models")
+        self.model_path.mkdir(exist_ok=True)
+        self.pb_models = [self.model_path / f"model_{ii}.pb" for ii in range(2)]
+        self.pt_models = [self.model_path / f"model_{ii}.pt" for ii in range(2)]
+        for idx, ii in enumerate(self.pb_models + self.pt_models):
+            ii.write_text(f"model{idx % 2}")
+
+    def tearDown(self):
+        for ii in [self.model_path, Path("compressed_models")]:
+            shutil.rmtree(ii, ignore_errors=True)
+
+    def run_op(self, config, models, block_id="iter-000002"):
+        op = CompressModels()
+        return op.execute(
+            OPIO(
+                {
+                    "config": config,
+                    "block_id": block_id,
+                    "models": models,
+                }
+            )
+        )
+
+    @patch("dpgen2.op.compress_models.run_command")
+    def test_pb(self, mocked_run):
+        mocked_run.side_effect = fake_run
+        out = self.run_op(
+            {"compress": True, "compress_args": "-s 0.02"}, self.pb_models
+        )
+        self.assertEqual(
+            [ii.name for ii in out["models"]], ["model.000.pb", "model.001.pb"]
+        )
+        self.assertEqual(out["models"][1].read_text(), "compressed model1")
+        self.assertEqual(mocked_run.call_count, 2)
+        self.assertEqual(
+            mocked_run.call_args[0][0],
+            f"dp compress -i {self.pb_models[1]} "
+            "-o compressed_models/model.001.pb -s 0.02",
+        )
+        # the trained models are kept
+        self.assertEqual(self.pb_models[1].read_text(), "model1")
+
+    @patch("dpgen2.op.freeze_models.run_command")
+    @patch("dpgen2.op.compress_models.run_command")
+    def test_pt_head(self, mocked_run, mocked_freeze):
+        mocked_run.side_effect = fake_run
+        mocked_freeze.side_effect = fake_run
+        out = self.run_op({"compress": True, "head": "foo"}, self.pt_models)
+        self.assertEqual(
+            [ii.name for ii in out["models"]], ["model.000.pth", "model.001.pth"]
+        )
+        self.assertEqual(out["models"][0].read_text(), "compressed frozen model0")
+        self.assertTrue(mocked_freeze.call_args[0][0].endswith("--head foo"))
+        self.assertTrue(mocked_run.call_args[0][0].startswith("dp --pt compress"))
+
+    @patch("dpgen2.op.compress_models.run_command")
+    def test_not_compress(self, mocked_run):
+        for config in [
+            {},
+            {"compress": False},
+            {"compress": True, "compress_start_iter": 3},
+        ]:
+            out = self.run_op(config, self.pb_models)
+            self.assertEqual(out["models"][0].read_text(), "model0")
+            self.assertEqual(out["models"][1].read_text(), "model1")
+        mocked_run.assert_not_called()
+        mocked_run.side_effect = fake_run
+        out = self.run_op(
+            {"compress": True, "compress_start_iter": 3},
+            self.pb_models,
+            block_id="iter-000003",
+        )
+        self.assertEqual(out["models"][0].read_text(), "compressed model0")
+
+    @patch("dpgen2.op.compress_models.run_command")
+    def test_compress_start_iter(self, mocked_run):
+        mocked_run.side_effect = fake_run
+        # the models are compressed from the iteration compress_start_iter on
+        for block_id, compressed in (
+            ("iter-000009", False),
+            ("iter-000010", True),
+            ("iter-000011", True),
+        ):
+            out = self.run_op(
+                {"compress": True, "compress_start_iter": 10},
+                self.pb_models,
+                block_id=block_id,
+            )
+            self.assertEqual(
+                out["models"][0].read_text().startswith("compressed "), compressed
+            )
+        self.assertEqual(mocked_run.call_count, 4)
+
+    @patch("dpgen2.op.compress_models.run_command")
+    def test_error(self, mocked_run):
+        mocked_run.side_effect = [(1, "", "error")]
+        with self.assertRaises(TransientError):
+            self.run_op({"compress": True}, self.pb_models)
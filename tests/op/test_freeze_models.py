@@ -0,0 +1,104 @@
+import shutil
+import unittest
+from pathlib import (
+    Path,
+)
+
+from dflow.python import (
+    OPIO,
+    TransientError,
+)
+from mock import (
+    patch,
+)
+
+# isort: off
+from .context import (
+    dpgen2,
+)
+from dpgen2.op.freeze_models import (
+    FreezeModels,
+    freeze_pytorch_model,
+    model_hash,
+)
+
+# isort: on
+
+
+def fake_freeze(cmd, shell=False):
+    words = cmd.split()
+    model = Path(words[words.index("-c") + 1])
+    output = Path(words[words.index("-o") + 1])
+    output.write_text("frozen " + model.read_text())
+    return 0, "", ""
+
+
+class TestFreezeModels(unittest.TestCase):
+    def setUp(self):
+        self.model_path = Path("models")
+        self.model_path.mkdir(exist_ok=True)
+        self.models = [self.model_path / f"model_{ii}.pt" for ii in range(2)]
+        for idx, ii in enumerate(self.models):
+            ii.write_text(f"model{idx}")
+        self.models.append(self.model_path / "model_2.pb")
+        self.models[-1].write_text("model2")
+        self.cache_dir = Path("freeze_cache")
+
+    def tearDown(self):
+        for ii in [self.model_path, self.cache_dir, Path("frozen_models")]:
+            shutil.rmtree(ii, ignore_errors=True)
+        for ii in Path(".").glob("frozen.*.pth"):
+            ii.unlink()
+
+    @patch("dpgen2.op.freeze_models.run_command")
+    def test_execute(self, mocked_run):
+        mocked_run.side_effect = fake_freeze
+        op = FreezeModels()
+        out = op.execute(
+            OPIO(
+                {
+                    "config": {"head": "foo"},
+                    "models": self.models,
+                }
+            )
+        )
+        self.assertEqual(
+            [ii.name for ii in out["models"]],
+            ["model.000.pth", "model.001.pth", "model.002.pb"],
+        )
+        self.assertEqual(out["models"][0].read_text(), "frozen model0")
+        self.assertEqual(out["models"][1].read_text(), "frozen model1")
+        self.assertEqual(out["models"][2].read_text(), "model2")
+        self.assertEqual(mocked_run.call_count, 2)
+        self.assertTrue(mocked_run.call_args[0][0].endswith("--head foo"))
+
+    @patch("dpgen2.op.freeze_models.run_command")
+    def test_cache(self, mocked_run):
+        mocked_run.side_effect = fake_freeze
+        model = self.models[0]
+        freeze_pytorch_model(model, "frozen.0.pth", cache_dir=self.cache_dir)
+        self.assertEqual(mocked_run.call_count, 1)
+        self.assertTrue((self.cache_dir / (model_hash(model) + ".pth")).is_file())
+        # the same model is not frozen again
+        freeze_pytorch_model(model, "frozen.1.pth", cache_dir=self.cache_dir)
+        self.assertEqual(mocked_run.call_count, 1)
+        self.assertEqual(Path("frozen.1.pth").read_text(), "frozen model0")
+        # a different head or a different content is frozen
+        freeze_pytorch_model(
+            model, "frozen.2.pth", head="foo", cache_dir=self.cache_dir
+        )
+        self.assertEqual(mocked_run.call_count, 2)
+        model.write_text("model0 new")
+        freeze_pytorch_model(model, "frozen.3.pth", cache_dir=self.cache_dir)
+        self.assertEqual(mocked_run.call_count, 3)
+        self.assertEqual(Path("frozen.3.pth").read_text(), "frozen model0 new")
+        self.assertEqual(len(list(self.cache_dir.iterdir())), 3)
+
+    @patch("dpgen2.op.freeze_models.run_command")
+    def test_error(self, mocked_run):
+        mocked_run.side_effect = [(1, "", "error")]
+        with self.assertRaises(TransientError):
+            freeze_pytorch_model(
+                self.models[0], "frozen.0.pth", cache_dir=self.cache_dir
+            )
+        self.assertFalse(self.cache_dir.exists())
@@ -51,7 +51,7 @@ def make_task_group_list(njobs):
         tt.add_file(calypso_input_file, f"input.dat_{ii}")
         tt.add_file(
             calypso_run_opt_file,
-            calypso_run_opt_str + calypso_run_opt_str_end % (0.01, 0.01, 100),
+            calypso_run_opt_str + calypso_run_opt_str_end % (0.01, 0.01, 100, 32),
         )
         tt.add_file(calypso_check_opt_file, calypso_check_opt_str)
         tgrp.add_task(tt)
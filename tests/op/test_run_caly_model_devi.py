@@ -287,7 +287,7 @@ ITEM: ATOMS id type x y z fx fy fz
         mocked_run_1.side_effect = side_effect_1
 
         def side_effect_2(*args, **kwargs):
-            return [[1, 1, 1, 1, 1, 1, 1, 1]]
+            return np.ones((args[0].shape[0], 8))
 
         mocked_run_2.side_effect = side_effect_2
 
@@ -335,3 +335,94 @@ ITEM: ATOMS id type x y z fx fy fz
         self.assertTrue(
             self.task_name / "model_devi.7.out" in out["model_devi"],
         )
+
+    def test_03_batched(self):
+        calls = []
+
+        def calc_model_devi(coord, box, atype, models):
+            calls.append(coord.shape[0])
+            coord = coord.reshape(coord.shape[0], -1, 3)
+            devi = np.zeros((coord.shape[0], 8))
+            devi[:, 1:4] = coord.sum(axis=1)
+            devi[:, 4:7] = coord.max(axis=1) * len(models)
+            devi[:, 7] = np.sum(atype)
+            return devi
+
+        mocked_infer = Mock(DeepPot=Mock(), calc_model_devi=calc_model_devi)
+        outs = []
+        for batch_size in (1, 4):
+            calls.clear()
+            np.random.seed(1)
+            with patch.dict(
+                "sys.modules",
+                {"deepmd": Mock(infer=mocked_infer), "deepmd.infer": mocked_infer},
+            ):
+                out = RunCalyModelDevi().execute(
+                    OPIO(
+                        {
+                            "type_map": self.type_map,
+                            "task_name": str(self.task_name),
+                            "traj_dirs": [self.work_dir],
+                            "models": self.models,
+                            "config": {"model_devi_batch_size": batch_size},
+                        }
+                    )
+                )
+            outs.append(
+                (
+                    [Path(ff).read_text() for ff in out["model_devi"]],
+                    [Path(ff).read_text() for ff in out["traj"]],
+                    list(calls),
+                )
+            )
+            shutil.rmtree(self.task_name)
+        # the per-frame path
+        self.assertTrue(all(cc == 1 for cc in outs[0][2]))
+        # the frames with the same atom types are evaluated at once
+        self.assertLess(len(outs[1][2]), len(outs[0][2]))
+        self.assertEqual(sum(outs[1][2]), sum(outs[0][2]))
+        self.assertTrue(all(cc <= 4 for cc in outs[1][2]))
+        self.assertEqual(outs[1][0], outs[0][0])
+        self.assertEqual(outs[1][1], outs[0][1])
+
+    def test_04_parse_traj_selection(self):
+        rng = np.random.default_rng(0)
+        frames = []
+        for ii in range(25):
+            atoms = Atoms(
+                numbers=[1, 3, 12, 13],
+                positions=rng.uniform(0.0, 6.0, (4, 3)),
+                cell=6.0 * np.eye(3),
+                pbc=True,
+            )
+            frames.append(atoms)
+        # the first frame passes the 1st filter
+        frames[0].set_positions([[0, 0, 0], [0, 0, 2.5], [2.5, 2.5, 0], [2.5, 0, 2.5]])
+        traj_file = self.work_dir.joinpath("25.traj")
+        write(traj_file, frames, format="traj")
+
+        def reasonable(atoms):
+            # the reference pair check
+            from ase.build import (
+                make_supercell,
+            )
+
+            from dpgen2.op.run_caly_model_devi import (
+                safe_dist_dict,
+            )
+
+            t2 = make_supercell(atoms, [[2, 0, 0], [0, 2, 0], [0, 0, 2]])
+            dd = t2.get_all_distances(mic=True)
+            sym = t2.get_chemical_symbols()
+            for a in range(len(sym)):
+                for b in range(a + 1, len(sym)):
+                    dr = (safe_dist_dict[sym[a]] + safe_dist_dict[sym[b]]) * 0.529 / 1.2
+                    if dd[a][b] < dr:
+                        return False
+            return True
+
+        expected = [frames[ii] for ii in [4, 9, -10, -5, -1] if reasonable(frames[ii])]
+        selected = parse_traj(traj_file)
+        self.assertEqual(len(selected), len(expected))
+        for ss, ee in zip(selected, expected):
+            np.testing.assert_array_equal(ss.get_positions(), ee.get_positions())
@@ -1,6 +1,7 @@
 import json
 import os
 import shutil
+import sys
 import unittest
 from pathlib import (
     Path,
@@ -25,16 +26,28 @@ from .context import (
     dpgen2,
 )
 from dpgen2.constants import (
+    lmp_binary_traj_name,
     lmp_conf_name,
     lmp_input_name,
     lmp_log_name,
     lmp_model_devi_name,
     lmp_traj_name,
     model_name_pattern,
+    pytorch_model_name_pattern,
+)
+from dpgen2.exploration.render.binary_traj import (
+    BinaryTrajReader,
+)
+from dpgen2.exploration.render.lammps_dump_reader import (
+    LammpsDumpReader,
 )
 from dpgen2.op.run_lmp import (
+    ModelDeviWatcher,
     RunLmp,
+    prune_lmp_traj,
+    run_lmp_with_watcher,
     set_models,
+    truncate_lmp_outputs,
 )
 from dpgen2.utils import (
     BinaryFileInput,
@@ -99,6 +112,40 @@ class TestRunLmp(unittest.TestCase):
                 (work_dir / (model_name_pattern % ii)).read_text(), f"model{ii}"
             )
 
+    @patch("dpgen2.op.run_lmp.run_command")
+    def test_model_devi_sidecar(self, mocked_run):
+        work_dir = Path(self.task_name)
+        model_devi = np.array(
+            [
+                [0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6],
+                [10, 1.1, 1.2, 1.3, 1.4, 1.5, 1.6],
+            ]
+        )
+
+        def write_model_devi(*args, **kwargs):
+            np.savetxt(lmp_model_devi_name, model_devi, fmt="%12.6e")
+            return (0, "foo\n", "")
+
+        mocked_run.side_effect = write_model_devi
+        op = RunLmp()
+        out = op.execute(
+            OPIO(
+                {
+                    "config": {"command": "mylmp", "model_devi_sidecar": True},
+                    "task_name": self.task_name,
+                    "task_path": self.task_path,
+                    "models": self.models,
+                }
+            )
+        )
+        # the text file is output with the sidecar
+        self.assertEqual(out["model_devi"], work_dir / lmp_model_devi_name)
+        np.testing.assert_array_equal(np.loadtxt(out["model_devi"]), model_devi)
+        self.assertEqual(out["model_devi_sidecar"], work_dir / "model_devi.npy")
+        sidecar = np.load(out["model_devi_sidecar"])
+        self.assertEqual(sidecar.dtype, np.float64)
+        np.testing.assert_array_equal(sidecar, model_devi[:, 1:])
+
     @patch("dpgen2.op.run_lmp.run_command")
     def test_error(self, mocked_run):
         mocked_run.side_effect = [(1, "foo\n", "")]
@@ -123,6 +170,245 @@ class TestRunLmp(unittest.TestCase):
         ]
         mocked_run.assert_has_calls(calls)
 
+    @patch("dpgen2.op.run_lmp.run_lmp_with_watcher")
+    def test_early_stop(self, mocked_run):
+        def killed_lmp(command, watcher, interval):
+            Path(lmp_traj_name).write_text("".join(make_dump_frames([0, 10, 20])))
+            lines = make_model_devi_lines([0, 10, 20, 30], [0.1, 0.5, 0.6, 0.7])
+            Path(lmp_model_devi_name).write_text("\n".join(lines) + "\n")
+            return -15, "", "", True
+
+        mocked_run.side_effect = killed_lmp
+        op = RunLmp()
+        out = op.execute(
+            OPIO(
+                {
+                    "config": {
+                        "command": "mylmp",
+                        "early_stop": {"level_f_hi": 0.3, "numb_fail": 3},
+                    },
+                    "task_name": self.task_name,
+                    "task_path": self.task_path,
+                    "models": self.models,
+                }
+            )
+        )
+        watcher = mocked_run.call_args[0][1]
+        self.assertEqual(watcher.level_f_hi, 0.3)
+        self.assertEqual(watcher.numb_fail, 3)
+        self.assertEqual(mocked_run.call_args[0][2], 10.0)
+        # the outputs are truncated to the common frames
+        self.assertEqual(len(out["model_devi"].read_text().strip().split("\n")), 4)
+
+    @patch("dpgen2.op.freeze_models.run_command")
+    @patch("dpgen2.op.run_lmp.run_command")
+    def test_frozen_models(self, mocked_run, mocked_freeze):
+        mocked_run.side_effect = [(0, "foo\n", "")]
+        models = [self.model_path / Path(f"model.{ii:03d}.pth") for ii in range(2)]
+        for idx, ii in enumerate(models):
+            ii.write_text(f"frozen model{idx}")
+        op = RunLmp()
+        op.execute(
+            OPIO(
+                {
+                    "config": {"command": "mylmp"},
+                    "task_name": self.task_name,
+                    "task_path": self.task_path,
+                    "models": models,
+                }
+            )
+        )
+        # the frozen models are linked, not frozen again
+        mocked_freeze.assert_not_called()
+        work_dir = Path(self.task_name)
+        for ii in range(2):
+            self.assertEqual(
+                (work_dir / (pytorch_model_name_pattern % ii)).read_text(),
+                f"frozen model{ii}",
+            )
+
+
+def make_model_devi_lines(steps, max_devi_f):
+    ret = [
+        "#       step max_devi_v min_devi_v avg_devi_v max_devi_f min_devi_f avg_devi_f"
+    ]
+    for ss, ff in zip(steps, max_devi_f):
+        ret.append(f"{ss:12d} 0.0 0.0 0.0 {ff:.6e} 0.0 0.0")
+    return ret
+
+
+def make_dump_frames(steps, natoms=2):
+    ret = []
+    for ss in steps:
+        frame = ["ITEM: TIMESTEP", str(ss), "ITEM: NUMBER OF ATOMS", str(natoms)]
+        frame += ["ITEM: BOX BOUNDS pp pp pp"] + ["0.0 10.0"] * 3
+        frame += ["ITEM: ATOMS id type x y z"]
+        frame += [f"{ii+1} 1 0.0 0.0 {ii}.0" for ii in range(natoms)]
+        ret.append("\n".join(frame) + "\n")
+    return ret
+
+
+class TestEarlyStop(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = Path("test_early_stop")
+        self.work_dir.mkdir(exist_ok=True)
+        self.model_devi = self.work_dir / lmp_model_devi_name
+        self.traj = self.work_dir / lmp_traj_name
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_watcher(self):
+        lines = make_model_devi_lines(range(0, 60, 10), [0.1, 0.5, 0.6, 0.1, 0.7, 0.8])
+        text = "\n".join(lines) + "\n"
+        watcher = ModelDeviWatcher(self.model_devi, 0.3, numb_fail=3)
+        self.assertFalse(watcher.update())
+        # the incomplete line is not counted
+        cut = text.index(lines[3]) + 5
+        self.model_devi.write_text(text[:cut])
+        self.assertFalse(watcher.update())
+        self.assertEqual((watcher.nframes, watcher.nfail), (2, 1))
+        self.model_devi.write_text(text)
+        self.assertTrue(watcher.update())
+        self.assertEqual((watcher.nframes, watcher.nfail), (6, 4))
+        watcher = ModelDeviWatcher(self.model_devi, 0.3, rate_fail=0.5, min_frames=7)
+        self.assertFalse(watcher.update())
+        watcher = ModelDeviWatcher(self.model_devi, 0.3, rate_fail=0.5, min_frames=6)
+        self.assertTrue(watcher.update())
+
+    def test_truncate(self):
+        frames = make_dump_frames(range(0, 60, 10))
+        # the last frame is incomplete
+        self.traj.write_text("".join(frames[:5]) + frames[5][:-10])
+        lines = make_model_devi_lines(range(0, 70, 10), [0.1] * 7)
+        self.model_devi.write_text("\n".join(lines) + "\n" + "  70 0.0")
+        self.assertEqual(truncate_lmp_outputs(self.traj, self.model_devi), 40)
+        self.assertEqual(self.traj.read_text(), "".join(frames[:5]))
+        self.assertEqual(self.model_devi.read_text(), "\n".join(lines[:6]) + "\n")
+        # the trajectory is shorter
+        self.traj.write_text("".join(frames[:2]))
+        self.assertEqual(truncate_lmp_outputs(self.traj, self.model_devi), 10)
+        self.assertEqual(self.model_devi.read_text(), "\n".join(lines[:3]) + "\n")
+
+    def test_run_with_watcher(self):
+        script = self.work_dir / "fake_lmp.py"
+        script.write_text(
+            "\n".join(
+                [
+                    "import time",
+                    f"fp = open('{self.model_devi}', 'w')",
+                    "for ii in range(100000):",
+                    "    fp.write(f'{ii} 0 0 0 1.0 0 0\\n')",
+                    "    fp.flush()",
+                    "    time.sleep(0.01)",
+                ]
+            )
+        )
+        watcher = ModelDeviWatcher(self.model_devi, 0.3, numb_fail=5)
+        ret, out, err, stopped = run_lmp_with_watcher(
+            f"{sys.executable} {script}", watcher, interval=0.1
+        )
+        self.assertTrue(stopped)
+        self.assertGreaterEqual(watcher.nfail, 5)
+        self.assertLess(watcher.nfail, 1000)
+        watcher = ModelDeviWatcher(self.model_devi, 0.3, numb_fail=5)
+        ret, out, err, stopped = run_lmp_with_watcher("echo foo", watcher, 0.1)
+        self.assertEqual((ret, out, stopped), (0, "foo\n", False))
+
+
+class TestPruneTraj(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = Path("test_prune_traj")
+        self.work_dir.mkdir(exist_ok=True)
+        self.model_devi = self.work_dir / lmp_model_devi_name
+        self.traj = self.work_dir / lmp_traj_name
+        self.frames = make_dump_frames(range(0, 60, 10))
+        self.traj.write_text("".join(self.frames))
+        lines = make_model_devi_lines(range(0, 60, 10), [0.1, 0.5, 0.9, 0.2, 0.3, 0.4])
+        self.model_devi_text = "\n".join(lines) + "\n"
+        self.model_devi.write_text(self.model_devi_text)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_prune(self):
+        fname = self.work_dir / lmp_binary_traj_name
+        nkept = prune_lmp_traj(
+            self.traj, self.model_devi, fname, level_f_hi=0.8, level_f_lo=0.3
+        )
+        self.assertEqual(nkept, 3)
+        # the model deviation is complete
+        self.assertEqual(self.model_devi.read_text(), self.model_devi_text)
+        reader = BinaryTrajReader(fname)
+        self.assertEqual(reader.nframes, 6)
+        np.testing.assert_array_equal(reader.timesteps, range(0, 60, 10))
+        ref = LammpsDumpReader(self.traj).get_system([1, 4, 5])
+        ss = reader.get_system([1, 4, 5])
+        np.testing.assert_allclose(ss["coords"], ref["coords"])
+        for ii in [0, 2, 3]:
+            self.assertRaises(RuntimeError, reader.read_coords, [ii])
+
+    def test_prune_boundary(self):
+        # the frames on the trust levels may be candidates
+        fname = self.work_dir / lmp_binary_traj_name
+        nkept = prune_lmp_traj(
+            self.traj, self.model_devi, fname, level_f_hi=0.9, level_f_lo=0.2
+        )
+        self.assertEqual(nkept, 5)
+        nkept = prune_lmp_traj(
+            self.traj, self.model_devi, fname, level_f_hi=0.5, level_f_lo=0.3
+        )
+        self.assertEqual(nkept, 3)
+        reader = BinaryTrajReader(fname)
+        self.assertEqual(reader.get_system([1, 4, 5]).get_nframes(), 3)
+
+    def run_op(self, config):
+        task_path = self.work_dir / "task"
+        task_path.mkdir(exist_ok=True)
+        (task_path / lmp_input_name).write_text("bar")
+        work_dir = self.work_dir / "task_000"
+        shutil.rmtree(work_dir, ignore_errors=True)
+        traj, model_devi = self.traj.resolve(), self.model_devi.resolve()
+
+        def run_lmp(command, shell=False):
+            shutil.copyfile(traj, lmp_traj_name)
+            shutil.copyfile(model_devi, lmp_model_devi_name)
+            return 0, "", ""
+
+        with patch("dpgen2.op.run_lmp.run_command") as mocked_run:
+            mocked_run.side_effect = run_lmp
+            return RunLmp().execute(
+                OPIO(
+                    {
+                        "config": config,
+                        "task_name": str(work_dir),
+                        "task_path": task_path,
+                        "models": [],
+                    }
+                )
+            )
+
+    def test_prune_execute(self):
+        out = self.run_op({"prune_traj": {"level_f_hi": 0.8}})
+        # the pruned trajectory is output in the binary format, the LAMMPS
+        # dump is not output
+        self.assertEqual(out["traj"].name, lmp_binary_traj_name)
+        self.assertFalse((out["traj"].parent / lmp_traj_name).exists())
+        reader = BinaryTrajReader(out["traj"])
+        self.assertEqual(reader.nframes, 6)
+        self.assertEqual(reader.compression, None)
+        self.assertRaises(RuntimeError, reader.read_coords, [2])
+        ss = reader.get_system([0, 5])
+        np.testing.assert_allclose(ss["coords"][1], [[0, 0, 0], [0, 0, 1]])
+
+    def test_binary_traj_execute(self):
+        out = self.run_op({"binary_traj": {"compression": None}})
+        self.assertEqual(out["traj"].name, lmp_binary_traj_name)
+        self.assertFalse((out["traj"].parent / lmp_traj_name).exists())
+        reader = BinaryTrajReader(out["traj"])
+        self.assertEqual(reader.nframes, 6)
+        self.assertEqual(reader.get_system(range(6)).get_nframes(), 6)
+
 
 class TestRunLmpDist(unittest.TestCase):
     lmp_config = """variable        NSTEPS          equal 1000
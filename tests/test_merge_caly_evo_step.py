@@ -348,3 +348,75 @@ class TestCalyEvoStepMerge(unittest.TestCase):
                 Path("opt_path_0/traj_results").joinpath(f"{idx}.0.traj") in traj_list
             )
             os.chdir(cwd)
+
+
+class TestCalyEvoStepMergeLocal(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = Path("storge_files")
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.max_step = 2
+        self.models = self.work_dir / "models"
+        for ii in range(mocked_numb_models):
+            model_path = self.models / f"task.{ii}"
+            model_path.mkdir(exist_ok=True, parents=True)
+            model_path.joinpath("model.ckpt.pt").write_text(f"model {ii}")
+        self.input_file = self.work_dir.joinpath("input.dat")
+        self.input_file.write_text(str(self.max_step))
+        self.caly_run_opt_file = self.work_dir.joinpath("caly_run_opt.py")
+        self.caly_run_opt_file.write_text("caly_run_opt")
+        self.caly_check_opt_file = self.work_dir.joinpath("caly_check_opt.py")
+        self.caly_check_opt_file.write_text("caly_check_opt")
+        self.task_name = "caly_task." + calypso_index_pattern % 1
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+        for i in Path().glob("caly-evo-step-*"):
+            shutil.rmtree(i, ignore_errors=True)
+        for i in Path().glob("caly_task*"):
+            shutil.rmtree(i, ignore_errors=True)
+
+    def test_caly_evo_step_merge(self):
+        op = CalyEvoStepMerge(
+            name="caly-evo-step",
+            collect_run_caly=MockedCollRunCaly,
+            prep_dp_optim=PrepCalyDPOptim,
+            run_dp_optim=MockedRunCalyDPOptim,
+            prep_config=default_config,
+            run_config=default_config,
+            upload_python_packages=None,
+        )
+        out = op.execute(
+            OPIO(
+                {
+                    "iter_num": 0,
+                    "cnt_num": 0,
+                    "block_id": "iter-000000",
+                    "task_name": self.task_name,
+                    "expl_config": {},
+                    "models": self.models,
+                    "input_file": self.input_file,
+                    "caly_run_opt_file": self.caly_run_opt_file,
+                    "caly_check_opt_file": self.caly_check_opt_file,
+                    "results": None,
+                    "step": None,
+                    "opt_results_dir": None,
+                    "qhull_input": None,
+                }
+            )
+        )
+        # the trajectories of all generations are gathered in the task
+        for traj_dir in out["traj_results"]:
+            self.assertFalse(traj_dir.is_absolute())
+            self.assertEqual(traj_dir.parts[0], self.task_name)
+        trajs = sorted(
+            str(traj.relative_to(self.task_name))
+            for traj_dir in out["traj_results"]
+            for traj in traj_dir.glob("*.traj")
+        )
+        self.assertEqual(len(trajs), 5 * self.max_step)
+        self.assertIn("opt_path_0/traj_results/0.0.traj", trajs)
+        self.assertIn("opt_path_2/traj_results/1.4.traj", trajs)
+        # the generations are chained by the calypso step file
+        self.assertEqual(
+            Path(f"caly-evo-step-1/{self.task_name}/step").read_text(), "3"
+        )
@@ -12,6 +12,7 @@ from dargs import (
     Argument,
 )
 from dflow.python import (
+    OPIO,
     FatalError,
 )
 from mock import (
@@ -20,6 +21,7 @@ from mock import (
 )
 
 from dpgen2.fp.deepmd import (
+    DeepmdInputs,
     PrepDeepmd,
     RunDeepmd,
     deepmd_input_path,
@@ -60,6 +62,62 @@ class TestPrepDeepmd(unittest.TestCase):
         self.assertTrue(np.allclose(self.system["cells"], ss["cells"]))
         self.assertTrue(np.allclose(self.system["coords"], ss["coords"]))
 
+    def test_execute_batched(self):
+        confs = Path("confs")
+        ms = dpdata.MultiSystems(type_map=["H", "O"])
+        for natoms, nframes in [(2, 5), (3, 3)]:
+            ms.append(
+                dpdata.System(
+                    data={
+                        "atom_names": ["H", "O"],
+                        "atom_numbs": [natoms - 1, 1],
+                        "atom_types": np.array([0] * (natoms - 1) + [1]),
+                        "cells": np.tile(np.eye(3), (nframes, 1, 1)),
+                        "coords": np.random.random((nframes, natoms, 3)),
+                        "orig": np.zeros(3),
+                    }
+                )
+            )
+        ms.to_deepmd_npy(confs)
+        self.addCleanup(shutil.rmtree, confs, ignore_errors=True)
+        op = PrepDeepmd().execute(
+            OPIO(
+                {
+                    "config": {"inputs": DeepmdInputs(max_nframes_per_task=2)},
+                    "type_map": ["H", "O"],
+                    "confs": [confs],
+                }
+            )
+        )
+        for pp in op["task_paths"]:
+            self.addCleanup(shutil.rmtree, pp, ignore_errors=True)
+        # 5 frames of H1O1 in 3 tasks and 3 frames of H2O1 in 2 tasks
+        self.assertEqual(len(op["task_names"]), 5)
+        nframes = {}
+        for pp in op["task_paths"]:
+            ss = dpdata.System(Path(pp) / deepmd_input_path, fmt="deepmd/npy")
+            nframes.setdefault(ss.get_natoms(), []).append(ss.get_nframes())
+        self.assertEqual(nframes, {2: [2, 2, 1], 3: [2, 1]})
+
+    def test_prep_task_one_set(self):
+        # more frames than the default set size of dpdata
+        nframes = 6000
+        system = dpdata.System(
+            data={
+                "atom_names": ["H", "O"],
+                "atom_numbs": [1, 1],
+                "atom_types": np.array([0, 1]),
+                "cells": np.tile(np.eye(3), (nframes, 1, 1)),
+                "coords": np.random.random((nframes, 2, 3)),
+                "orig": np.zeros(3),
+            }
+        )
+        self.addCleanup(shutil.rmtree, deepmd_input_path, ignore_errors=True)
+        PrepDeepmd().prep_task(system, DeepmdInputs(max_nframes_per_task=nframes))
+        sets = sorted(Path(deepmd_input_path).glob("set.*"))
+        self.assertEqual([ss.name for ss in sets], ["set.000"])
+        self.assertEqual(np.load(sets[0] / "coord.npy").shape[0], nframes)
+
 
 class TestRunDeepmd(unittest.TestCase):
     def setUp(self):
@@ -210,6 +268,67 @@ class TestRunDeepmd(unittest.TestCase):
         virial_foce = np.zeros((self.system["coords"].shape[0], 3, 3))
         return energy, force, virial_foce
 
+    def test_dp_infer_batched(self):
+        system = dpdata.System(
+            data={
+                "atom_names": ["H", "O"],
+                "atom_numbs": [1, 1],
+                "atom_types": np.array([0, 1]),
+                "cells": np.tile(np.eye(3), (4, 1, 1)),
+                "coords": np.random.random((4, 2, 3)),
+                "orig": np.zeros(3),
+            }
+        )
+        system.to("deepmd/npy", deepmd_input_path)
+        out_name = self.task_path / "test_out"
+
+        dp = Mock()
+        dp.eval.return_value = (
+            np.arange(4.0).reshape(4, 1),
+            np.zeros((4, 2, 3)),
+            np.zeros((4, 9)),
+        )
+        run_deepmd = RunDeepmd()
+        run_deepmd._dp_infer(dp, ["H", "O"], str(out_name))
+
+        # all frames are labeled by one evaluation
+        dp.eval.assert_called_once()
+        self.assertEqual(dp.eval.call_args[0][0].shape, (4, 2, 3))
+        ss = dpdata.LabeledSystem(out_name, fmt="deepmd/npy")
+        self.assertEqual(ss.get_nframes(), 4)
+        np.testing.assert_allclose(ss["energies"], np.arange(4.0))
+        np.testing.assert_allclose(ss["coords"], system["coords"])
+
+    def test_dp_infer_one_set(self):
+        # more frames than the default set size of dpdata
+        nframes = 5001
+        system = dpdata.System(
+            data={
+                "atom_names": ["H", "O"],
+                "atom_numbs": [1, 1],
+                "atom_types": np.array([0, 1]),
+                "cells": np.tile(np.eye(3), (nframes, 1, 1)),
+                "coords": np.random.random((nframes, 2, 3)),
+                "orig": np.zeros(3),
+            }
+        )
+        system.to("deepmd/npy", deepmd_input_path, set_size=nframes)
+        out_name = self.task_path / "test_out"
+
+        dp = Mock()
+        dp.eval.return_value = (
+            np.arange(float(nframes)).reshape(nframes, 1),
+            np.zeros((nframes, 2, 3)),
+            np.zeros((nframes, 9)),
+        )
+        run_deepmd = RunDeepmd()
+        run_deepmd._dp_infer(dp, ["H", "O"], str(out_name))
+
+        dp.eval.assert_called_once()
+        ss = dpdata.LabeledSystem(out_name, fmt="deepmd/npy")
+        self.assertEqual(ss.get_nframes(), nframes)
+        np.testing.assert_allclose(ss["energies"], np.arange(float(nframes)))
+
     def test_dp_infer_with_nopbc(self):
         self.system_nopbc.to("deepmd/npy", deepmd_input_path)
 
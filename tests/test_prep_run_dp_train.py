@@ -50,6 +50,7 @@ from context import (
     upload_python_packages,
 )
 from mocked_ops import (
+    MockedCompressModels,
     MockedModifyTrainScript,
     MockedPrepDPTrain,
     MockedRunDPTrain,
@@ -304,7 +305,7 @@ class TestTrainDp(unittest.TestCase):
         ]
 
     def tearDown(self):
-        for ii in ["init_data", "iter_data"] + self.task_names:
+        for ii in ["init_data", "iter_data", "compressed_models"] + self.task_names:
             if Path(ii).exists():
                 shutil.rmtree(str(ii))
         for ii in self.str_init_models:
@@ -395,6 +396,51 @@ class TestTrainDp(unittest.TestCase):
         step = wf.query_step(name="train-step")[0]
         self.assertEqual(step.phase, "Succeeded")
 
+    def test_train_compress(self):
+        steps = PrepRunDPTrain(
+            "train-steps",
+            MockedPrepDPTrain,
+            MockedRunDPTrain,
+            upload_python_packages=upload_python_packages,
+            prep_config=default_config,
+            run_config=default_config,
+            compress_op=MockedCompressModels,
+        )
+        train_step = Step(
+            "train-step",
+            template=steps,
+            parameters={
+                "block_id": "iter-000001",
+                "numb_models": self.numb_models,
+                "template_script": self.template_script,
+                "train_config": {},
+            },
+            artifacts={
+                "init_models": self.init_models,
+                "init_data": self.init_data,
+                "iter_data": self.iter_data,
+            },
+        )
+        wf = Workflow(name="dp-train-compress", host=default_host)
+        wf.add(train_step)
+        wf.submit()
+
+        while wf.query_status() in ["Pending", "Running"]:
+            time.sleep(4)
+
+        self.assertEqual(wf.query_status(), "Succeeded")
+        step = wf.query_step(name="train-step")[0]
+        self.assertEqual(step.phase, "Succeeded")
+        # the explore models are output by the compress step
+        models = download_artifact(step.outputs.artifacts["explore_models"])
+        self.assertEqual(len(models), self.numb_models)
+        for mm in models:
+            self.assertTrue(Path(mm).read_text().startswith("compressed "))
+        # the trained models are kept
+        models = download_artifact(step.outputs.artifacts["models"])
+        for mm in models:
+            self.assertFalse(Path(mm).read_text().startswith("compressed "))
+
     def test_finetune(self):
         steps = PrepRunDPTrain(
             "finetune-steps",
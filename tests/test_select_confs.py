@@ -11,6 +11,9 @@ from typing import (
     Set,
     Tuple,
 )
+from unittest import (
+    mock,
+)
 
 import jsonpickle
 import numpy as np
@@ -126,6 +129,40 @@ class TestSelectConfs(unittest.TestCase):
         self.assertTrue(confs[0].read_text(), "conf of conf.0")
         self.assertTrue(confs[1].read_text(), "conf of conf.1")
 
+    def test_model_devi_sidecars(self):
+        conf_selector = mock.Mock()
+        conf_selector.select.return_value = ([], MockedExplorationReport())
+        op = SelectConfs()
+        op.execute(
+            OPIO(
+                {
+                    "conf_selector": conf_selector,
+                    "type_map": self.type_map,
+                    "trajs": self.trajs,
+                    "model_devis": self.model_devis,
+                    "model_devi_sidecars": [Path("md.foo.npy"), Path("md.bar.npy")],
+                }
+            )
+        )
+        # the sidecars are read instead of the text files
+        conf_selector.select.assert_called_once_with(
+            self.trajs,
+            [Path("md.foo.npy"), Path("md.bar.npy")],
+            type_map=self.type_map,
+        )
+        with self.assertRaises(FatalError):
+            op.execute(
+                OPIO(
+                    {
+                        "conf_selector": conf_selector,
+                        "type_map": self.type_map,
+                        "trajs": self.trajs,
+                        "model_devis": self.model_devis,
+                        "model_devi_sidecars": [Path("md.foo.npy")],
+                    }
+                )
+            )
+
     def test_validate_trajs(self):
         trajs = ["foo", "bar", None, "tar"]
         model_devis = ["zar", "par", None, "mar"]